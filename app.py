@@ -1,30 +1,44 @@
 from ast import parse
 from mailbox import Message
+import logging
+import os
 import re
+import time
 import uuid
-from flask import Flask, jsonify, request, make_response,jsonify, session
+import base64
+import gzip
+import zlib
+import io
+import binascii
+import click
+from flask import Flask, Response, jsonify, request, make_response,jsonify, session, abort
 from flask_sqlalchemy import SQLAlchemy
 from flask_cors import CORS
 from flask_migrate import Migrate
 from config import Config
-from sqlalchemy import func
+from logging_setup import configure_logging
+from engine_profiles import configure_engine
+from replicas import RoutingSession, init_replicas, primary, read_engine, replica_stats
+from sqlalchemy import func, tuple_
 from datetime import datetime, timedelta
-from werkzeug.security import generate_password_hash, check_password_hash
 from itsdangerous import BadSignature, URLSafeTimedSerializer
 import jwt
 from functools import wraps
 
 # Initialize serializer
 serializer = URLSafeTimedSerializer(Config.SECRET_KEY)
-SECRET_KEY = 'Allan'
+SECRET_KEY = Config.JWT_SECRET_KEY
 TOKEN_EXPIRY_HOURS = 24  # Token valid for 24 hours
 
 # Initialize Flask app
 app = Flask(__name__)
 app.config.from_object(Config)
+configure_logging(app.config)
+logger = logging.getLogger(__name__)
+configure_engine(app.config)
 
 # Initialize extensions
-db = SQLAlchemy(app)
+db = SQLAlchemy(app, session_options={'class_': RoutingSession})
 migrate = Migrate(app, db)
 from flask_cors import CORS
 
@@ -35,57 +49,55 @@ CORS(app,
      allow_headers=['Content-Type', 'Authorization'])  # 👈 ADD THIS LINE
 
 # Import models after db initialization to avoid circular imports
-from models import Management, Organizer, Event, Venue, Sponsor, TicketType, User, Order, Discount, Ticket, RefundRequest
+from models import Management, Organizer, Event, Venue, Sponsor, TicketType, User, Order, Discount, Ticket, RefundRequest, Hold, TicketTypeSales
+from scheduler import scheduler, start_scheduler, init_local_scheduler
+from qr_worker import wake_qr_worker, qr_cache
+from qrcodes import FORMATS
+from inventory import InventoryError, InsufficientInventory, InvalidQuantities, normalize_quantities, load_ticket_types, reserve_inventory, retry_on_conflict
+from holds import HoldUnavailable, create_hold, convert_hold, release_hold, delete_event_holds
+from tickets import AttendeeError, normalize_attendees, quantities_from_attendees, assign_attendees, issue_tickets
+from checkin import CheckinError, normalize_codes, check_in, code_index, checkin_stats
+from manifest import build_manifest, manifest_chunks, parse_version, reset_manifests
+from search import event_matches, search_organizer_ids, rebuild_search_index
+from repository import organizer_event_sales
+from sales import record_sale, get_event_sales, delete_event_sales, delete_ticket_type_sales, rebuild_sales_counters
+from cache import response_cache
+from auth import AuthError, authenticate, load_principal, revoke_tokens, get_manager_id_from_token, auth_stats
+from metrics import init_metrics, registry as metrics_registry, render_counter
+from passwords import HashingBusy, hasher
+from facets import category_counts, rebuild_category_facets
+from serializers import EVENT_SUMMARY, EVENT_ADMIN, EVENT_DETAIL, ORDER_WITH_TICKETS
+from backup import BackupError, resolve_checkpoint, stream_backup, gzip_stream, chunked, restore_records, legacy_records, ndjson_records
+import synthetic  # registers `flask seed`
 #organizer dashboard
 def token_required(f):
+    """Pass the cached user Principal and the token claims to the view."""
     @wraps(f)
     def decorated(*args, **kwargs):
-        token = None
-        if 'Authorization' in request.headers:
-            bearer = request.headers.get('Authorization')
-            if bearer and bearer.startswith('Bearer '):
-                token = bearer.split()[1]
-        if not token:
-            return jsonify({'error': 'Token is missing'}), 401
-        data = decode_token(token)
-        if not data:
-            return jsonify({'error': 'Invalid or expired token'}), 401
-        user = User.query.get(data['id'])
+        try:
+            data = authenticate()
+            user = load_principal('user', data)
+        except AuthError as e:
+            return jsonify({'error': e.message}), e.status
         if not user:
             return jsonify({'error': 'User not found'}), 404
         return f(user, data, *args, **kwargs)
     return decorated
 
 def manager_token_required(f):
+    """Pass the cached manager Principal to the view."""
     @wraps(f)
     def decorated(*args, **kwargs):
-        token = None
-    # Check Authorization header
-        if 'Authorization' in request.headers:
-            auth_header = request.headers['Authorization']
-            if auth_header.startswith('Bearer '):
-                token = auth_header.split(' ')[1]
-
-        if not token:
-            return jsonify({'error': 'Token is missing'}), 401
-
         try:
-            data = jwt.decode(token, SECRET_KEY, algorithms=['HS256'])
-
-            
+            data = authenticate()
             if data.get('role') != 'manager':
                 return jsonify({'error': 'Unauthorized'}), 403
+            current_manager = load_principal('manager', data)
+        except AuthError as e:
+            return jsonify({'error': e.message}), e.status
 
-            from models import Management  
-            current_manager = Management.query.get(data['id'])
-
-            if not current_manager:
-                return jsonify({'error': 'Manager not found'}), 404
-
-        except jwt.ExpiredSignatureError:
-            return jsonify({'error': 'Token has expired'}), 401
-        except jwt.InvalidTokenError:
-            return jsonify({'error': 'Invalid token'}), 401
+        if not current_manager:
+            return jsonify({'error': 'Manager not found'}), 404
 
         return f(current_manager, *args, **kwargs)
     return decorated
@@ -93,27 +105,19 @@ def manager_token_required(f):
 def organizer_dashboard(organizer_id):
     organizer = Organizer.query.get_or_404(organizer_id)
 
-    # Get all events by this organizer
-    events = Event.query.filter_by(organizer_id=organizer_id).all()
-    event_ids = [event.id for event in events]
-
-    # Total revenue from orders of those events
-    total_revenue = db.session.query(func.coalesce(func.sum(Order.total_amount), 0))\
-        .filter(Order.event_id.in_(event_ids)).scalar()
+    # All of the organizer's events with their sales, in one query
+    sales = organizer_event_sales(organizer_id)
 
-    # Total attendees (number of tickets sold)
-    total_attendees = db.session.query(func.count(Ticket.id))\
-        .join(Order).filter(Order.event_id.in_(event_ids)).scalar()
+    total_revenue = sum(row.revenue for row in sales)
+    total_attendees = sum(row.attendees for row in sales)
 
-    # Average rating from all events
-    average_rating = db.session.query(func.coalesce(func.avg(Event.rating), 0))\
-        .filter(Event.organizer_id == organizer_id).scalar()
+    # Average rating from all rated events
+    ratings = [row.event.rating for row in sales if row.event.rating is not None]
+    average_rating = sum(ratings) / len(ratings) if ratings else 0
 
-    # Get upcoming event for display
-    today_event = Event.query.filter(
-        Event.organizer_id == organizer_id,
-        Event.start_datetime >= datetime.utcnow()
-    ).order_by(Event.start_datetime).first()
+    # Get upcoming event for display (rows are ordered by start date)
+    now = datetime.utcnow()
+    today_event = next((row.event for row in sales if row.event.start_datetime >= now), None)
 
     return jsonify({
         'organizer': {
@@ -133,18 +137,8 @@ def organizer_dashboard(organizer_id):
 #upcoming events
 @app.route('/organiser/<int:organiser_id>/upcoming', methods=['GET'])
 def get_upcoming_events(organiser_id):
-    now = datetime.utcnow()
-    upcoming_events = Event.query.filter(
-        Event.organizer_id == organiser_id,
-        Event.start_datetime > now
-    ).order_by(Event.start_datetime.asc()).all()
-
     upcoming_data = []
-    for event in upcoming_events:
-        orders = Order.query.filter_by(event_id=event.id, status='completed').all()
-        total_attendees = sum(len(order.tickets) for order in orders)
-        total_revenue = sum(order.total_amount for order in orders)
-
+    for event, venue, total_attendees, total_revenue in organizer_event_sales(organiser_id, upcoming_only=True):
         event_data = {
             'id': event.id,
             'title': event.title,
@@ -157,7 +151,6 @@ def get_upcoming_events(organiser_id):
         }
 
         if event.venue_id:
-            venue = Venue.query.get(event.venue_id)
             event_data['venue'] = venue.to_dict() if venue else None
 
         upcoming_data.append(event_data)
@@ -258,6 +251,7 @@ def get_organizer(organizer_id):
 
 
 @app.route('/organizers/featured/detailed')
+@response_cache.cached('catalog')
 def featured_organizers_detailed():
     organizers = db.session.query(
         Organizer,
@@ -299,13 +293,20 @@ def search_organizers():
         func.count(Event.id).label('event_count')
     ).join(Event).group_by(Organizer.id)
     
-    if search_term:
+    ranked_ids = search_organizer_ids(search_term) if search_term else None
+    if ranked_ids is not None:
+        query = query.filter(Organizer.id.in_(ranked_ids))
+    elif search_term:
         query = query.filter(Organizer.name.ilike(f'%{search_term}%'))
     
     if min_events > 0:
         query = query.having(func.count(Event.id) >= min_events)
     
     organizers = query.order_by(Organizer.name.asc()).all()
+    if ranked_ids is not None:
+        # Best match first
+        positions = {organizer_id: i for i, organizer_id in enumerate(ranked_ids)}
+        organizers.sort(key=lambda row: positions[row[0].id])
     
     result = []
     for organizer, event_count in organizers:
@@ -317,123 +318,241 @@ def search_organizers():
 #ticket-purchase
 from uuid import uuid4
 
+def price_order(quantities):
+    """Return (event_id, total, {ticket_type_id: (name, price)}) for {ticket_type_id: qty}
+    using one ticket type query."""
+    total = 0
+    event_id = None
+    priced = {}
+
+    ticket_types = load_ticket_types(quantities)
+    for ticket_type_id, qty in quantities.items():
+        ticket_type = ticket_types.get(ticket_type_id)
+        if not ticket_type:
+            raise InsufficientInventory(ticket_type_id)
+
+        if event_id and ticket_type.event_id != event_id:
+            raise InventoryError('Cannot purchase tickets for multiple events in one order.')
+        event_id = ticket_type.event_id
+
+        total += ticket_type.price * qty
+        priced[ticket_type_id] = (ticket_type.name, ticket_type.price)
+    return event_id, total, priced
+
 @app.route('/checkout', methods=['POST'])
 def checkout():
     data = request.json
     user_id = data.get('user_id')
     quantities = data.get('quantities')  # {ticket_type_id: quantity}
-    attendee_name = data.get('attendee_name')
+    hold_token = data.get('hold_token')  # from POST /holds, replaces quantities
+    attendees = data.get('attendees')  # [{name, email, ticket_type_id?}], one per ticket
+    attendee_name = data.get('attendee_name')  # the buyer, and any ticket without an attendee
     attendee_email = data.get('attendee_email')
     billing_address = data.get('billing_address')
     payment_method = data.get('payment_method')
 
-    if not user_id or not quantities:
+    try:
+        attendees = normalize_attendees(attendees)
+    except AttendeeError as e:
+        return jsonify({'error': str(e)}), 400
+    if not quantities and not hold_token:
+        # Every attendee named a ticket type: that's the order
+        quantities = quantities_from_attendees(attendees)
+
+    if not user_id or not (quantities or hold_token):
         return jsonify({'error': 'Missing user or quantities'}), 400
 
     user = User.query.get(user_id)
     if not user:
         return jsonify({'error': 'User not found'}), 404
 
-    total = 0
-    tickets_created = []
-    event_id = None
+    if not hold_token:
+        try:
+            quantities = normalize_quantities(quantities)
+        except InvalidQuantities as e:
+            return jsonify({'error': str(e)}), 400
+        if not quantities:
+            return jsonify({'error': 'Missing user or quantities'}), 400
+
+    def place_order():
+        if hold_token:
+            # Stock was already reserved when the hold was placed
+            _, order_quantities = convert_hold(hold_token, user_id)
+            event_id, total, ticket_types = price_order(order_quantities)
+            assignments = assign_attendees(order_quantities, attendees, attendee_name, attendee_email)
+        else:
+            order_quantities = quantities
+            event_id, total, ticket_types = price_order(order_quantities)
+            # Availability is enforced by the conditional UPDATE, not a prior read.
+            # It runs before any per-ticket work, so an oversized order is
+            # refused without building a row per requested ticket; attendee
+            # errors after it roll the reservation back.
+            reserve_inventory(order_quantities)
+            assignments = assign_attendees(order_quantities, attendees, attendee_name, attendee_email)
+
+        # Create order
+        transaction_ref = f"TXN-{uuid4().hex[:10].upper()}"
+        order = Order(
+            user_id=user_id,
+            customer_email=attendee_email or user.email,
+            event_id=event_id,
+            total_amount=total,
+            status='completed',
+            payment_method=payment_method,
+            payment_status='paid',
+            billing_address=billing_address,
+            transaction_reference=transaction_ref
+        )
+        db.session.add(order)
+        db.session.flush()  # To get order.id
+
+        # All tickets in one INSERT; the response is built from what we already have
+        tickets_created = issue_tickets(order.id, assignments, ticket_types)
+
+        # Keep the denormalized sales counters in the same transaction
+        record_sale(event_id, total, order_quantities)
+        result = {
+            'message': 'Checkout successful',
+            'order_id': order.id,
+            'total': total,
+            'transaction_reference': transaction_ref,
+            'tickets': tickets_created
+        }
+        db.session.commit()
+        return result
 
-    # Calculate total and confirm availability
-    for ticket_type_id, qty in quantities.items():
-        ticket_type = TicketType.query.get(ticket_type_id)
-        if not ticket_type or ticket_type.quantity_available < qty:
-            return jsonify({'error': f'Invalid or unavailable ticket type ID: {ticket_type_id}'}), 400
+    try:
+        result = retry_on_conflict(place_order)
+    except HoldUnavailable as e:
+        return jsonify({'error': str(e)}), 409
+    except (InventoryError, AttendeeError) as e:
+        return jsonify({'error': str(e)}), 400
 
-        if event_id and ticket_type.event_id != event_id:
-            return jsonify({'error': 'Cannot purchase tickets for multiple events in one order.'}), 400
-        event_id = ticket_type.event_id
+    wake_qr_worker()
 
-        total += ticket_type.price * qty
+    return jsonify(result)
 
-    # Create order
-    transaction_ref = f"TXN-{uuid4().hex[:10].upper()}"
-    order = Order(
-        user_id=user_id,
-        customer_email=attendee_email,
-        event_id=event_id,
-        total_amount=total,
-        status='completed',
-        payment_method=payment_method,
-        payment_status='paid',
-        billing_address=billing_address,
-        transaction_reference=transaction_ref
-    )
-    db.session.add(order)
-    db.session.flush()  # To get order.id
+#seat-holds
+@app.route('/holds', methods=['POST'])
+def place_hold():
+    data = request.json
+    user_id = data.get('user_id')
+    quantities = data.get('quantities')  # {ticket_type_id: quantity}
+    minutes = data.get('minutes')
 
-    # Create tickets
-    for ticket_type_id, qty in quantities.items():
-        ticket_type = TicketType.query.get(ticket_type_id)
-
-        for _ in range(qty):
-            ticket = Ticket(
-                ticket_type_id=ticket_type_id,
-                order_id=order.id,
-                attendee_name=attendee_name,
-                attendee_email=attendee_email,
-                unique_code=str(uuid4())
-            )
-            ticket.generate_qr_code()
-            db.session.add(ticket)
-            tickets_created.append(ticket)
-
-        ticket_type.quantity_available -= qty
+    if not user_id or not quantities:
+        return jsonify({'error': 'Missing user or quantities'}), 400
 
-    db.session.commit()
+    if minutes is not None:
+        try:
+            minutes = int(minutes)
+        except (TypeError, ValueError):
+            return jsonify({'error': 'minutes must be a whole number'}), 400
 
-    return jsonify({
-        'message': 'Checkout successful',
-        'order_id': order.id,
-        'total': total,
-        'transaction_reference': transaction_ref,
-        'tickets': [t.to_dict() for t in tickets_created]
-    })
+    if not User.query.get(user_id):
+        return jsonify({'error': 'User not found'}), 404
+
+    def reserve():
+        hold_quantities = normalize_quantities(quantities)
+        if not hold_quantities:
+            raise InventoryError('Missing user or quantities')
+        event_id, _, _ = price_order(hold_quantities)
+        hold = create_hold(user_id, event_id, hold_quantities, minutes=minutes)
+        db.session.commit()
+        return hold
+
+    try:
+        hold = retry_on_conflict(reserve)
+    except InventoryError as e:
+        return jsonify({'error': str(e)}), 400
+
+    return jsonify(hold.to_dict()), 201
+
+@app.route('/holds/<string:token>', methods=['GET'])
+@primary
+def get_hold(token):
+    hold = Hold.query.filter_by(token=token).first_or_404()
+    return jsonify(hold.to_dict()), 200
+
+@app.route('/holds/<string:token>', methods=['DELETE'])
+def cancel_hold(token):
+    data = request.get_json(silent=True)
+    user_id = request.args.get('user_id', type=int)
+    if user_id is None and isinstance(data, dict):
+        user_id = data.get('user_id')
+    if not user_id:
+        return jsonify({'error': 'Missing user'}), 400
+
+    def release():
+        release_hold(token, user_id)
+        db.session.commit()
+
+    try:
+        retry_on_conflict(release)
+    except HoldUnavailable as e:
+        return jsonify({'error': str(e)}), 409
+
+    return jsonify({'message': 'Hold released'}), 200
+
+# Poll a ticket's QR rendering status
+@app.route('/tickets/<string:unique_code>', methods=['GET'])
+@primary
+def get_ticket(unique_code):
+    ticket = Ticket.query.filter_by(unique_code=unique_code).first_or_404()
+    return jsonify(ticket.to_dict()), 200
+
+# Render a ticket's QR code on demand (png or svg)
+@app.route('/tickets/<string:unique_code>/qr', methods=['GET'])
+def get_ticket_qr(unique_code):
+    fmt = request.args.get('format', 'png', type=str).lower()
+    if fmt not in FORMATS:
+        return jsonify({'error': f'Unsupported format: {fmt}'}), 400
+
+    # Only real tickets get an image (or a 304), so the cache can't be filled with junk
+    if not db.session.query(Ticket.id).filter_by(unique_code=unique_code).first():
+        return jsonify({'error': 'Ticket not found'}), 404
+
+    etag, data = qr_cache.get_or_render(unique_code, fmt)
+    if etag in request.if_none_match:
+        response = make_response('', 304)
+    else:
+        response = make_response(data)
+        response.mimetype = FORMATS[fmt]
+
+    # The ETag hashes the image, which is a pure function of the code
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
 
 @app.route('/profile/tickets', methods=['GET'])
+@primary
 def get_user_tickets():
     try:
-        # Check Authorization header instead of cookies
-        auth_header = request.headers.get('Authorization')
-        if not auth_header or not auth_header.startswith('Bearer '):
-            return jsonify({'error': 'Not logged in'}), 401
-            
-        token = auth_header.split(' ')[1]
-        
+        # Only the user id is needed, so the signed claims are enough
         try:
-            token_data = jwt.decode(token, SECRET_KEY, algorithms=['HS256'])
-        except jwt.ExpiredSignatureError:
-            return jsonify({'error': 'Token expired'}), 401
-        except jwt.InvalidTokenError:
-            return jsonify({'error': 'Invalid token'}), 401
-            
+            token_data = authenticate()
+        except AuthError as e:
+            return jsonify({'error': e.message}), e.status
+
         user_id = token_data['id']
        
 
-        orders = Order.query.filter_by(user_id=user_id).order_by(Order.order_date.desc()).all()
-
-        result = []
-        for order in orders:
-            order_data = order.to_dict_full()
-            order_data['event'] = order.event.to_dict() if order.event else None
-            order_data['tickets'] = [ticket.to_dict() for ticket in order.tickets]
-            result.append(order_data)
+        orders = ORDER_WITH_TICKETS.apply(
+            Order.query.filter_by(user_id=user_id).order_by(Order.order_date.desc())
+        ).all()
 
-        return jsonify(result), 200
+        return jsonify(ORDER_WITH_TICKETS.dump_all(orders)), 200
 
     except BadSignature:
         return jsonify({'error': 'Invalid or expired session'}), 401
     except Exception as e:
-        print("Error fetching tickets:", e)
+        logger.exception("Error fetching tickets")
         return jsonify({'error': 'Internal server error'}), 500
 
 
 # Routes
 @app.route('/organizers/featured/summary')
+@response_cache.cached('catalog')
 def featured_organizers_summary():
     organizers = db.session.query(
         Organizer,
@@ -459,30 +578,29 @@ from functools import wraps
 @token_required
 def update_organizer_profile(user, token_data):
     try:
-        print(f"[DEBUG] PATCH /organizer/profile called by user {user.email} with role {user.role}")
         if user.role != 'organizer':
-            print("[DEBUG] Unauthorized access attempt")
+            logger.info("Organizer profile update refused for user %s with role %s", user.id, user.role)
             return jsonify({'error': 'Unauthorized'}), 403
 
         organizer = Organizer.query.filter_by(email=user.email).first()
         if not organizer:
-            print("[DEBUG] Organizer not found for email:", user.email)
+            logger.info("No organizer profile for user %s", user.id)
             return jsonify({'error': 'Organizer not found'}), 404
 
         payload = request.json
-        print(f"[DEBUG] Payload received for update: {payload}")
-
+        updated = []
         for field in ['name', 'email', 'phone', 'logo', 'website', 'description', 'speciality', 'contact_email']:
             if field in payload:
                 setattr(organizer, field, payload[field])
-                print(f"[DEBUG] Updated {field} to {payload[field]}")
+                updated.append(field)
 
         db.session.commit()
-        print("[DEBUG] Organizer profile updated successfully")
+        response_cache.invalidate('catalog')
+        logger.debug("Organizer %s updated fields %s", organizer.id, updated)
         return jsonify(organizer.to_dict()), 200
 
     except Exception as e:
-        print("Error updating organizer profile:", e)
+        logger.exception("Error updating organizer profile")
         return jsonify({'error': 'Server error'}), 500
 
 
@@ -490,72 +608,157 @@ def update_organizer_profile(user, token_data):
 @token_required
 def get_organizer_profile(user, token_data):
     try:
-        print(f"[DEBUG] GET /organizer/profile called by user {user.email} with role {user.role}")
         if user.role != 'organizer':
-            print("[DEBUG] Unauthorized access attempt")
+            logger.info("Organizer profile read refused for user %s with role %s", user.id, user.role)
             return jsonify({'error': 'Unauthorized'}), 403
 
         organizer = Organizer.query.filter_by(email=user.email).first()
         if not organizer:
-            print("[DEBUG] Organizer profile not found for email:", user.email)
+            logger.info("No organizer profile for user %s", user.id)
             return jsonify({'error': 'Organizer profile not found'}), 404
 
-        profile = organizer.to_dict()
-        print(f"[DEBUG] Returning organizer profile: {profile}")
-        return jsonify(profile), 200
+        return jsonify(organizer.to_dict()), 200
 
     except Exception as e:
-        print("Error getting organizer profile:", e)
+        logger.exception("Error getting organizer profile")
         return jsonify({'error': 'Server error'}), 500
 
 @app.route('/events/counts')
+@response_cache.cached('catalog')
 def event_counts_by_category():
-    counts = db.session.query(
-        Event.category,
-        func.count(Event.id)
-    ).filter(Event.is_active == True).group_by(Event.category).all()
-    
-    result = [{'name': cat, 'count': cnt} for cat, cnt in counts if cat is not None]
+    # Active events per category, from the maintained facet counts
+    result = [{'name': cat, 'count': cnt} for cat, cnt in category_counts('active_count') if cat is not None]
     return jsonify(result)
 
 @app.route('/event-categories')
+@response_cache.cached('catalog')
 def event_categories():
-    cats = db.session.query(Event.category, func.count(Event.id)) \
-                   .group_by(Event.category).all()
+    cats = category_counts('events_count')
     return jsonify([{'name': c[0], 'count': c[1]} for c in cats])
 #events
+EVENTS_PAGE_SIZE = 20
+EVENTS_MAX_PAGE_SIZE = 100
+
+def encode_cursor(*parts):
+    raw = '|'.join(str(part) for part in parts).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor):
+    """Return the cursor's parts; raises ValueError if it is malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode('utf-8')
+    except (binascii.Error, UnicodeDecodeError) as e:
+        raise ValueError(str(e))
+    return raw.split('|')
+
+def decode_event_cursor(cursor):
+    """Keyset cursor -> (start_datetime, id)."""
+    start, event_id = decode_cursor(cursor)
+    return datetime.fromisoformat(start), int(event_id)
+
+def decode_search_cursor(cursor):
+    """Search cursor -> (rank, id)."""
+    kind, rank, event_id = decode_cursor(cursor)
+    if kind != 'rank':
+        raise ValueError('Not a search cursor')
+    return float(rank), int(event_id)
+
 @app.route('/events')
 def get_events():
     search = request.args.get('search', '', type=str).lower()
     category = request.args.get('category', '', type=str).lower()
+    city = request.args.get('city', '', type=str)
+    date_from = request.args.get('from', '', type=str)
+    date_to = request.args.get('to', '', type=str)
+    cursor = request.args.get('cursor', '', type=str)
+    limit = request.args.get('limit', EVENTS_PAGE_SIZE, type=int)
+    limit = max(1, min(limit, EVENTS_MAX_PAGE_SIZE))
 
-    # Start with active AND approved events
-    query = Event.query.filter_by(is_active=True, status='approved')
+    want_facets = request.args.get('facets') in ('1', 'true')
 
-    if search:
-        query = query.filter(Event.title.ilike(f'%{search}%'))
+    # Start with active AND approved events, venue joined in the same query
+    filters = [Event.is_active == True, Event.status == 'approved']
+
+    # Matches from the full-text index, joined below; None means no index, fall back to LIKE
+    matches = event_matches(search) if search else None
+    if matches is None and search:
+        filters.append(Event.title.ilike(f'%{search}%'))
+
+    if city:
+        filters.append(Venue.city == city)
+
+    try:
+        if date_from:
+            filters.append(Event.start_datetime >= datetime.fromisoformat(date_from))
+        if date_to:
+            filters.append(Event.start_datetime < datetime.fromisoformat(date_to))
+    except ValueError:
+        return jsonify({'error': 'Invalid cursor or date filter'}), 400
+
+    # Facets count every category matching the other filters, so the client
+    # can show what switching category would give
+    facets = None
+    if want_facets:
+        if len(filters) == 2 and matches is None:
+            facets = category_counts('listed_count')
+        else:
+            facet_query = db.session.query(Event.category, func.count(Event.id))\
+                .outerjoin(Venue, Venue.id == Event.venue_id)
+            if matches is not None:
+                facet_query = facet_query.join(matches, matches.c.event_id == Event.id)
+            facets = facet_query.filter(*filters).group_by(Event.category).order_by(Event.category).all()
+        facets = [{'name': cat, 'count': cnt} for cat, cnt in facets if cat is not None]
 
     if category:
-        query = query.filter(Event.category.ilike(f'%{category}%'))
+        filters.append(Event.category.ilike(f'%{category}%'))
+
+    query = db.session.query(
+        Event.id, Event.title, Event.image, Event.category, Event.start_datetime,
+        Venue.city, Venue.state, Venue.capacity
+    ).outerjoin(Venue, Venue.id == Event.venue_id).filter(*filters)
 
-    events = query.order_by(Event.start_datetime).all()
+    try:
+
+        if matches is not None:
+            # Relevance order, keyset-paginated on (rank, id) like the date order below
+            query = query.join(matches, matches.c.event_id == Event.id).add_columns(matches.c.rank)
+            if cursor:
+                query = query.filter(tuple_(matches.c.rank, Event.id) > decode_search_cursor(cursor))
+            rows = query.order_by(matches.c.rank, Event.id).limit(limit + 1).all()
+            next_cursor = None
+            if len(rows) > limit:
+                rows = rows[:limit]
+                next_cursor = encode_cursor('rank', repr(rows[-1].rank), rows[-1].id)
+        else:
+            if cursor:
+                # Keyset: resume strictly after the last row of the previous page
+                query = query.filter(tuple_(Event.start_datetime, Event.id) > decode_event_cursor(cursor))
+            rows = query.order_by(Event.start_datetime, Event.id).limit(limit + 1).all()
+            next_cursor = None
+            if len(rows) > limit:
+                rows = rows[:limit]
+                next_cursor = encode_cursor(rows[-1].start_datetime.isoformat(), rows[-1].id)
+    except ValueError:
+        return jsonify({'error': 'Invalid cursor or date filter'}), 400
 
     results = []
-    for e in events:
-        venue = Venue.query.get(e.venue_id)
+    for e in rows:
         results.append({
             'id': e.id,
             'title': e.title,
             'image': e.image,
             'date': e.start_datetime.strftime('%b %d, %Y'),
             'time': e.start_datetime.strftime('%I:%M %p'),
-            'location': f"{venue.city}, {venue.state}" if venue else "TBD",
+            'location': f"{e.city}, {e.state}" if e.city else "TBD",
             'category': e.category,
             'rating': 4.5,
-            'capacity': venue.capacity if venue else 0
+            'capacity': e.capacity or 0
         })
 
-    return jsonify(results)
+    response = {'events': results, 'next_cursor': next_cursor}
+    if want_facets:
+        response['facets'] = facets
+    return jsonify(response)
 
 @app.route('/events/<int:id>/details')
 def get_event_details(id):
@@ -578,26 +781,13 @@ def get_event_details(id):
     }
 
 @app.route('/featured-events')
+@response_cache.cached('catalog')
 def featured_events():
-    events = Event.query.filter_by(is_active=True, status='approved') \
-                      .order_by(Event.created_at.desc()).limit(8).all()
-    
-    out = []
-    for e in events:
-        venue = Venue.query.get(e.venue_id)
-        out.append({
-            'id': e.id,
-            'title': e.title,
-            'image': e.image,
-            'category': e.category,
-            'date': e.start_datetime.strftime('%b %d, %Y'),
-            'time': e.start_datetime.strftime('%I:%M %p'),
-            'location': f"{venue.city}, {venue.state}" if venue else "",
-            'rating': 4.5,
-            'attendees': 1500
-        })
-    
-    return jsonify(out)
+    events = EVENT_SUMMARY.apply(
+        Event.query.filter_by(is_active=True, status='approved').order_by(Event.created_at.desc()).limit(8)
+    ).all()
+
+    return jsonify(EVENT_SUMMARY.dump_all(events))
 
 
 @app.route('/organizers/featured/summary')
@@ -660,12 +850,11 @@ def create_event(organiser_id):
             event.sponsors.extend(sponsors)
 
         db.session.commit()
-        return jsonify(event.to_dict()), 201
-        db.session.commit()
+        response_cache.invalidate('catalog')
         return jsonify(event.to_dict()), 201
     except Exception as e:
         db.session.rollback()
-        print("Error creating event:", e)
+        logger.exception("Error creating event")
         return jsonify({'error': 'Event creation failed'}), 500
 
 
@@ -687,22 +876,23 @@ def update_event(event_id):
         event.sponsors = sponsors  # replaces the old list
 
     db.session.commit()
+    response_cache.invalidate('catalog')
     return jsonify(event.to_dict()), 200
 
 #event stats
 @app.route('/events/<int:event_id>/stats')
 def get_event_stats(event_id):
-    event = Event.query.get_or_404(event_id)
+    if not db.session.query(Event.id).filter_by(id=event_id).first():
+        abort(404)
 
-    # Total revenue
-    total_revenue = sum(order.total_amount for order in event.orders if order.status == 'completed')
+    # Total revenue, from the maintained counters
+    total_revenue, _ = get_event_sales(event_id)
 
     # Tickets sold by type
     ticket_counts = (
-        db.session.query(Ticket.ticket_type_id, TicketType.name, db.func.count(Ticket.id))
-        .join(TicketType)
-        .filter(TicketType.event_id == event_id)
-        .group_by(Ticket.ticket_type_id, TicketType.name)
+        db.session.query(TicketTypeSales.ticket_type_id, TicketType.name, TicketTypeSales.sold)
+        .join(TicketType, TicketType.id == TicketTypeSales.ticket_type_id)
+        .filter(TicketTypeSales.event_id == event_id, TicketTypeSales.sold > 0)
         .all()
     )
 
@@ -720,15 +910,76 @@ def get_event_stats(event_id):
 def delete_event(event_id):
     event = Event.query.get_or_404(event_id)
 
-    # Manually delete associated ticket types first
+    # Manually delete sales counters, holds and associated ticket types first
+    delete_event_sales(event_id)
+    delete_event_holds(event_id)
     for ticket in event.ticket_types:
         db.session.delete(ticket)
 
     db.session.delete(event)
     db.session.commit()
+    response_cache.invalidate('catalog')
+    code_index.discard(event_id)
 
     return jsonify({'message': 'Event and tickets deleted'}), 200
 
+def event_organizer_error(user, event_id):
+    """None if the user organizes the event, else the error response for gate routes."""
+    organizer_email = db.session.query(Organizer.email)\
+        .join(Event, Event.organizer_id == Organizer.id).filter(Event.id == event_id).scalar()
+    if organizer_email is None:
+        abort(404)
+    if user.role != 'organizer' or organizer_email != user.email:
+        logger.info("Gate access refused for user %s on event %s", user.id, event_id)
+        return jsonify({'error': 'Unauthorized'}), 403
+    return None
+
+# Gate check-in: redeem a batch of scanned ticket codes
+@app.route('/events/<int:event_id>/checkin', methods=['POST'])
+@token_required
+def event_checkin(user, token_data, event_id):
+    error = event_organizer_error(user, event_id)
+    if error:
+        return error
+
+    try:
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            raise CheckinError('Expected a JSON object with codes')
+        codes = normalize_codes(data.get('codes'))
+    except CheckinError as e:
+        return jsonify({'error': str(e)}), 400
+
+    results = retry_on_conflict(lambda: check_in(event_id, codes))
+    admitted = sum(1 for result in results if result['status'] == 'admitted')
+    return jsonify({
+        'event_id': event_id,
+        'admitted': admitted,
+        'rejected': len(results) - admitted,
+        'results': results
+    }), 200
+
+# Offline scanner manifest: sorted hashes of the event's valid ticket codes
+@app.route('/events/<int:event_id>/manifest', methods=['GET'])
+@token_required
+def event_manifest(user, token_data, event_id):
+    error = event_organizer_error(user, event_id)
+    if error:
+        return error
+
+    since = request.args.get('since')  # a previous manifest's version
+    if since is not None:
+        try:
+            since = parse_version(since)
+        except ValueError:
+            return jsonify({'error': 'since must be a manifest version'}), 400
+
+    manifest = build_manifest(event_id, since)
+    response = Response(manifest_chunks(manifest), mimetype='application/octet-stream')
+    response.headers['X-Manifest-Version'] = str(manifest.version)
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
 @app.route('/events/<int:event_id>', methods=['GET'])
 def get_event_by_id(event_id):
     event = Event.query.get_or_404(event_id)
@@ -764,14 +1015,9 @@ def get_event_by_id(event_id):
 # Enhanced event route to include venue details
 @app.route('/organiser/<int:organiser_id>/events', methods=['GET'])
 def get_organiser_events(organiser_id):
-    events = Event.query.filter_by(organizer_id=organiser_id).order_by(Event.start_datetime.asc()).all()
     events_data = []
 
-    for event in events:
-        orders = Order.query.filter_by(event_id=event.id, status='completed').all()
-        total_attendees = sum(len(order.tickets) for order in orders)
-        total_revenue = sum(order.total_amount for order in orders)
-
+    for event, venue, total_attendees, total_revenue in organizer_event_sales(organiser_id):
         event_data = {
             'id': event.id,
             'title': event.title,
@@ -785,7 +1031,6 @@ def get_organiser_events(organiser_id):
         }
 
         if event.venue_id:
-            venue = Venue.query.get(event.venue_id)
             event_data['venue'] = venue.to_dict() if venue else None
 
         events_data.append(event_data)
@@ -824,12 +1069,14 @@ def update_sponsor(id):
         if field in data:
             setattr(sponsor, field, data[field])
     db.session.commit()
+    response_cache.invalidate('catalog')
     return jsonify(sponsor.to_dict()), 200
 @app.route('/sponsors/<int:id>', methods=['DELETE'])
 def delete_sponsor(id):
     sponsor = Sponsor.query.get_or_404(id)
     db.session.delete(sponsor)
     db.session.commit()
+    response_cache.invalidate('catalog')
     return jsonify({'message': 'Deleted'}), 204
 #organiser-venue-routes
 
@@ -866,6 +1113,7 @@ def update_venue(id):
         if field in data:
             setattr(venue, field, data[field])
     db.session.commit()
+    response_cache.invalidate('catalog')
     return jsonify(venue.to_dict()), 200
 
 @app.route('/venues/<int:id>', methods=['DELETE'])
@@ -873,6 +1121,7 @@ def delete_venue(id):
     venue = Venue.query.get_or_404(id)
     db.session.delete(venue)
     db.session.commit()
+    response_cache.invalidate('catalog')
     return jsonify({'message': 'Deleted'}), 204
 @app.route('/')
 def home():
@@ -895,12 +1144,11 @@ def get_ticket_types_for_organiser(organiser_id):
         db.session.query(
             TicketType,
             Event.title.label('event_title'),
-            func.count(Ticket.id).label('sold')
+            func.coalesce(TicketTypeSales.sold, 0).label('sold')
         )
         .join(Event, TicketType.event_id == Event.id)
-        .outerjoin(Ticket, Ticket.ticket_type_id == TicketType.id)
+        .outerjoin(TicketTypeSales, TicketTypeSales.ticket_type_id == TicketType.id)
         .filter(Event.organizer_id == organiser_id)
-        .group_by(TicketType.id, Event.title)
         .all()
     )
 
@@ -948,10 +1196,11 @@ def create_ticket_type():
         )
         db.session.add(tt)
         db.session.commit()
+        response_cache.invalidate('catalog')
         return jsonify(tt.to_dict()), 201
     except Exception as e:
         db.session.rollback()
-        print(f"Error creating ticket type: {e}\nData received: {data}")
+        logger.warning("Error creating ticket type for event %s: %s", data.get('event_id'), e)
         return jsonify({'error': str(e)}), 400
 
 # Edit ticket type
@@ -964,22 +1213,33 @@ def update_ticket_type(id):
             val = datetime.fromisoformat(data[key]) if 'start' in key or 'end' in key else data[key]
             setattr(tt, key, val)
     db.session.commit()
+    response_cache.invalidate('catalog')
     return jsonify(tt.to_dict()), 200
 
 # Delete ticket type
 @app.route('/ticket-types/<int:id>', methods=['DELETE'])
 def delete_ticket_type(id):
     tt = TicketType.query.get_or_404(id)
+    delete_ticket_type_sales(id)
     db.session.delete(tt)
     db.session.commit()
+    response_cache.invalidate('catalog')
     return jsonify({'message':'Deleted'}), 204
 
 #UserLogins/AUTH-ROUTES
+@app.errorhandler(HashingBusy)
+def hashing_busy(e):
+    response = jsonify({'error': str(e)})
+    response.status_code = 429
+    response.headers['Retry-After'] = '1'
+    return response
+
 def generate_token(user, extra_data=None):
     payload = {
         'id': user.id,
         'email': user.email,
         'role': user.role,
+        'ver': user.token_version or 0,
         'exp': datetime.utcnow() + timedelta(hours=1)
     }
     if extra_data:
@@ -991,7 +1251,6 @@ def generate_token(user, extra_data=None):
 # auth.py (backend)
 
 from flask import make_response, jsonify
-from werkzeug.security import generate_password_hash
 from datetime import datetime
 
 @app.route('/auth/register', methods=['POST'])
@@ -1008,7 +1267,7 @@ def register():
         user = User(
             username=data['username'],
             email=data['email'],
-            password_hash=generate_password_hash(data['password']),
+            password_hash=hasher.hash(data['password']),
             role='user',
             created_at=datetime.utcnow()
         )
@@ -1027,15 +1286,17 @@ def register():
             }
         }), 200
 
+    except HashingBusy:
+        raise
     except Exception as e:
         db.session.rollback()
-        print(f"Registration error: {e}")
+        logger.exception("Registration error")
         return jsonify({'error': 'Registration failed'}), 500
 
         
     except Exception as e:
         db.session.rollback()
-        print(f"Registration error: {e}")
+        logger.exception("Registration error")
         return jsonify({'error': 'Registration failed'}), 500
 @app.route('/auth/login', methods=['POST'])
 def login():
@@ -1043,26 +1304,21 @@ def login():
         data = request.json
         user = User.query.filter_by(email=data['email']).first()
 
-        if not user or not check_password_hash(user.password_hash, data['password']):
+        if not user or not hasher.verify_and_update(user, data['password']):
             return jsonify({'error': 'Invalid credentials'}), 401
+        if db.session.dirty:
+            db.session.commit()  # the hash was upgraded
 
         token = generate_token(user)
         return jsonify({'message': 'Logged in', 'token': token}), 200
 
+    except HashingBusy:
+        raise
     except Exception as e:
-        print(f"Login error: {e}")
+        logger.exception("Login error")
         return jsonify({'error': 'Login failed'}), 500
 from functools import wraps
 
-def decode_token(token):
-    try:
-        data = jwt.decode(token, SECRET_KEY, algorithms=['HS256'])
-        return data
-    except jwt.ExpiredSignatureError:
-        return None
-    except jwt.InvalidTokenError:
-        return None
-
 # def manager_token_required(f):
 #     @wraps(f)
 #     def decorated(*args, **kwargs):
@@ -1116,7 +1372,7 @@ def forgot_password():
                       body=f"Hello,\n\nClick the link below to reset your password:\n{reset_link}\n\nIf you didn't request this, please ignore this email.")
         email.send(msg)
     except Exception as e:
-        print(f"Error sending email: {e}")
+        logger.exception("Error sending password reset email")
         return jsonify({'error': 'Failed to send reset email'}), 500
 
     return jsonify({'message': 'If an account exists with this email, a reset link has been sent'}), 200
@@ -1130,12 +1386,13 @@ def reset_password(token):
         return jsonify({'error':'Invalid/expired'}), 400
     user = User.query.get(uid)
     data = request.json
-    user.password_hash = generate_password_hash(data['password'])
+    user.password_hash = hasher.hash(data['password'])
     db.session.commit()
     resp = make_response(jsonify({'message':'Password set'}))
     set_user_cookie(resp, user)
     return resp
 @app.route('/auth/session', methods=['GET'])
+@primary
 @token_required
 def get_session(user, token_data):
     return jsonify({
@@ -1152,6 +1409,7 @@ def get_session(user, token_data):
 @token_required
 def switch_to_organizer(user, token_data):
     try:
+        user = db.session.get(User, user.id)
         existing_organizer = Organizer.query.filter_by(email=user.email).first()
         if existing_organizer:
             return jsonify({'error': 'Already an organizer'}), 400
@@ -1165,7 +1423,10 @@ def switch_to_organizer(user, token_data):
         db.session.add(organizer)
 
         user.role = 'organizer'
+        # Tokens carrying the old role must stop working
+        revoke_tokens(user)
         db.session.commit()
+        response_cache.invalidate('catalog')
 
         new_token = generate_token(user, extra_data={'organizer_id': organizer.id})
 
@@ -1177,7 +1438,7 @@ def switch_to_organizer(user, token_data):
 
     except Exception as e:
         db.session.rollback()
-        print(f"Switch error: {e}")
+        logger.exception("Switch to organizer failed")
         return jsonify({'error': 'Failed to switch to organizer'}), 500
 
 # @app.route('/auth/logout', methods=['POST'])
@@ -1196,14 +1457,12 @@ def generate_manager_token(manager):
         'role': 'manager',
         'exp': datetime.utcnow() + timedelta(hours=TOKEN_EXPIRY_HOURS)
     }
-    print("JWT Payload:", payload)
     token = jwt.encode(payload, SECRET_KEY, algorithm='HS256')
 
     # If using PyJWT >= 2.0, this returns a str; else decode it
     if isinstance(token, bytes):
         token = token.decode('utf-8')
 
-    print("Encoded JWT:", token)
     return token
 
 
@@ -1243,41 +1502,25 @@ def generate_manager_token(manager):
 
 #     return decorated
 
-def decode_token(token):
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=['HS256'])
-        return payload  # You can check role here if needed
-    except jwt.ExpiredSignatureError:
-        return {'error': 'Token expired'}
-    except jwt.InvalidTokenError:
-        return {'error': 'Invalid token'}
-
-
 @app.route('/management/login', methods=['POST'])
 def login_management():
     data = request.get_json()
     email = data.get('email')
     password = data.get('password')
 
-    print("Login attempt")
-    print(f"Email received: {email}")
-    print(f"Password received: {password}")
-
     manager = Management.query.filter_by(email=email).first()
     if not manager:
-        print("Manager not found in database")
+        logger.info("Management login failed: unknown account")
         return jsonify({'error': 'Invalid credentials'}), 401
 
-    print(f"Manager found: {manager.email} (ID: {manager.id})")
-    print("Checking password...")
-
-    if not check_password_hash(manager.password_hash, password):
-        print("Password hash mismatch")
+    if not hasher.verify_and_update(manager, password):
+        logger.info("Management login failed for manager %s", manager.id)
         return jsonify({'error': 'Invalid credentials'}), 401
+    if db.session.dirty:
+        db.session.commit()  # the hash was upgraded
 
-    print("Password match successful. Generating token...")
     token = generate_manager_token(manager)
-    print(f"Generated Token: {token}")
+    logger.info("Manager %s logged in", manager.id)
 
     return jsonify({
         'token': token,
@@ -1291,35 +1534,34 @@ def register_management():
     name = data.get('username')
     password = data.get('password')
 
-    print(f"[REGISTER] Attempt from: {email}, Username: {name}")
-
     if not email or not password or not name:
-        print("[REGISTER] Missing required fields")
         return jsonify({'error': 'Missing required fields'}), 400
 
     if Management.query.filter_by(email=email).first():
-        print("[REGISTER] Email already exists:", email)
         return jsonify({'error': 'Email already exists'}), 400
 
     try:
-        hashed_password = generate_password_hash(password)
+        hashed_password = hasher.hash(password)
         new_manager = Management(email=email, name=name, password_hash=hashed_password)
         db.session.add(new_manager)
         db.session.commit()
 
         token = generate_manager_token(new_manager)
-        print(f"[REGISTER] Success for {email} (ID: {new_manager.id})")
+        logger.info("Manager %s registered", new_manager.id)
 
         return jsonify({
             'token': token,
             'manager': new_manager.to_dict()
         }), 201
 
+    except HashingBusy:
+        raise
     except Exception as e:
-        print("[REGISTER] Exception occurred:", str(e))
+        logger.exception("Manager registration failed")
         return jsonify({'error': 'Registration failed'}), 500
 
 @app.route('/management/session', methods=['GET'])
+@primary
 @manager_token_required
 def management_session(current_manager):
     return jsonify(current_manager.to_dict()), 200
@@ -1329,19 +1571,6 @@ def management_session(current_manager):
 def management_logout():
     session.pop('management_id', None)
     return '', 204
-def get_manager_id_from_token():
-    auth_header = request.headers.get('Authorization')
-    if not auth_header or not auth_header.startswith('Bearer '):
-        return None
-    token = auth_header.split(' ')[1]
-    try:
-        decoded = jwt.decode(token, SECRET_KEY, algorithms=['HS256'])
-        return decoded.get('id')
-    except jwt.ExpiredSignatureError:
-        return None
-    except jwt.InvalidTokenError:
-        return None
-
 @app.route('/management/dashboard/stats')
 def dashboard_stats():
     # Verify management session
@@ -1352,9 +1581,8 @@ def dashboard_stats():
     # Get counts for dashboard
     total_organizers = Organizer.query.count()
     active_events = Event.query.filter_by(status='approved').count()
-    print(f"Active events: {active_events}")  # Add this line to print active_events)
     pending_events = Event.query.filter_by(status='pending').count()
-    print(f"Pending events: {pending_events}")
+    logger.debug("Dashboard stats: %s active, %s pending events", active_events, pending_events)
     return jsonify({
         'total_organizers': total_organizers,
         'active_events': active_events,
@@ -1369,19 +1597,9 @@ def pending_events():
         return jsonify({'error': 'Not logged in'}), 401
 
     # Get pending events with organizer and venue info
-    pending_events = Event.query.filter_by(status='pending').options(
-        db.joinedload(Event.organizer),
-        db.joinedload(Event.venue)
-    ).all()
+    pending_events = EVENT_ADMIN.apply(Event.query.filter_by(status='pending')).all()
 
-    events_data = []
-    for event in pending_events:
-        event_data = event.to_dict()
-        event_data['organizer_name'] = event.organizer.name if event.organizer else None
-        event_data['venue_name'] = event.venue.name if event.venue else None
-        events_data.append(event_data)
-
-    return jsonify(events_data)
+    return jsonify(EVENT_ADMIN.dump_all(pending_events))
 
 @app.route('/management/events/<int:event_id>/approve', methods=['POST'])
 def approve_event(event_id):
@@ -1397,6 +1615,7 @@ def approve_event(event_id):
     event.status = 'approved'
     event.is_active = True
     db.session.commit()
+    response_cache.invalidate('catalog')
 
     return jsonify({'message': 'Event approved successfully'})
 
@@ -1414,6 +1633,7 @@ def reject_event(event_id):
     event.status = 'rejected'
     event.is_active = False
     db.session.commit()
+    response_cache.invalidate('catalog')
 
     return jsonify({'message': 'Event rejected successfully'})
 @app.route('/management/venues/pending')
@@ -1447,20 +1667,9 @@ def all_events():
     if not manager_id:
         return jsonify({'error': 'Not logged in'}), 401
 
-    events = Event.query.options(
-        db.joinedload(Event.organizer),
-        db.joinedload(Event.venue)
-    ).all()
+    events = EVENT_ADMIN.apply(Event.query).all()
 
-    events_data = []
-    for event in events:
-        event_data = event.to_dict()
-        event_data['organizer_name'] = event.organizer.name if event.organizer else None
-        event_data['venue_name'] = event.venue.name if event.venue else None
-        event_data['status'] = event.status
-        events_data.append(event_data)
-
-    return jsonify(events_data)
+    return jsonify(EVENT_ADMIN.dump_all(events))
 
 # Get single event details
 @app.route('/management/events/<int:event_id>')
@@ -1469,26 +1678,12 @@ def get_event_details_for_management(event_id):
     if not manager_id:
         return jsonify({'error': 'Not logged in'}), 401
 
-    event = Event.query.options(
-        db.joinedload(Event.organizer),
-        db.joinedload(Event.venue),
-        db.joinedload(Event.ticket_types),
-        db.joinedload(Event.sponsors)
-    ).get(event_id)
+    event = EVENT_DETAIL.apply(Event.query.filter_by(id=event_id)).first()
 
     if not event:
         return jsonify({'error': 'Event not found'}), 404
 
-    event_data = {
-        **event.to_dict(),
-        'organizer': event.organizer.to_dict() if event.organizer else None,
-        'venue': event.venue.to_dict() if event.venue else None,
-        'ticket_types': [tt.to_dict() for tt in event.ticket_types],
-        'sponsors': [s.to_dict() for s in event.sponsors],
-        'status': event.status
-    }
-
-    return jsonify(event_data)
+    return jsonify(EVENT_DETAIL.dump(event))
 
 # Contact organizer endpoint
 @app.route('/management/organizers/<int:organizer_id>')
@@ -1510,16 +1705,16 @@ def get_organizer_details(organizer_id):
     return jsonify(organizer_data)
 @app.route('/events/<int:event_id>/tickets-summary')
 def tickets_summary(event_id):
-    event = Event.query.get_or_404(event_id)
+    # Ticket types with their sold counters (completed orders only) in one query
+    rows = db.session.query(TicketType, func.coalesce(TicketTypeSales.sold, 0))\
+        .outerjoin(TicketTypeSales, TicketTypeSales.ticket_type_id == TicketType.id)\
+        .filter(TicketType.event_id == event_id)\
+        .order_by(TicketType.id).all()
+    if not rows and not db.session.query(Event.id).filter_by(id=event_id).first():
+        abort(404)
 
     summary = []
-    for ticket_type in event.ticket_types:
-        # Count tickets that are part of completed orders (not pending or cancelled)
-        sold_count = db.session.query(Ticket).join(Order).filter(
-            Ticket.ticket_type_id == ticket_type.id,
-            Order.status == 'completed'  # Only count tickets from completed orders
-        ).count()
-        
+    for ticket_type, sold_count in rows:
         total_quantity = ticket_type.quantity_available
         remaining = max(0, total_quantity - sold_count)  # Ensure remaining isn't negative
 
@@ -1537,7 +1732,6 @@ def get_organizers_for_management():
     organizers = Organizer.query.all()
     organizers_data = []
     for org in organizers:
-        print(f"Organizer: {org}")
         org_data = {
             'id': org.id,
             'name': org.name,
@@ -1553,7 +1747,6 @@ def get_organizers_for_management():
             'eventsCount': len(org.events)
         }
         organizers_data.append(org_data)
-        print (f"Organizer data: {org_data}")
     return jsonify(organizers_data), 200
 
 @app.route('/management/organizers/<int:organizer_id>', methods=['GET'])
@@ -1651,6 +1844,7 @@ def approve_venue(venue_id):
 
     venue.status = 'approved'
     db.session.commit()
+    response_cache.invalidate('catalog')
     return jsonify({
         'message': 'Venue approved successfully',
         'venue': {
@@ -1672,6 +1866,7 @@ def reject_venue(venue_id):
 
     venue.status = 'rejected'
     db.session.commit()
+    response_cache.invalidate('catalog')
     return jsonify({
         'message': 'Venue rejected successfully',
         'venue': {
@@ -1724,93 +1919,93 @@ def get_venue_details(venue_id):
     }
     return jsonify(venue_data), 200
 @app.route('/backup-data', methods=['GET'])
-def backup_data():
-    data = {
-        "organizers": [o.to_dict() for o in Organizer.query.all()],
-        "sponsors": [s.to_dict() for s in Sponsor.query.all()],
-        "venues": [v.to_dict() for v in Venue.query.all()],
-        "events": [e.to_dict() for e in Event.query.all()],
-        "ticket_types": [t.to_dict() for t in TicketType.query.all()],
-        "users": [u.to_dict() for u in User.query.all()],
-        "orders": [o.to_dict() for o in Order.query.all()],
-        "discounts": [d.to_dict() for d in Discount.query.all()],
-        "tickets": [t.to_dict() for t in Ticket.query.all()],
-        "refund_requests": [r.to_dict() for r in RefundRequest.query.all()],
-        "management": [m.to_dict() for m in Management.query.all()],
-    }
-    return jsonify(data), 200
+@manager_token_required
+def backup_data(current_manager):
+    # Streams NDJSON straight from the tables. Resume a cut-off download
+    # with ?table=<name>&offset=<rows already received for that table>
+    try:
+        tables, offset = resolve_checkpoint(request.args.get('table'), request.args.get('offset', 0, type=int))
+    except BackupError as e:
+        return jsonify({'error': str(e)}), 400
+
+    lines = stream_backup(read_engine(db), tables, offset)
+    filename = f"backup-{datetime.utcnow():%Y%m%d%H%M%S}.ndjson"
+    if request.args.get('gzip') in ('1', 'true'):
+        response = Response(gzip_stream(lines), mimetype='application/gzip')
+        filename += '.gz'
+    else:
+        response = Response(chunked(lines), mimetype='application/x-ndjson')
+    response.headers['Content-Disposition'] = f'attachment; filename={filename}'
+    return response
 @app.route('/restore-data', methods=['POST'])
-def restore_data():
-    payload = request.get_json()
-
-    # 1. Organizers
-    for item in payload.get("organizers", []):
-        if not Organizer.query.get(item['id']):
-            db.session.add(Organizer(**item))
-
-    # 2. Sponsors
-    for item in payload.get("sponsors", []):
-        if not Sponsor.query.get(item['id']):
-            db.session.add(Sponsor(**item))
-
-    # 3. Venues
-    for item in payload.get("venues", []):
-        if not Venue.query.get(item['id']):
-            db.session.add(Venue(**item))
-
-    # 4. Events
-    for item in payload.get("events", []):
-        if not Event.query.get(item['id']):
-            sponsors_data = item.pop('sponsors', [])
-            ticket_types_data = item.pop('ticket_types', [])
-            event = Event(**item)
-            db.session.add(event)
-            db.session.flush()  # get event.id
-
-            # Restore sponsors relationship
-            for sponsor in sponsors_data:
-                s_obj = Sponsor.query.get(sponsor['id'])
-                if s_obj:
-                    event.sponsors.append(s_obj)
-
-            # Restore ticket types
-            for tt in ticket_types_data:
-                if not TicketType.query.get(tt['id']):
-                    db.session.add(TicketType(**tt))
-
-    # 5. Users
-    for item in payload.get("users", []):
-        if not User.query.get(item['id']):
-            db.session.add(User(**item))
-
-    # 6. Orders
-    for item in payload.get("orders", []):
-        if not Order.query.get(item['id']):
-            db.session.add(Order(**item))
-
-    # 7. Discounts
-    for item in payload.get("discounts", []):
-        if not Discount.query.get(item['id']):
-            db.session.add(Discount(**item))
-
-    # 8. Tickets
-    for item in payload.get("tickets", []):
-        if not Ticket.query.get(item['id']):
-            db.session.add(Ticket(**item))
-
-    # 9. Refund Requests
-    for item in payload.get("refund_requests", []):
-        if not RefundRequest.query.get(item['id']):
-            db.session.add(RefundRequest(**item))
-
-    # 10. Management accounts
-    for item in payload.get("management", []):
-        if not Management.query.get(item['id']):
-            db.session.add(Management(**item))
+@manager_token_required
+def restore_data(current_manager):
+    # NDJSON from /backup-data (optionally gzipped) is read as it arrives;
+    # the old single JSON document is still accepted
+    if request.is_json:
+        records = legacy_records(request.get_json())
+    else:
+        # werkzeug's request stream reads lines a byte at a time; buffer it
+        stream = io.BufferedReader(request.stream, 64 * 1024)
+        if request.headers.get('Content-Encoding') == 'gzip' or request.args.get('gzip') in ('1', 'true'):
+            stream = gzip.GzipFile(fileobj=stream)
+        records = ndjson_records(stream)
 
-    db.session.commit()
-    return jsonify({"status": "success"}), 200
+    try:
+        tables = restore_records(records, batch_size=request.args.get('batch_size', type=int))
+    except BackupError as e:
+        return jsonify({'error': str(e)}), 400
+    except (OSError, EOFError, zlib.error):
+        return jsonify({'error': 'Invalid gzip data'}), 400
+
+    # Derived data isn't in the backup and the bulk insert bypassed the ORM hooks
+    rebuild_sales_counters()
+    rebuild_category_facets()
+    rebuild_search_index()
+    if any(tables.get(name, {}).get('inserted') for name in ('ticket_types', 'orders', 'tickets')):
+        # Restored tickets keep their old created_at, so no delta would carry them
+        with db.engine.begin() as connection:
+            reset_manifests(connection)
+    response_cache.invalidate('catalog')
+    return jsonify({"status": "success", "tables": tables}), 200
+
+@app.route('/metrics')
+def metrics():
+    if not app.config['METRICS_ENABLED']:
+        abort(404)
+    # Counts are per worker process; scrape each worker or aggregate upstream
+    auth_counts = {k: v for k, v in auth_stats.items() if k != 'decode_seconds'}
+    body = metrics_registry.render() + render_counter(
+        'auth_events_total', 'Token decode outcomes and principal cache results', auth_counts, 'outcome'
+    ) + render_counter(
+        'db_read_routes_total', 'Read-only requests by database route', replica_stats, 'route'
+    ) + render_counter(
+        'checkin_scans_total', 'Scanned codes by check-in outcome and index lookup', checkin_stats, 'outcome'
+    )
+    return Response(body, mimetype='text/plain; version=0.0.4')
+
+@app.cli.command('run-jobs')
+def run_jobs_command():
+    """Run the background jobs (QR rendering, hold sweeps, ...) until interrupted.
+
+    Start exactly one of these per deployment, next to the web workers.
+    """
+    if not start_scheduler(app):
+        click.echo("SCHEDULER_ENABLED is off; no jobs to run")
+        return
+    click.echo(f"Running jobs: {', '.join(sorted(job.id for job in scheduler.get_jobs()))}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        scheduler.shutdown()
 
+init_metrics(app)
+init_replicas(app, db)
+init_local_scheduler(app)
 
 if __name__ == '__main__':
+    # The debug reloader runs this file twice; only its child serves requests
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_scheduler(app)
     app.run(host='0.0.0.0', port=5557, debug=True)
\ No newline at end of file
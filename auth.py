@@ -0,0 +1,154 @@
+import logging
+import threading
+import time
+from collections import Counter, namedtuple
+
+import jwt
+from flask import g, request
+
+from app import app, db
+from models import User, Management
+from cache import LRUBackend
+
+logger = logging.getLogger(__name__)
+
+ALGORITHMS = ['HS256']
+PRINCIPAL_MODELS = {'user': User, 'manager': Management}
+
+# Decode outcomes and principal cache hits, for /metrics and debugging
+auth_stats = Counter()
+_stats_lock = threading.Lock()
+
+principal_cache = LRUBackend(max_items=app.config['AUTH_PRINCIPAL_CACHE_ITEMS'])
+
+
+def _count(outcome, amount=1):
+    with _stats_lock:
+        auth_stats[outcome] += amount
+
+
+class AuthError(Exception):
+    def __init__(self, message, status=401):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+class Principal(namedtuple('Principal', 'kind id username email role token_version profile')):
+    """Snapshot of an authenticated account, safe to cache across requests.
+
+    Views that need to write to the account should load the row by id.
+    """
+    __slots__ = ()
+
+    def to_dict(self):
+        return dict(self.profile)
+
+
+def bearer_token():
+    header = request.headers.get('Authorization', '')
+    if header.startswith('Bearer '):
+        return header.split(' ', 1)[1].strip() or None
+    return None
+
+
+def _decode(token):
+    started = time.perf_counter()
+    try:
+        claims = jwt.decode(token, app.config['JWT_SECRET_KEY'], algorithms=ALGORITHMS)
+        _count('decoded')
+        return claims
+    except jwt.ExpiredSignatureError:
+        _count('expired')
+        raise AuthError('Token has expired')
+    except jwt.InvalidTokenError:
+        _count('invalid')
+        raise AuthError('Invalid token')
+    finally:
+        _count('decode_seconds', time.perf_counter() - started)
+
+
+def decode_token(token):
+    """Verified claims for a token, or None if it is expired or invalid."""
+    try:
+        return _decode(token)
+    except AuthError:
+        return None
+
+
+def authenticate():
+    """Claims for the current request's bearer token, decoded once per request.
+
+    Signed claims are trusted as-is: this never touches the database.
+    """
+    if 'auth_claims' not in g:
+        token = bearer_token()
+        if not token:
+            raise AuthError('Token is missing')
+        g.auth_claims = _decode(token)
+    return g.auth_claims
+
+
+def _cache_key(kind, principal_id, version):
+    return f'{kind}:{principal_id}:{version}'
+
+
+def _snapshot(kind, row):
+    return Principal(
+        kind=kind,
+        id=row.id,
+        username=getattr(row, 'username', None) or getattr(row, 'name', None),
+        email=row.email,
+        role='manager' if kind == 'manager' else row.role,
+        token_version=getattr(row, 'token_version', 0) or 0,
+        profile=row.to_dict()
+    )
+
+
+def load_principal(kind, claims):
+    """The account behind a set of claims, from a short-TTL cache keyed by id and token version.
+
+    Returns None if the account no longer exists; raises AuthError if the
+    token was issued before the account's last revocation.
+    """
+    version = claims.get('ver', 0)
+    key = _cache_key(kind, claims['id'], version)
+    principal = principal_cache.get(key)
+    if principal is not None:
+        _count('principal_hit')
+        return principal
+
+    _count('principal_miss')
+    row = db.session.get(PRINCIPAL_MODELS[kind], claims['id'])
+    if row is None:
+        return None
+    principal = _snapshot(kind, row)
+    if principal.token_version != version:
+        _count('revoked')
+        raise AuthError('Token has been revoked')
+    principal_cache.set(key, principal, app.config['AUTH_PRINCIPAL_TTL'])
+    return principal
+
+
+def revoke_tokens(user):
+    """Invalidate every token issued to user so far, e.g. after a role change.
+
+    Bumps the user's token version (commit it with the rest of the change)
+    and drops the cached principal. Other worker processes keep their copy
+    for at most AUTH_PRINCIPAL_TTL seconds.
+    """
+    old_version = user.token_version or 0
+    user.token_version = old_version + 1
+    principal_cache.delete(_cache_key('user', user.id, old_version))
+    logger.info("Revoked tokens for user %s (version %s)", user.id, user.token_version)
+
+
+def get_manager_id_from_token():
+    """Manager id from the request's bearer token, or None. Trusts the signed claims."""
+    try:
+        claims = authenticate()
+    except AuthError:
+        return None
+    if claims.get('role') != 'manager':
+        return None
+    return claims.get('id')
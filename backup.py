@@ -0,0 +1,296 @@
+import json
+import logging
+import time
+import zlib
+from datetime import date, datetime
+from decimal import Decimal
+
+from sqlalchemy import Date, DateTime, select, text
+from sqlalchemy.exc import DataError, IntegrityError
+
+from app import app, db
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+
+# Rebuilt from the source tables after a restore, or short-lived
+DERIVED_TABLES = {'event_sales', 'ticket_type_sales', 'category_facets', 'holds', 'replication_heartbeat'}
+
+
+class BackupError(Exception):
+    pass
+
+
+def backup_tables():
+    """Tables to export, parents before children so a restore can insert in order."""
+    return [table for table in db.metadata.sorted_tables if table.name not in DERIVED_TABLES]
+
+
+def _default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f'Cannot serialize {type(value).__name__}')
+
+
+def _line(record):
+    return json.dumps(record, default=_default, separators=(',', ':')) + '\n'
+
+
+def _order_by(table):
+    # Association tables have no primary key; any total order keeps offsets stable
+    return list(table.primary_key.columns) or list(table.columns)
+
+
+def resolve_checkpoint(table_name=None, offset=0):
+    """Validate a resume point and return (tables still to export, offset into the first)."""
+    tables = backup_tables()
+    if offset < 0:
+        raise BackupError('offset must not be negative')
+    if not table_name:
+        return tables, offset
+    names = [table.name for table in tables]
+    if table_name not in names:
+        raise BackupError(f'Unknown table: {table_name}')
+    return tables[names.index(table_name):], offset
+
+
+def stream_backup(engine, tables, offset=0, batch_size=None):
+    """Yield the backup as NDJSON lines, one row per line, with constant memory.
+
+    Line types: a 'header', then for each table its 'row' lines and a
+    'table_end' with the row count, then a final 'end'. A stream without
+    'end' was cut short; resume it with the table and the number of rows
+    already received for that table as the offset.
+    """
+    batch_size = batch_size or app.config['BACKUP_BATCH_SIZE']
+    yield _line({
+        'type': 'header',
+        'version': FORMAT_VERSION,
+        'created_at': datetime.utcnow(),
+        'tables': [table.name for table in tables],
+        'offset': offset
+    })
+    with engine.connect() as connection:
+        for index, table in enumerate(tables):
+            skip = offset if index == 0 else 0
+            stmt = select(table).order_by(*_order_by(table))
+            if skip:
+                stmt = stmt.offset(skip)
+            result = connection.execution_options(yield_per=batch_size).execute(stmt)
+            count = 0
+            for row in result:
+                yield _line({'type': 'row', 'table': table.name, 'row': row._asdict()})
+                count += 1
+            yield _line({'type': 'table_end', 'table': table.name, 'rows': count, 'offset': skip + count})
+    yield _line({'type': 'end'})
+
+
+def gzip_stream(lines, chunk_size=64 * 1024):
+    """Gzip a stream of text lines incrementally, flushing roughly every chunk_size bytes."""
+    compressor = zlib.compressobj(wbits=31)
+    buffer, size = [], 0
+    for line in lines:
+        data = line.encode('utf-8')
+        buffer.append(data)
+        size += len(data)
+        if size >= chunk_size:
+            out = compressor.compress(b''.join(buffer))
+            buffer, size = [], 0
+            if out:
+                yield out
+    yield compressor.compress(b''.join(buffer)) + compressor.flush()
+
+
+def chunked(lines, chunk_size=64 * 1024):
+    """Group small lines into larger writes so the WSGI server isn't flushing per row."""
+    buffer, size = [], 0
+    for line in lines:
+        buffer.append(line)
+        size += len(line)
+        if size >= chunk_size:
+            yield ''.join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield ''.join(buffer)
+
+
+def _parse_datetime(value):
+    return datetime.fromisoformat(value) if isinstance(value, str) else value
+
+
+def _parse_date(value):
+    return date.fromisoformat(value) if isinstance(value, str) else value
+
+
+def _converters(table):
+    converters = {}
+    for column in table.columns:
+        if isinstance(column.type, DateTime):
+            converters[column.name] = _parse_datetime
+        elif isinstance(column.type, Date):
+            converters[column.name] = _parse_date
+    return converters
+
+
+class TableLoader:
+    """Buffers new rows for one table and inserts them with executemany.
+
+    Existing keys are fetched once up front, so deciding whether a row is
+    new never costs a query.
+    """
+
+    def __init__(self, connection, table, batch_size):
+        self.connection = connection
+        self.table = table
+        self.batch_size = batch_size
+        self.key_columns = [column.name for column in _order_by(table)]
+        self.columns = {column.name for column in table.columns}
+        self.converters = _converters(table)
+        self.existing = set(connection.execute(select(*_order_by(table))).tuples())
+        self.buffer = []
+        self.read = self.inserted = 0
+        self.seconds = 0.0
+
+    def add(self, row, line):
+        if not isinstance(row, dict):
+            raise BackupError(f'{self.table.name} row on line {line} is not an object')
+        self.read += 1
+        key = tuple(row.get(name) for name in self.key_columns)
+        if key in self.existing:
+            return
+        self.existing.add(key)
+        values = {name: value for name, value in row.items() if name in self.columns}
+        try:
+            for name, convert in self.converters.items():
+                if values.get(name) is not None:
+                    values[name] = convert(values[name])
+        except (TypeError, ValueError) as e:
+            raise BackupError(f'Invalid {self.table.name} row on line {line}: {e}')
+        self.buffer.append((line, values))
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.buffer:
+            return
+        started = time.perf_counter()
+        try:
+            with self.connection.begin_nested():
+                self.connection.execute(self.table.insert(), [values for _, values in self.buffer])
+        except (IntegrityError, DataError):
+            self._raise_for_bad_row()
+        self.seconds += time.perf_counter() - started
+        self.inserted += len(self.buffer)
+        self.buffer = []
+
+    def _raise_for_bad_row(self):
+        # The batch was rolled back to its savepoint; replay it row by row to name the culprit
+        for line, values in self.buffer:
+            try:
+                with self.connection.begin_nested():
+                    self.connection.execute(self.table.insert(), values)
+            except (IntegrityError, DataError) as e:
+                raise BackupError(f'Cannot restore {self.table.name} row on line {line}: {e.orig}')
+        raise BackupError(f'Cannot restore {self.table.name} rows')
+
+    def stats(self, elapsed):
+        return {
+            'read': self.read,
+            'inserted': self.inserted,
+            'skipped': self.read - self.inserted,
+            'seconds': round(elapsed, 3),
+            'insert_seconds': round(self.seconds, 3),
+            'rows_per_second': round(self.read / elapsed, 1) if elapsed else None
+        }
+
+
+def reset_sequences(connection, tables):
+    # Rows were inserted with explicit ids, so move Postgres serials past them
+    if connection.dialect.name != 'postgresql':
+        return
+    for table in tables:
+        if 'id' in table.c and table.c.id.primary_key:
+            connection.execute(text(
+                f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), "
+                f"coalesce((SELECT max(id) FROM {table.name}), 0) + 1, false)"
+            ))
+
+
+def restore_records(records, batch_size=None):
+    """Insert rows missing from the database from a stream of backup records.
+
+    records are the parsed NDJSON lines produced by stream_backup, in table
+    order. Everything runs in one transaction. Returns per-table stats.
+    """
+    batch_size = batch_size or app.config['RESTORE_BATCH_SIZE']
+    tables = {table.name: table for table in backup_tables()}
+    stats, loader, loader_started = {}, None, None
+
+    def finish(loader):
+        loader.flush()
+        stats[loader.table.name] = loader.stats(time.perf_counter() - loader_started)
+
+    with db.engine.begin() as connection:
+        for number, record in enumerate(records, 1):
+            if not isinstance(record, dict):
+                raise BackupError(f'Record {number} is not an object')
+            line = record.get('line', number)
+            kind = record.get('type', 'row')
+            if kind == 'header':
+                if record.get('version', FORMAT_VERSION) > FORMAT_VERSION:
+                    raise BackupError(f"Backup format {record['version']} is newer than this server supports")
+                continue
+            if kind != 'row':
+                continue
+            name = record.get('table')
+            if name not in tables:
+                raise BackupError(f'Unknown table: {name}')
+            if loader is None or loader.table.name != name:
+                if loader is not None:
+                    finish(loader)
+                if name in stats:
+                    raise BackupError(f'Rows for {name} are not contiguous')
+                loader_started = time.perf_counter()
+                loader = TableLoader(connection, tables[name], batch_size)
+            loader.add(record.get('row'), line)
+        if loader is not None:
+            finish(loader)
+        reset_sequences(connection, [tables[name] for name in stats])
+
+    logger.info("Restore finished: %s", stats)
+    return stats
+
+
+def legacy_records(payload):
+    """Records from the old single-document JSON backup (to_dict() per row,
+    with sponsors and ticket types nested in each event)."""
+    if not isinstance(payload, dict):
+        raise BackupError('Expected a JSON object of tables')
+    nested = {'event_sponsor': [], 'ticket_types': []}
+    for event in payload.get('events', []):
+        for sponsor in event.get('sponsors') or []:
+            nested['event_sponsor'].append({'event_id': event['id'], 'sponsor_id': sponsor['id']})
+        nested['ticket_types'].extend(event.get('ticket_types') or [])
+
+    for table in backup_tables():
+        for row in list(payload.get(table.name, [])) + nested.get(table.name, []):
+            yield {'type': 'row', 'table': table.name, 'row': row}
+
+
+def ndjson_records(stream):
+    """Parse NDJSON lines from a binary file-like object without reading it all."""
+    for number, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            raise BackupError(f'Invalid JSON on line {number}')
+        if not isinstance(record, dict):
+            raise BackupError(f'Line {number} is not a backup record')
+        record['line'] = number
+        yield record
@@ -0,0 +1,86 @@
+"""Gate check-in throughput, with scanners racing over the same codes.
+
+    python benchmarks/checkin.py --tickets 20000 --batch 100 --scanners 8 --rescans 0.2
+
+Every ticket is scanned once, plus a --rescans share scanned again by
+another scanner (people trying to get in twice). Fails unless each ticket
+was admitted exactly once.
+"""
+import argparse
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from common import boot_app, make_event, percentile
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tickets', type=int, default=20000)
+    parser.add_argument('--batch', type=int, default=100, help='codes per request')
+    parser.add_argument('--scanners', type=int, default=8)
+    parser.add_argument('--rescans', type=float, default=0.2)
+    parser.add_argument('--invalid', type=float, default=0.01, help='share of unknown codes')
+    parser.add_argument('--db-url', default=None)
+    args = parser.parse_args()
+
+    app, db = boot_app(args.db_url)
+    from app import generate_token
+    from models import User, Organizer
+    with app.app_context():
+        user_id, event_id, type_ids = make_event(db, stock=args.tickets)
+        organizer = Organizer.query.one()
+        staff = User(username='gate', email=organizer.email, password_hash='x', role='organizer')
+        db.session.add(staff)
+        db.session.commit()
+        headers = {'Authorization': f'Bearer {generate_token(staff)}'}
+
+    client = app.test_client()
+    codes = []
+    for start in range(0, args.tickets, 1000):
+        size = min(1000, args.tickets - start)
+        response = client.post('/checkout', json={
+            'user_id': user_id, 'payment_method': 'card',
+            'attendees': [{'name': f'Guest {start + i}', 'email': 'guest@example.com',
+                           'ticket_type_id': type_ids[0]} for i in range(size)],
+        })
+        codes += [ticket['unique_code'] for ticket in response.get_json()['tickets']]
+
+    rng = random.Random(1)
+    scans = codes + rng.sample(codes, int(len(codes) * args.rescans))
+    scans += [f'bogus-{i}' for i in range(int(len(codes) * args.invalid))]
+    rng.shuffle(scans)
+    batches = [scans[i:i + args.batch] for i in range(0, len(scans), args.batch)]
+
+    def scan(batch):
+        started = time.perf_counter()
+        response = app.test_client().post(f'/events/{event_id}/checkin', json={'codes': batch}, headers=headers)
+        return response.get_json()['results'], time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.scanners) as pool:
+        results = list(pool.map(scan, batches))
+    elapsed = time.perf_counter() - started
+
+    admitted, statuses = {}, {}
+    for batch_results, _ in results:
+        for result in batch_results:
+            statuses[result['status']] = statuses.get(result['status'], 0) + 1
+            if result['status'] == 'admitted':
+                admitted[result['code']] = admitted.get(result['code'], 0) + 1
+
+    latencies = [latency for _, latency in results]
+    print(f"{len(scans)} scans in {len(batches)} batches over {elapsed:.2f}s: "
+          f"{len(scans) / elapsed:.0f} codes/s ({len(scans) / elapsed * 60:.0f}/min)")
+    print(f"batch p50={percentile(latencies, 50) * 1000:.1f}ms p95={percentile(latencies, 95) * 1000:.1f}ms "
+          f"statuses={statuses}")
+
+    twice = [code for code, count in admitted.items() if count > 1]
+    never = set(codes) - set(admitted)
+    if twice or never:
+        raise SystemExit(f"FAIL: {len(twice)} tickets admitted twice, {len(never)} never admitted")
+    print("OK: every ticket admitted exactly once")
+
+
+if __name__ == '__main__':
+    main()
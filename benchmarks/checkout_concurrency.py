@@ -0,0 +1,75 @@
+"""Fire many parallel checkouts at one event and assert nothing is oversold.
+
+    python benchmarks/checkout_concurrency.py --stock 500 --requests 2000 --workers 32
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from common import boot_app, make_event, percentile
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--stock', type=int, default=500)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--workers', type=int, default=32)
+    parser.add_argument('--qty', type=int, default=1, help='tickets per checkout')
+    parser.add_argument('--types', type=int, default=2, help='ticket types per checkout')
+    parser.add_argument('--db-url', default=None)
+    args = parser.parse_args()
+
+    app, db = boot_app(args.db_url)
+    with app.app_context():
+        user_id, event_id, type_ids = make_event(db, stock=args.stock, ticket_types=args.types)
+
+    payload = {
+        'user_id': user_id,
+        'quantities': {str(tt_id): args.qty for tt_id in type_ids},
+        'attendee_name': 'Bench Buyer',
+        'attendee_email': 'buyer@example.com',
+        'payment_method': 'card',
+    }
+
+    def buy(_):
+        client = app.test_client()
+        started = time.perf_counter()
+        response = client.post('/checkout', json=payload)
+        return response.status_code, time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        results = list(pool.map(buy, range(args.requests)))
+    elapsed = time.perf_counter() - started
+
+    statuses = {}
+    for status, _ in results:
+        statuses[status] = statuses.get(status, 0) + 1
+    latencies = [latency for _, latency in results]
+
+    from models import Ticket, TicketType
+    with app.app_context():
+        remaining = {tt.id: tt.quantity_available for tt in TicketType.query.filter(TicketType.id.in_(type_ids))}
+        sold = {
+            tt_id: Ticket.query.filter_by(ticket_type_id=tt_id).count()
+            for tt_id in type_ids
+        }
+
+    print(f"{args.requests} checkouts in {elapsed:.2f}s ({args.requests / elapsed:.1f} req/s)")
+    print(f"status codes: {statuses}")
+    print(f"latency p50={percentile(latencies, 50) * 1000:.1f}ms "
+          f"p95={percentile(latencies, 95) * 1000:.1f}ms p99={percentile(latencies, 99) * 1000:.1f}ms")
+    for tt_id in type_ids:
+        print(f"ticket type {tt_id}: sold={sold[tt_id]} remaining={remaining[tt_id]}")
+
+    expected_orders = min(args.requests, args.stock // args.qty)
+    for tt_id in type_ids:
+        assert remaining[tt_id] >= 0, f"negative stock on ticket type {tt_id}"
+        assert sold[tt_id] + remaining[tt_id] == args.stock, f"oversold ticket type {tt_id}"
+        assert sold[tt_id] == expected_orders * args.qty, f"lost sales on ticket type {tt_id}"
+    assert statuses.get(200, 0) == expected_orders
+    print("OK: zero oversell")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""Shared setup for the benchmark scripts.
+
+Each script points the app at a throwaway database before importing it, so
+run them from the repo root, e.g. `python benchmarks/checkout_concurrency.py`.
+"""
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def boot_app(db_url=None):
+    """Import the app against a fresh database and return (app, db)."""
+    if db_url is None:
+        db_path = os.path.join(tempfile.mkdtemp(prefix='tikiti-bench-'), 'bench.db')
+        db_url = f'sqlite:///{db_path}'
+    os.environ['DATABASE_URL'] = db_url
+    os.environ.setdefault('SCHEDULER_ENABLED', '0')
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+
+    from app import app, db
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+    return app, db
+
+
+def make_event(db, stock=100, price=1000, ticket_types=1):
+    """Create one user, organizer, venue and approved event with ticket stock."""
+    from models import User, Organizer, Venue, Event, TicketType
+
+    user = User(username='bench', email='bench@example.com', password_hash='x', role='user')
+    organizer = Organizer(name='Bench Org', email='org@example.com', phone='0700000000',
+                          contact_email='org@example.com')
+    venue = Venue(name='Bench Hall', address='Bench Rd', city='Nairobi', state='Nairobi',
+                  zip_code='00100', capacity=stock * ticket_types)
+    db.session.add_all([user, organizer, venue])
+    db.session.flush()
+
+    now = datetime.utcnow()
+    event = Event(title='Bench Night', description='Benchmark event', venue_id=venue.id,
+                  start_datetime=now + timedelta(days=30), end_datetime=now + timedelta(days=30, hours=4),
+                  organizer_id=organizer.id, category='Music', status='approved', is_active=True)
+    db.session.add(event)
+    db.session.flush()
+
+    types = []
+    for i in range(ticket_types):
+        tt = TicketType(event_id=event.id, name=f'Type {i}', price=price, quantity_available=stock,
+                        sales_start=now - timedelta(days=1), sales_end=now + timedelta(days=29))
+        db.session.add(tt)
+        types.append(tt)
+    db.session.commit()
+    return user.id, event.id, [tt.id for tt in types]
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
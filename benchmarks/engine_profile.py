@@ -0,0 +1,102 @@
+"""Concurrent /checkout writes plus /events reads, with and without the engine profile.
+
+    python benchmarks/engine_profile.py --checkouts 1000 --browses 4000 --workers 16
+    python benchmarks/engine_profile.py --db-url postgresql+psycopg://localhost/tikiti_bench
+
+Engine options are fixed when the app is imported, so each profile runs in
+its own process (DB_ENGINE_PROFILE=1 / 0) against its own fresh database.
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from common import boot_app, make_event, percentile
+
+
+def measure(args):
+    app, db = boot_app(args.db_url)
+    from synthetic import SyntheticDataset
+    with app.app_context():
+        user_id, _, type_ids = make_event(db, stock=args.checkouts * 2, ticket_types=4)
+        # A catalog worth browsing around the event being bought
+        SyntheticDataset(organizers=50, venues=25, sponsors=5, events=args.events, users=100, orders=0).load()
+
+    checkout = {
+        'user_id': user_id, 'attendee_name': 'Bench Buyer',
+        'attendee_email': 'buyer@example.com', 'payment_method': 'card',
+    }
+    rng = random.Random(1)
+    work = [('checkout', None)] * args.checkouts + [('browse', None)] * args.browses
+    rng.shuffle(work)
+
+    def call(item):
+        kind, _ = item
+        client = app.test_client()
+        started = time.perf_counter()
+        if kind == 'checkout':
+            payload = dict(checkout, quantities={str(random.choice(type_ids)): 1})
+            response = client.post('/checkout', json=payload)
+        else:
+            response = client.get(f'/events?limit=20&city={random.choice(["", "Nairobi", "Mombasa"])}')
+        return kind, response.status_code, time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        results = list(pool.map(call, work))
+    elapsed = time.perf_counter() - started
+
+    report = {'seconds': round(elapsed, 2), 'rps': round(len(results) / elapsed, 1)}
+    for kind in ('checkout', 'browse'):
+        latencies = [latency for k, _, latency in results if k == kind]
+        statuses = {}
+        for k, status, _ in results:
+            if k == kind:
+                statuses[status] = statuses.get(status, 0) + 1
+        report[kind] = {
+            'p50_ms': round(percentile(latencies, 50) * 1000, 1),
+            'p99_ms': round(percentile(latencies, 99) * 1000, 1),
+            'statuses': statuses,
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--checkouts', type=int, default=1000)
+    parser.add_argument('--browses', type=int, default=4000)
+    parser.add_argument('--events', type=int, default=2000)
+    parser.add_argument('--workers', type=int, default=16)
+    parser.add_argument('--db-url', default=None)
+    parser.add_argument('--profile', choices=['on', 'off', 'both'], default='both')
+    args = parser.parse_args()
+
+    if args.profile != 'both':
+        os.environ['DB_ENGINE_PROFILE'] = '1' if args.profile == 'on' else '0'
+        os.environ.setdefault('SLOW_QUERY_MS', '0')
+        print(json.dumps(measure(args)))
+        return
+
+    reports = {}
+    for profile in ('off', 'on'):
+        argv = [sys.executable, os.path.abspath(__file__), '--profile', profile,
+                '--checkouts', str(args.checkouts), '--browses', str(args.browses),
+                '--events', str(args.events), '--workers', str(args.workers)]
+        if args.db_url:
+            argv += ['--db-url', args.db_url]
+        output = subprocess.run(argv, check=True, capture_output=True, text=True).stdout
+        reports[profile] = json.loads(output.strip().splitlines()[-1])
+
+    for profile, report in reports.items():
+        print(f"profile {profile:3}: {report['rps']:7.1f} req/s in {report['seconds']}s")
+        for kind in ('checkout', 'browse'):
+            r = report[kind]
+            print(f"    {kind:8} p50={r['p50_ms']:7.1f}ms p99={r['p99_ms']:8.1f}ms statuses={r['statuses']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""Latency and statements per /checkout for group orders of 1 to 1000 tickets.
+
+    python benchmarks/group_checkout.py --sizes 1,10,100,1000 --repeat 20
+
+Each order carries an attendees list (one name/email per ticket), so the
+cost of issuing the tickets shows up directly: it should stay a handful of
+statements whatever the order size.
+"""
+import argparse
+import threading
+import time
+
+from common import boot_app, make_event, percentile
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='1,10,100,1000', help='tickets per order')
+    parser.add_argument('--repeat', type=int, default=20, help='orders per size')
+    parser.add_argument('--types', type=int, default=2, help='ticket types per order')
+    parser.add_argument('--db-url', default=None)
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.sizes.split(',')]
+
+    app, db = boot_app(args.db_url)
+    from sqlalchemy import event
+    with app.app_context():
+        stock = sum(sizes) * (args.repeat + 1)
+        user_id, _, type_ids = make_event(db, stock=stock, ticket_types=args.types)
+
+        counter = threading.local()
+
+        @event.listens_for(db.engine, 'after_cursor_execute')
+        def count_query(*_):
+            counter.queries = getattr(counter, 'queries', 0) + 1
+
+    client = app.test_client()
+    print(f"{'tickets':>8} {'p50':>9} {'p95':>9} {'per ticket':>11} {'queries':>8}")
+    for size in sizes:
+        payload = {
+            'user_id': user_id,
+            'payment_method': 'card',
+            'attendees': [{'name': f'Guest {i}', 'email': f'guest{i}@example.com',
+                           'ticket_type_id': type_ids[i % len(type_ids)]} for i in range(size)],
+        }
+        client.post('/checkout', json=payload)  # warm-up
+
+        latencies, queries = [], []
+        for _ in range(args.repeat):
+            counter.queries = 0
+            started = time.perf_counter()
+            response = client.post('/checkout', json=payload)
+            latencies.append(time.perf_counter() - started)
+            queries.append(counter.queries)
+            if response.status_code != 200 or len(response.get_json()['tickets']) != size:
+                raise SystemExit(f"checkout of {size} failed: {response.status_code} {response.get_data(as_text=True)[:200]}")
+
+        p50 = percentile(latencies, 50) * 1000
+        print(f"{size:8} {p50:8.1f}ms {percentile(latencies, 95) * 1000:8.1f}ms "
+              f"{p50 / size:10.3f}ms {max(queries):8}")
+
+
+if __name__ == '__main__':
+    main()
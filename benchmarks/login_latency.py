@@ -0,0 +1,83 @@
+"""Login and catalog latency under a mixed burst of sign-ins and browsing.
+
+    python benchmarks/login_latency.py --logins 400 --browses 2000 --workers 32
+
+Logins run their KDF on the bounded hashing pool; anything past
+PASSWORD_HASH_WORKERS + PASSWORD_HASH_QUEUE is answered 429 rather than
+queued, so catalog p99 should stay flat while logins are shed.
+"""
+import argparse
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from common import boot_app, make_event, percentile
+
+CATALOG_PATHS = ['/featured-events', '/events', '/events/counts', '/event-categories']
+
+
+def report(name, samples):
+    latencies = [latency for _, latency in samples]
+    statuses = {}
+    for status, _ in samples:
+        statuses[status] = statuses.get(status, 0) + 1
+    print(f"{name:8} n={len(samples)} statuses={statuses} "
+          f"p50={percentile(latencies, 50) * 1000:.1f}ms p95={percentile(latencies, 95) * 1000:.1f}ms "
+          f"p99={percentile(latencies, 99) * 1000:.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--logins', type=int, default=400)
+    parser.add_argument('--browses', type=int, default=2000)
+    parser.add_argument('--workers', type=int, default=32)
+    parser.add_argument('--no-cache', action='store_true', help='disable the catalog response cache')
+    parser.add_argument('--db-url', default=None)
+    args = parser.parse_args()
+
+    if args.no_cache:
+        os.environ['CACHE_ENABLED'] = '0'
+    app, db = boot_app(args.db_url)
+    from models import User
+    from passwords import hasher
+    with app.app_context():
+        make_event(db)
+        password_hash = hasher.hash('bench-password')
+        db.session.add_all([
+            User(username=f'user{i}', email=f'user{i}@example.com', password_hash=password_hash, role='user')
+            for i in range(args.users)
+        ])
+        db.session.commit()
+
+    jobs = [('login', i) for i in range(args.logins)] + [('browse', i) for i in range(args.browses)]
+    random.Random(42).shuffle(jobs)
+
+    def run(job):
+        kind, i = job
+        client = app.test_client()
+        started = time.perf_counter()
+        if kind == 'login':
+            response = client.post('/auth/login', json={
+                'email': f'user{i % args.users}@example.com', 'password': 'bench-password'
+            })
+        else:
+            response = client.get(CATALOG_PATHS[i % len(CATALOG_PATHS)])
+        return kind, response.status_code, time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        results = list(pool.map(run, jobs))
+    elapsed = time.perf_counter() - started
+
+    print(f"{len(jobs)} requests in {elapsed:.2f}s ({len(jobs) / elapsed:.1f} req/s), "
+          f"hashing pool {app.config['PASSWORD_HASH_WORKERS']} workers + {app.config['PASSWORD_HASH_QUEUE']} queued")
+    logins = [(status, latency) for kind, status, latency in results if kind == 'login']
+    report('login', logins)
+    report('login ok', [sample for sample in logins if sample[0] == 200])
+    report('catalog', [(status, latency) for kind, status, latency in results if kind == 'browse'])
+
+
+if __name__ == '__main__':
+    main()
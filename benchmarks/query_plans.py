@@ -0,0 +1,90 @@
+"""Query-plan regression check: every hot route query must use its index.
+
+Compiles the route queries, runs EXPLAIN (QUERY PLAN) and exits non-zero if
+an expected index is missing from the plan.
+
+    python benchmarks/query_plans.py [--db-url postgresql://...]
+"""
+import argparse
+import sys
+from datetime import datetime
+
+from common import boot_app, make_event
+
+
+def hot_queries(db):
+    """(label, statement, expected index) for the queries behind the busiest routes."""
+    from sqlalchemy import select, func
+    from models import Event, Order, Ticket, TicketType
+
+    now = datetime.utcnow()
+    return [
+        ('/events',
+         select(Event.id).where(Event.status == 'approved', Event.is_active == True)
+         .order_by(Event.start_datetime, Event.id).limit(20),
+         'ix_events_status_active_start'),
+        ('/featured-events',
+         select(Event.id).where(Event.status == 'approved', Event.is_active == True)
+         .order_by(Event.created_at.desc()).limit(8),
+         'ix_events_status_active_created'),
+        ('/organiser/<id>/events',
+         select(Event.id).where(Event.organizer_id == 1).order_by(Event.start_datetime),
+         'ix_events_organizer_start'),
+        ('/organiser/<id>/upcoming',
+         select(Event.id).where(Event.organizer_id == 1, Event.start_datetime > now),
+         'ix_events_organizer_start'),
+        ('/events/counts',
+         select(Event.category, func.count(Event.id)).where(Event.is_active == True).group_by(Event.category),
+         'ix_events_category_active'),
+        ('event orders (stats, dashboards)',
+         select(func.sum(Order.total_amount)).where(Order.event_id == 1, Order.status == 'completed'),
+         'ix_orders_event_status'),
+        ('/profile/tickets',
+         select(Order.id).where(Order.user_id == 1).order_by(Order.order_date.desc()),
+         'ix_orders_user_date'),
+        ('order tickets',
+         select(Ticket.id).where(Ticket.order_id == 1),
+         'ix_tickets_order_id'),
+        ('/events/<id>/tickets-summary',
+         select(func.count(Ticket.id)).where(Ticket.ticket_type_id == 1),
+         'ix_tickets_ticket_type_id'),
+        ('event ticket types',
+         select(TicketType.id).where(TicketType.event_id == 1),
+         'ix_ticket_types_event_id'),
+    ]
+
+
+def explain(connection, statement):
+    dialect = connection.dialect.name
+    compiled = statement.compile(dialect=connection.dialect, compile_kwargs={'literal_binds': True})
+    prefix = 'EXPLAIN QUERY PLAN ' if dialect == 'sqlite' else 'EXPLAIN '
+    rows = connection.exec_driver_sql(prefix + str(compiled)).all()
+    return '\n'.join(str(row[-1]) for row in rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--db-url', default=None)
+    parser.add_argument('-v', '--verbose', action='store_true')
+    args = parser.parse_args()
+
+    app, db = boot_app(args.db_url)
+    failures = 0
+    with app.app_context():
+        make_event(db)
+        with db.engine.connect() as connection:
+            if connection.dialect.name == 'postgresql':
+                # Tiny tables would otherwise always be seq-scanned
+                connection.exec_driver_sql('SET enable_seqscan = off')
+            for label, statement, index in hot_queries(db):
+                plan = explain(connection, statement)
+                ok = index in plan
+                failures += not ok
+                print(f"{'ok  ' if ok else 'FAIL'} {label:34} {index}")
+                if args.verbose or not ok:
+                    print('      ' + plan.replace('\n', '\n      '))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,278 @@
+"""Throughput, latency and queries per request for the main routes, against a
+generated dataset, with regressions checked against a stored baseline.
+
+    python benchmarks/routes.py --events 20k --orders 200k --clients 8
+    python benchmarks/routes.py --save-baseline      # write benchmarks/baseline.json
+    python benchmarks/routes.py                      # compare; exits 1 on a regression
+
+Requests go through the WSGI app in-process (no sockets) from --clients
+threads. A scenario regresses when its p95 or throughput moves more than
+--tolerance against the baseline, when it issues more statements per
+request than the baseline allowed for, or when any request fails.
+Baselines are only comparable on the same machine and dataset options.
+
+The response cache is off unless --cache is given, so catalog scenarios
+measure the queries rather than LRU hits. Generated dates are relative to
+--anchor (default: the baseline's anchor, else today), which is part of
+the dataset key so a comparison regenerates the same rows. Routes still
+compare against the real clock (sales windows, upcoming events), so an
+anchor more than MAX_ANCHOR_AGE_DAYS old is refused: what is on sale has
+drifted too far from the baseline run, so record a new baseline.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from common import ROOT, boot_app, percentile
+
+DEFAULT_BASELINE = os.path.join(ROOT, 'benchmarks', 'baseline.json')
+ANCHOR_FORMAT = '%Y-%m-%d'
+MAX_ANCHOR_AGE_DAYS = 14
+
+
+class Scenario:
+    def __init__(self, name, method, build, requests=None, statuses=(200,)):
+        self.name = name
+        self.method = method
+        self.build = build  # rng -> (path, request kwargs)
+        self.requests = requests
+        self.statuses = statuses
+
+
+def pick_targets(db):
+    """Ids the scenarios hit: the busiest events, organizers and buyers, like real traffic."""
+    from datetime import datetime
+    from sqlalchemy import func
+    from models import Event, EventSales, Management, Order, Organizer, TicketType, User
+    from app import generate_token, generate_manager_token
+
+    now = datetime.utcnow()
+    events = [row.event_id for row in db.session.query(EventSales.event_id)
+              .order_by(EventSales.orders_count.desc()).limit(50)]
+    organizers = [row.organizer_id for row in db.session.query(Event.organizer_id)
+                  .group_by(Event.organizer_id).order_by(func.count(Event.id).desc()).limit(20)]
+    buyers = db.session.query(User).join(Order, Order.user_id == User.id)\
+        .group_by(User.id).order_by(func.count(Order.id).desc()).limit(20).all()
+    on_sale = [row.id for row in db.session.query(TicketType.id).join(Event)
+               .filter(Event.status == 'approved', Event.is_active == True,
+                       TicketType.sales_start <= now, TicketType.sales_end > now,
+                       TicketType.quantity_available > 0)
+               .order_by(TicketType.quantity_available.desc()).limit(200)]
+
+    manager = Management(name='Bench Manager', email='bench-manager@example.com', password_hash='x')
+    db.session.add(manager)
+    db.session.commit()
+    return {
+        'events': events or [1],
+        'organizers': organizers or [1],
+        'buyers': [(user.id, generate_token(user)) for user in buyers],
+        'ticket_types': on_sale,
+        'manager_token': generate_manager_token(manager),
+    }
+
+
+def scenarios(targets, backup_requests):
+    events, organizers = targets['events'], targets['organizers']
+    buyers, ticket_types = targets['buyers'], targets['ticket_types']
+    manager = {'headers': {'Authorization': f"Bearer {targets['manager_token']}"}}
+
+    def get(path):
+        return lambda rng: (path, {})
+
+    def with_event(template):
+        return lambda rng: (template.format(rng.choice(events)), {})
+
+    def with_organizer(template):
+        return lambda rng: (template.format(rng.choice(organizers)), {})
+
+    def profile_tickets(rng):
+        _, token = rng.choice(buyers)
+        return '/profile/tickets', {'headers': {'Authorization': f'Bearer {token}'}}
+
+    def checkout(rng):
+        user_id, _ = rng.choice(buyers)
+        return '/checkout', {'json': {
+            'user_id': user_id, 'quantities': {str(rng.choice(ticket_types)): 1},
+            'attendee_name': 'Bench Buyer', 'attendee_email': 'buyer@example.com', 'payment_method': 'card'
+        }}
+
+    result = [
+        Scenario('events', 'GET', get('/events')),
+        Scenario('events_category_facets', 'GET', get('/events?category=music&facets=1')),
+        Scenario('events_search', 'GET', get('/events?search=jazz')),
+        Scenario('events_city', 'GET', get('/events?city=Mombasa')),
+        Scenario('event_detail', 'GET', with_event('/events/{}')),
+        Scenario('event_details', 'GET', with_event('/events/{}/details')),
+        Scenario('event_stats', 'GET', with_event('/events/{}/stats')),
+        Scenario('featured_events', 'GET', get('/featured-events')),
+        Scenario('event_counts', 'GET', get('/events/counts')),
+        Scenario('event_categories', 'GET', get('/event-categories')),
+        Scenario('organizers', 'GET', get('/organizers')),
+        Scenario('organizers_featured', 'GET', get('/organizers/featured/summary')),
+        Scenario('organizers_search', 'GET', get('/organizers/search?q=events')),
+        Scenario('organizer_events', 'GET', with_organizer('/organiser/{}/events')),
+        Scenario('organizer_dashboard', 'GET', with_organizer('/organizers/{}/dashboard')),
+        Scenario('management_events', 'GET', lambda rng: ('/management/events', manager)),
+        Scenario('management_pending', 'GET', lambda rng: ('/management/events/pending', manager)),
+        Scenario('management_stats', 'GET', lambda rng: ('/management/dashboard/stats', manager)),
+        Scenario('backup_data', 'GET', lambda rng: ('/backup-data', manager), requests=backup_requests),
+    ]
+    if buyers:
+        result.append(Scenario('profile_tickets', 'GET', profile_tickets))
+    if buyers and ticket_types:
+        result.append(Scenario('checkout', 'POST', checkout))
+    return result
+
+
+def run(app, scenario, requests, clients, seed, counter):
+    rng = random.Random(f'{seed}:{scenario.name}')
+    calls = [scenario.build(rng) for _ in range(requests)]
+
+    def call(args):
+        path, kwargs = args
+        client = app.test_client()
+        counter.queries = 0
+        started = time.perf_counter()
+        response = client.open(path, method=scenario.method, **kwargs)
+        response.get_data()  # drain streamed bodies inside the timing
+        return response.status_code, time.perf_counter() - started, counter.queries
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        results = list(pool.map(call, calls))
+    elapsed = time.perf_counter() - started
+
+    latencies = [latency for _, latency, _ in results]
+    return {
+        'requests': len(results),
+        'errors': sum(1 for status, _, _ in results if status not in scenario.statuses),
+        'rps': round(len(results) / elapsed, 2),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+        'queries': round(sum(queries for _, _, queries in results) / len(results), 2),
+    }
+
+
+def regressions(result, baseline, tolerance, query_tolerance):
+    problems = []
+    if result['errors']:
+        problems.append(f"{result['errors']} failed requests")
+    if baseline is None:
+        return problems
+    if result['p95_ms'] > baseline['p95_ms'] * (1 + tolerance):
+        problems.append(f"p95 {baseline['p95_ms']}ms -> {result['p95_ms']}ms")
+    if result['rps'] < baseline['rps'] * (1 - tolerance):
+        problems.append(f"throughput {baseline['rps']} -> {result['rps']} req/s")
+    # Statement counts are deterministic, so the allowance is small
+    allowed = baseline['queries'] + max(0.5, baseline['queries'] * query_tolerance)
+    if result['queries'] > allowed:
+        problems.append(f"queries/request {baseline['queries']} -> {result['queries']}")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--organizers', default='500')
+    parser.add_argument('--events', default='10k')
+    parser.add_argument('--orders', default='100k')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=200, help='per scenario')
+    parser.add_argument('--backup-requests', type=int, default=3)
+    parser.add_argument('--warmup', type=int, default=5, help='unmeasured requests per scenario')
+    parser.add_argument('--only', help='comma-separated scenario names')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed p95/throughput change')
+    parser.add_argument('--query-tolerance', type=float, default=0.1)
+    parser.add_argument('--anchor', help="'now' for generated dates, YYYY-MM-DD (default: the baseline's, else today)")
+    parser.add_argument('--cache', action='store_true', help='keep the response cache on')
+    parser.add_argument('--db-url', default=None)
+    args = parser.parse_args()
+
+    baseline = None
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    anchor = args.anchor or (baseline or {}).get('dataset', {}).get('anchor') \
+        or datetime.utcnow().strftime(ANCHOR_FORMAT)
+    anchor_at = datetime.strptime(anchor, ANCHOR_FORMAT)
+    if (datetime.utcnow() - anchor_at).days > MAX_ANCHOR_AGE_DAYS:
+        sys.exit(f"Anchor {anchor} is over {MAX_ANCHOR_AGE_DAYS} days old, so sales windows have drifted from "
+                 f"the baseline run; record a new baseline with --save-baseline")
+
+    # Slow statements are the point of some scenarios; don't log each one
+    os.environ.setdefault('SLOW_QUERY_MS', '0')
+    os.environ['CACHE_ENABLED'] = '1' if args.cache else '0'
+    app, db = boot_app(args.db_url)
+    from sqlalchemy import event
+    from synthetic import SyntheticDataset, parse_count
+
+    dataset = {
+        'organizers': parse_count(args.organizers), 'events': parse_count(args.events),
+        'orders': parse_count(args.orders), 'seed': args.seed, 'clients': args.clients,
+        'anchor': anchor, 'cache': args.cache,
+    }
+    with app.app_context():
+        started = time.perf_counter()
+        SyntheticDataset(
+            organizers=dataset['organizers'], venues=max(1, dataset['organizers'] // 2),
+            sponsors=dataset['organizers'] // 10, events=dataset['events'],
+            users=max(1, dataset['orders'] // 4), orders=dataset['orders'], seed=args.seed, anchor=anchor_at
+        ).load()
+        print(f"generated dataset {dataset} in {time.perf_counter() - started:.1f}s")
+        targets = pick_targets(db)
+
+        counter = threading.local()
+
+        @event.listens_for(db.engine, 'after_cursor_execute')
+        def count_query(*_):
+            counter.queries = getattr(counter, 'queries', 0) + 1
+
+    selected = scenarios(targets, args.backup_requests)
+    if args.only:
+        names = set(args.only.split(','))
+        selected = [scenario for scenario in selected if scenario.name in names]
+
+    if baseline is not None:
+        if baseline.get('dataset') != dataset:
+            sys.exit(f"Baseline {args.baseline} was recorded with dataset {baseline.get('dataset')}, "
+                     f"not {dataset}; rerun with matching options or --save-baseline")
+
+    results, failures = {}, {}
+    print(f"{'scenario':26} {'req/s':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'queries':>8}")
+    for scenario in selected:
+        requests = scenario.requests or args.requests
+        if args.warmup:
+            run(app, scenario, min(args.warmup, requests), 1, args.seed + 1, counter)
+        result = run(app, scenario, requests, args.clients, args.seed, counter)
+        results[scenario.name] = result
+        previous = baseline['scenarios'].get(scenario.name) if baseline else None
+        problems = regressions(result, previous, args.tolerance, args.query_tolerance)
+        if problems:
+            failures[scenario.name] = problems
+        print(f"{scenario.name:26} {result['rps']:8.1f} {result['p50_ms']:7.1f}ms {result['p95_ms']:7.1f}ms "
+              f"{result['p99_ms']:7.1f}ms {result['queries']:8.1f}{'  REGRESSED' if problems else ''}")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump({'dataset': dataset, 'scenarios': results}, f, indent=2, sort_keys=True)
+        print(f"baseline written to {args.baseline}")
+    elif baseline is None:
+        print(f"no baseline at {args.baseline}; run with --save-baseline to record one")
+
+    for name, problems in failures.items():
+        print(f"FAIL {name}: {'; '.join(problems)}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
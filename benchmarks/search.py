@@ -0,0 +1,104 @@
+"""Compare LIKE scans with the full-text index for /events and /organizers/search.
+
+    python benchmarks/search.py --events 100000
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+from common import boot_app, percentile
+
+WORDS = ('jazz rock comedy tech startup food wine film art dance gospel hiphop summit expo '
+         'festival night live workshop conference marathon charity gala kids fashion').split()
+CATEGORIES = ['Music', 'Technology', 'Food', 'Business', 'Entertainment', 'Sports', 'Art']
+CITIES = ['Nairobi', 'Mombasa', 'Kisumu', 'Nakuru', 'Eldoret', 'Thika', 'Malindi']
+
+
+def populate(db, events, organizers, seed=7):
+    from models import Event, Organizer, Venue
+
+    rng = random.Random(seed)
+    # Mostly filler vocabulary so keywords are selective, as in real listings
+    filler = [f'w{i}' for i in range(5000)]
+    db.session.execute(db.insert(Organizer), [
+        {'name': f'{rng.choice(WORDS).title()} {rng.choice(WORDS).title()} {i}', 'email': f'org{i}@example.com',
+         'phone': '0700000000', 'contact_email': f'org{i}@example.com', 'speciality': rng.choice(WORDS)}
+        for i in range(organizers)
+    ])
+    db.session.execute(db.insert(Venue), [
+        {'name': f'Venue {i}', 'address': 'Road', 'city': CITIES[i % len(CITIES)], 'state': 'KE',
+         'zip_code': '00100', 'capacity': 1000}
+        for i in range(50)
+    ])
+    start = datetime(2030, 1, 1)
+    batch = []
+    for i in range(events):
+        batch.append({
+            'title': f"{rng.choice(WORDS).title()} {rng.choice(filler)} {i}",
+            'description': ' '.join(rng.choice(filler) for _ in range(30)) + ' ' + rng.choice(WORDS),
+            'venue_id': rng.randint(1, 50), 'organizer_id': rng.randint(1, organizers),
+            'start_datetime': start + timedelta(hours=i), 'end_datetime': start + timedelta(hours=i + 3),
+            'category': rng.choice(CATEGORIES), 'is_active': True, 'status': 'approved',
+            'created_at': start, 'updated_at': start,
+        })
+        if len(batch) == 10000:
+            db.session.execute(db.insert(Event), batch)
+            batch = []
+    if batch:
+        db.session.execute(db.insert(Event), batch)
+    db.session.commit()
+
+
+def timed(client, url, rounds):
+    samples = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        response = client.get(url)
+        samples.append(time.perf_counter() - started)
+        assert response.status_code == 200, response.data
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--events', type=int, default=100000)
+    parser.add_argument('--organizers', type=int, default=2000)
+    parser.add_argument('--rounds', type=int, default=20)
+    parser.add_argument('--db-url', default=None)
+    args = parser.parse_args()
+
+    app, db = boot_app(args.db_url)
+    import search
+
+    with app.app_context():
+        started = time.perf_counter()
+        populate(db, args.events, args.organizers)
+        print(f"inserted {args.events} events in {time.perf_counter() - started:.1f}s")
+        started = time.perf_counter()
+        search.rebuild_search_index()
+        print(f"built search index in {time.perf_counter() - started:.1f}s")
+
+    client = app.test_client()
+    from models import Event
+    for term in ('jazz', 'mombasa', 'tech summit'):
+        samples = timed(client, f'/events?search={term}&limit=20', args.rounds)
+        print(f"/events?search={term!r:14} fts  p50={percentile(samples, 50) * 1000:7.1f}ms "
+              f"p95={percentile(samples, 95) * 1000:7.1f}ms")
+
+        # The pre-index behaviour: substring scan of the title over every active event
+        samples = []
+        with app.app_context():
+            for _ in range(args.rounds):
+                started = time.perf_counter()
+                Event.query.filter_by(is_active=True, status='approved')\
+                    .filter(Event.title.ilike(f'%{term}%')).order_by(Event.start_datetime).all()
+                samples.append(time.perf_counter() - started)
+        print(f"{'title ILIKE scan':29} like p50={percentile(samples, 50) * 1000:7.1f}ms "
+              f"p95={percentile(samples, 95) * 1000:7.1f}ms")
+
+    samples = timed(client, '/organizers/search?q=jazz', args.rounds)
+    print(f"/organizers/search?q='jazz'   fts  p50={percentile(samples, 50) * 1000:7.1f}ms")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import request, make_response
+
+from app import app
+
+
+class LRUBackend:
+    """In-process LRU with per-entry TTL. Each gunicorn worker has its own copy."""
+
+    def __init__(self, max_items=1024):
+        self.max_items = max_items
+        self._items = OrderedDict()
+        self._counters = {}  # kept apart so LRU eviction can't reset them
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._items.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at is not None and expires_at < time.monotonic():
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._items[key] = (expires_at, value)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._items.pop(key, None)
+
+    def counter(self, key):
+        return self._counters.get(key, 0)
+
+    def incr(self, key):
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+
+class RedisBackend:
+    """Shared backend so every worker sees the same entries and invalidations."""
+
+    def __init__(self, url, prefix='tikiti:'):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError('CACHE_BACKEND=redis needs the redis package installed')
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, key):
+        raw = self.client.get(self.prefix + key)
+        return pickle.loads(raw) if raw is not None else None
+
+    def set(self, key, value, ttl=None):
+        self.client.set(self.prefix + key, pickle.dumps(value), ex=ttl or None)
+
+    def delete(self, key):
+        self.client.delete(self.prefix + key)
+
+    def counter(self, key):
+        return int(self.client.get(self.prefix + key) or 0)
+
+    def incr(self, key):
+        return self.client.incr(self.prefix + key)
+
+
+class ResponseCache:
+    """Keyed response cache with TTL and explicit namespace invalidation.
+
+    Entries are keyed by namespace generation + full request path, so
+    invalidating a namespace just bumps its generation and old entries age out.
+    """
+
+    def __init__(self, backend, default_ttl=60):
+        self.backend = backend
+        self.default_ttl = default_ttl
+
+    def _generation(self, namespace):
+        return self.backend.counter(f'gen:{namespace}')
+
+    def invalidate(self, *namespaces):
+        for namespace in namespaces:
+            self.backend.incr(f'gen:{namespace}')
+
+    def key_for(self, namespace, key):
+        return f'{namespace}:{self._generation(namespace)}:{key}'
+
+    def cached(self, namespace, ttl=None):
+        """Cache successful GET responses of a view by full path and query string."""
+        def decorator(f):
+            @wraps(f)
+            def decorated(*args, **kwargs):
+                if not app.config['CACHE_ENABLED'] or request.method != 'GET':
+                    return f(*args, **kwargs)
+
+                # Resolve the generation up front: a write that lands while the
+                # view runs must not have its data stored under the new generation
+                key = self.key_for(namespace, request.full_path)
+                hit = self.backend.get(key)
+                if hit is not None:
+                    body, status, mimetype = hit
+                    response = make_response(body, status)
+                    response.mimetype = mimetype
+                    response.headers['X-Cache'] = 'HIT'
+                    return response
+
+                response = make_response(f(*args, **kwargs))
+                if response.status_code == 200 and not response.direct_passthrough:
+                    entry = (response.get_data(), response.status_code, response.mimetype)
+                    self.backend.set(key, entry, self.default_ttl if ttl is None else ttl)
+                response.headers['X-Cache'] = 'MISS'
+                return response
+            return decorated
+        return decorator
+
+
+def make_backend(config):
+    if config['CACHE_BACKEND'] == 'redis':
+        return RedisBackend(config['CACHE_REDIS_URL'])
+    return LRUBackend(max_items=config['CACHE_MAX_ITEMS'])
+
+
+response_cache = ResponseCache(make_backend(app.config), default_ttl=app.config['CACHE_DEFAULT_TTL'])
@@ -0,0 +1,200 @@
+"""Gate check-in: redeem batches of scanned ticket codes.
+
+Each worker keeps a hash index per event of its ticket codes (code ->
+ticket id). A scheduler job loads it CHECKIN_WARM_MINUTES before an event
+starts, and the first scan loads it if the job hasn't. A batch is matched
+against the index in memory, then redeemed with one
+UPDATE ... WHERE is_redeemed IS NOT true RETURNING. Two scanners, or two
+workers, can't both admit a ticket: the first UPDATE to reach the row wins,
+and the other sees the ticket as already redeemed.
+
+Tickets keep selling after the index is loaded, so codes missing from it
+are looked up with one query per batch before they are rejected.
+"""
+import logging
+import threading
+from collections import Counter, OrderedDict
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, update
+
+from app import app, db
+from models import Event, Order, Ticket, TicketType
+from scheduler import local_scheduler, app_job
+
+logger = logging.getLogger(__name__)
+
+JOB_ID = 'warm_checkin_indexes'
+LOAD_BATCH_SIZE = 5000
+
+# Scan outcomes and index lookups, for /metrics
+checkin_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def _count(outcome, amount=1):
+    with _stats_lock:
+        checkin_stats[outcome] += amount
+
+
+class CheckinError(ValueError):
+    """The scanned batch is malformed."""
+
+
+def _event_codes(event_id, codes=None):
+    """Stream (unique_code, ticket id) for an event's paid-for tickets, optionally only `codes`."""
+    stmt = select(Ticket.unique_code, Ticket.id)\
+        .join(TicketType, TicketType.id == Ticket.ticket_type_id)\
+        .join(Order, Order.id == Ticket.order_id)\
+        .where(TicketType.event_id == event_id, Order.status == 'completed')
+    if codes is not None:
+        stmt = stmt.where(Ticket.unique_code.in_(codes))
+    return db.session.execute(stmt.execution_options(yield_per=LOAD_BATCH_SIZE))
+
+
+class CodeIndex:
+    """{event_id: {unique_code: ticket_id}} for the most recently used events."""
+
+    def __init__(self, max_events):
+        self.max_events = max_events
+        self._events = OrderedDict()
+        self._lock = threading.Lock()
+        self._loading = {}  # event_id -> lock held while that event loads
+
+    def __contains__(self, event_id):
+        return event_id in self._events
+
+    def get(self, event_id):
+        """The event's codes, loading them on first use."""
+        codes = self._events.get(event_id)
+        if codes is None:
+            return self.load(event_id)
+        with self._lock:
+            if event_id in self._events:
+                self._events.move_to_end(event_id)
+        return codes
+
+    def load(self, event_id, reload=False):
+        """Load the event's codes; concurrent callers wait for one load instead of each running it."""
+        with self._lock:
+            loading = self._loading.setdefault(event_id, threading.Lock())
+        with loading:
+            codes = self._events.get(event_id)
+            if codes is not None and not reload:
+                return codes  # another thread loaded it while we waited
+            codes = {code: ticket_id for code, ticket_id in _event_codes(event_id)}
+            with self._lock:
+                self._events[event_id] = codes
+                self._events.move_to_end(event_id)
+                while len(self._events) > self.max_events:
+                    self._events.popitem(last=False)
+                self._loading.pop(event_id, None)
+        logger.info("Loaded %s ticket codes for event %s", len(codes), event_id)
+        return codes
+
+    def discard(self, event_id):
+        with self._lock:
+            self._events.pop(event_id, None)
+
+
+code_index = CodeIndex(app.config['CHECKIN_INDEX_EVENTS'])
+
+
+def normalize_codes(codes):
+    if not isinstance(codes, list) or not codes:
+        raise CheckinError('codes must be a non-empty list')
+    if len(codes) > app.config['CHECKIN_MAX_BATCH']:
+        raise CheckinError(f"At most {app.config['CHECKIN_MAX_BATCH']} codes per batch")
+    if not all(isinstance(code, str) for code in codes):
+        raise CheckinError('codes must be strings')
+    return [code.strip() for code in codes]
+
+
+def check_in(event_id, codes):
+    """Redeem scanned codes for an event; one result per code, in scan order.
+
+    Statuses: 'admitted', 'already_redeemed' (with redeemed_at) and
+    'invalid' (unknown, a ticket for another event, or on an order that
+    isn't completed). A code scanned
+    twice in one batch is admitted once. Commits.
+    """
+    index = code_index.get(event_id)
+    unique = list(dict.fromkeys(codes))
+
+    missing = [code for code in unique if code not in index]
+    if missing:
+        _count('index_miss', len(missing))
+        index.update((code, ticket_id) for code, ticket_id in _event_codes(event_id, missing))
+    _count('index_hit', len(unique) - len(missing))
+
+    ticket_ids = {index[code]: code for code in unique if code in index}
+    outcomes = {}
+    now = datetime.utcnow()
+    if ticket_ids:
+        paid = select(Order.id).where(Order.id == Ticket.order_id, Order.status == 'completed').exists()
+        admitted = db.session.execute(
+            update(Ticket)
+            .where(Ticket.id.in_(ticket_ids), Ticket.is_redeemed.is_not(True), paid)
+            .values(is_redeemed=True, redemption_date=now)
+            .returning(Ticket.id, Ticket.ticket_type_id, Ticket.attendee_name)
+            .execution_options(synchronize_session=False)
+        ).all()
+        for row in admitted:
+            outcomes[ticket_ids[row.id]] = {
+                'status': 'admitted', 'ticket_id': row.id, 'ticket_type_id': row.ticket_type_id,
+                'attendee_name': row.attendee_name,
+            }
+
+        # Whatever the UPDATE skipped was redeemed earlier, or its order is
+        # no longer completed (or it is gone) and stays invalid
+        rest = [ticket_id for ticket_id in ticket_ids if ticket_ids[ticket_id] not in outcomes]
+        if rest:
+            for row in db.session.execute(
+                select(Ticket.id, Ticket.ticket_type_id, Ticket.attendee_name, Ticket.redemption_date)
+                .where(Ticket.id.in_(rest), Ticket.is_redeemed.is_(True))
+            ):
+                outcomes[ticket_ids[row.id]] = {
+                    'status': 'already_redeemed', 'ticket_id': row.id, 'ticket_type_id': row.ticket_type_id,
+                    'attendee_name': row.attendee_name,
+                    'redeemed_at': row.redemption_date.isoformat() if row.redemption_date else None,
+                }
+        db.session.commit()
+
+    results, seen = [], set()
+    for code in codes:
+        outcome = outcomes.get(code, {'status': 'invalid'})
+        if code in seen and outcome['status'] == 'admitted':
+            outcome = dict(outcome, status='already_redeemed', redeemed_at=now.isoformat())
+        seen.add(code)
+        _count(outcome['status'])
+        results.append(dict(outcome, code=code))
+    return results
+
+
+def warm_checkin_indexes():
+    """Load the code index for events whose doors open soon, or are open."""
+    now = datetime.utcnow()
+    window = now + timedelta(minutes=app.config['CHECKIN_WARM_MINUTES'])
+    event_ids = db.session.scalars(
+        select(Event.id)
+        .where(Event.start_datetime <= window, Event.end_datetime >= now,
+               Event.status == 'approved', Event.is_active == True)
+        .order_by(Event.start_datetime)
+        .limit(app.config['CHECKIN_INDEX_EVENTS'])
+    ).all()
+    for event_id in event_ids:
+        if event_id not in code_index:
+            code_index.load(event_id)
+    db.session.rollback()  # end the read transaction
+
+
+# The index lives in each web worker, so each warms its own
+local_scheduler.add_job(
+    app_job(app, warm_checkin_indexes),
+    'interval',
+    seconds=app.config['CHECKIN_WARM_SECONDS'],
+    id=JOB_ID,
+    max_instances=1,
+    coalesce=True,
+    replace_existing=True
+)
@@ -4,9 +4,117 @@ class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'super-secret-key'
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///event.db'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Read replicas: comma-separated URLs, used for GET requests (replicas.py).
+    # A replica whose heartbeat is older than REPLICA_MAX_LAG_SECONDS is skipped
+    # (0 = never check lag); writers read from the primary for REPLICA_STICKY_SECONDS.
+    SQLALCHEMY_BINDS = {
+        f'replica_{index}': url.strip()
+        for index, url in enumerate(u for u in os.environ.get('DATABASE_REPLICA_URLS', '').split(',') if u.strip())
+    }
+    REPLICA_MAX_LAG_SECONDS = int(os.environ.get('REPLICA_MAX_LAG_SECONDS', 10))
+    REPLICA_HEARTBEAT_SECONDS = int(os.environ.get('REPLICA_HEARTBEAT_SECONDS', 2))
+    REPLICA_LAG_CHECK_SECONDS = int(os.environ.get('REPLICA_LAG_CHECK_SECONDS', 2))
+    REPLICA_STICKY_SECONDS = int(os.environ.get('REPLICA_STICKY_SECONDS', 15))
+    REPLICA_STICKY_COOKIE = os.environ.get('REPLICA_STICKY_COOKIE', 'read_primary')
+
+    # Engine profile picked from the URL (engine_profiles.py); 0 uses driver defaults
+    DB_ENGINE_PROFILE = os.environ.get('DB_ENGINE_PROFILE', '1') == '1'
+    DB_STATEMENT_CACHE_SIZE = int(os.environ.get('DB_STATEMENT_CACHE_SIZE', 1200))
+    # SQLite PRAGMAs, applied on every new connection
+    SQLITE_JOURNAL_MODE = os.environ.get('SQLITE_JOURNAL_MODE', 'WAL')
+    SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000))
+    SQLITE_SYNCHRONOUS = os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL')
+    SQLITE_MMAP_SIZE = int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))
+    SQLITE_CACHE_SIZE = int(os.environ.get('SQLITE_CACHE_SIZE', -64000))  # ~64MB
+    # Postgres pool, per gunicorn worker. Pool size defaults to WEB_THREADS + 2;
+    # DB_MAX_CONNECTIONS (0 = no cap) is split across WEB_CONCURRENCY workers.
+    WEB_CONCURRENCY = int(os.environ.get('WEB_CONCURRENCY', 1))
+    WEB_THREADS = int(os.environ.get('WEB_THREADS', 1))
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 0))
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 5))
+    DB_MAX_CONNECTIONS = int(os.environ.get('DB_MAX_CONNECTIONS', 0))
+    DB_POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT', 10))
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800))
+    DB_POOL_PRE_PING = os.environ.get('DB_POOL_PRE_PING', '1') == '1'
+    PG_PREPARE_THRESHOLD = int(os.environ.get('PG_PREPARE_THRESHOLD', 5))  # psycopg 3
+    PG_STATEMENT_CACHE_SIZE = int(os.environ.get('PG_STATEMENT_CACHE_SIZE', 100))  # asyncpg
     UPLOAD_FOLDER = os.path.join(os.getcwd(), 'static', 'uploads')
-    QR_FOLDER = os.path.join(os.getcwd(), 'static', 'qr_codes')
+    QR_CACHE_FOLDER = os.path.join(os.getcwd(), 'static', 'qr_cache')
+
+    # JWT signing and the authenticated-principal cache
+    JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY', 'Allan')
+    AUTH_PRINCIPAL_TTL = int(os.environ.get('AUTH_PRINCIPAL_TTL', 30))
+    AUTH_PRINCIPAL_CACHE_ITEMS = int(os.environ.get('AUTH_PRINCIPAL_CACHE_ITEMS', 10000))
+
+    # Password hashing: werkzeug method string (e.g. 'scrypt:32768:8:1',
+    # 'pbkdf2:sha256:600000'). Changing it rehashes each account on next login.
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+    PASSWORD_SALT_LENGTH = int(os.environ.get('PASSWORD_SALT_LENGTH', 16))
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 2))
+    PASSWORD_HASH_QUEUE = int(os.environ.get('PASSWORD_HASH_QUEUE', 16))  # waiting beyond this gets a 429
+    PASSWORD_HASH_TIMEOUT = int(os.environ.get('PASSWORD_HASH_TIMEOUT', 10))
+
+    # Logging: root level, per-logger overrides ('app=DEBUG,sqlalchemy.engine=INFO'),
+    # 'text' or 'json' lines, and keep 1 in N debug records per logger
+    LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
+    LOG_LEVELS = os.environ.get('LOG_LEVELS', 'apscheduler=WARNING')
+    LOG_FORMAT = os.environ.get('LOG_FORMAT', 'text')
+    LOG_DEBUG_SAMPLE_EVERY = int(os.environ.get('LOG_DEBUG_SAMPLE_EVERY', 1))
+
+    # Checkout retries on lock/serialization conflicts
+    INVENTORY_RETRY_ATTEMPTS = int(os.environ.get('INVENTORY_RETRY_ATTEMPTS', 5))
+
+    # Seat holds taken before checkout
+    HOLD_MINUTES = int(os.environ.get('HOLD_MINUTES', 10))
+    HOLD_MAX_MINUTES = int(os.environ.get('HOLD_MAX_MINUTES', 30))
+    HOLD_SWEEP_SECONDS = int(os.environ.get('HOLD_SWEEP_SECONDS', 30))
+    HOLD_SWEEP_BATCH_SIZE = int(os.environ.get('HOLD_SWEEP_BATCH_SIZE', 500))
+
+    # Gate check-in: batches of scanned codes, redeemed against a per-worker
+    # index of each event's codes, loaded CHECKIN_WARM_MINUTES before doors open
+    CHECKIN_MAX_BATCH = int(os.environ.get('CHECKIN_MAX_BATCH', 500))
+    CHECKIN_INDEX_EVENTS = int(os.environ.get('CHECKIN_INDEX_EVENTS', 16))
+    CHECKIN_WARM_MINUTES = int(os.environ.get('CHECKIN_WARM_MINUTES', 120))
+    CHECKIN_WARM_SECONDS = int(os.environ.get('CHECKIN_WARM_SECONDS', 60))
+    # Offline scanner manifests: overlap resent with each delta, covering
+    # checkouts still committing when the previous manifest was built
+    MANIFEST_SETTLE_SECONDS = int(os.environ.get('MANIFEST_SETTLE_SECONDS', 60))
+
+    # Full-text search (SQLite FTS5 / Postgres tsvector)
+    SEARCH_MAX_RESULTS = int(os.environ.get('SEARCH_MAX_RESULTS', 1000))
+
+    # Response cache for public catalog endpoints. 'lru' is per worker process;
+    # 'redis' shares entries and invalidations across gunicorn workers.
+    CACHE_ENABLED = os.environ.get('CACHE_ENABLED', '1') == '1'
+    CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'lru')
+    CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL', 'redis://localhost:6379/0')
+    CACHE_DEFAULT_TTL = int(os.environ.get('CACHE_DEFAULT_TTL', 60))
+    CACHE_MAX_ITEMS = int(os.environ.get('CACHE_MAX_ITEMS', 1024))
+
+    # Per-endpoint metrics on /metrics; statements slower than SLOW_QUERY_MS
+    # are logged with a fingerprint (0 turns the slow-query log off)
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '1') == '1'
+    SLOW_QUERY_MS = int(os.environ.get('SLOW_QUERY_MS', 200))
+
+    # Raise on any relationship a serializer shape didn't declare (dev/CI)
+    SERIALIZER_STRICT = os.environ.get('SERIALIZER_STRICT', '0') == '1'
+
+    # Streaming backup/restore
+    BACKUP_BATCH_SIZE = int(os.environ.get('BACKUP_BATCH_SIZE', 1000))
+    RESTORE_BATCH_SIZE = int(os.environ.get('RESTORE_BATCH_SIZE', 1000))
+
+    # Background jobs (QR rendering etc.)
+    SCHEDULER_ENABLED = os.environ.get('SCHEDULER_ENABLED', '1') == '1'
+    QR_WORKERS = int(os.environ.get('QR_WORKERS', 2))
+    QR_BATCH_SIZE = int(os.environ.get('QR_BATCH_SIZE', 50))
+    QR_POLL_SECONDS = int(os.environ.get('QR_POLL_SECONDS', 5))
+    QR_CLAIM_TIMEOUT_SECONDS = int(os.environ.get('QR_CLAIM_TIMEOUT_SECONDS', 300))  # reclaim after a crash
+    QR_CACHE_ITEMS = int(os.environ.get('QR_CACHE_ITEMS', 1024))  # in-memory LRU size
+    QR_CACHE_MAX_FILES = int(os.environ.get('QR_CACHE_MAX_FILES', 50000))  # disk spill bound
+    QR_CACHE_PRUNE_SECONDS = int(os.environ.get('QR_CACHE_PRUNE_SECONDS', 60))
+    QR_CACHE_RECOUNT_SECONDS = int(os.environ.get('QR_CACHE_RECOUNT_SECONDS', 3600))  # rescan for other processes' files
 
     # Create folders if they don't exist
     os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-    os.makedirs(QR_FOLDER, exist_ok=True)
+    os.makedirs(QR_CACHE_FOLDER, exist_ok=True)
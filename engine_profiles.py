@@ -0,0 +1,99 @@
+"""Engine settings per database backend, picked from the database URL.
+
+SQLite gets WAL and friends as PRAGMAs on every new connection, so readers
+no longer block behind a writer. Postgres gets a connection pool sized for
+the gunicorn worker it runs in. Call configure_engine(app.config) before
+SQLAlchemy(app) so the options are in place when the engine is created.
+"""
+import logging
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+
+logger = logging.getLogger(__name__)
+
+_sqlite_pragmas = {}
+
+
+def sqlite_pragmas(config):
+    return {
+        'journal_mode': config['SQLITE_JOURNAL_MODE'],
+        'busy_timeout': config['SQLITE_BUSY_TIMEOUT_MS'],
+        'synchronous': config['SQLITE_SYNCHRONOUS'],
+        'mmap_size': config['SQLITE_MMAP_SIZE'],
+        'cache_size': config['SQLITE_CACHE_SIZE'],  # negative: KiB, positive: pages
+    }
+
+
+def postgres_options(config, driver):
+    """Pool settings for one worker process.
+
+    Each gunicorn worker has its own pool, so the size follows the threads
+    in a worker, not the worker count; DB_MAX_CONNECTIONS (the share of
+    max_connections this app may use) caps pool + overflow across workers.
+    """
+    pool_size = config['DB_POOL_SIZE'] or config['WEB_THREADS'] + 2  # + scheduler/QR jobs
+    max_overflow = config['DB_MAX_OVERFLOW']
+    if config['DB_MAX_CONNECTIONS']:
+        per_worker = max(1, config['DB_MAX_CONNECTIONS'] // max(1, config['WEB_CONCURRENCY']))
+        if pool_size + max_overflow > per_worker:
+            logger.warning("Pool of %s+%s exceeds the %s connections per worker allowed by "
+                           "DB_MAX_CONNECTIONS; shrinking it", pool_size, max_overflow, per_worker)
+            pool_size = min(pool_size, per_worker)
+            max_overflow = per_worker - pool_size
+
+    options = {
+        'pool_size': pool_size,
+        'max_overflow': max_overflow,
+        'pool_timeout': config['DB_POOL_TIMEOUT'],
+        'pool_recycle': config['DB_POOL_RECYCLE'],
+        'pool_pre_ping': config['DB_POOL_PRE_PING'],
+    }
+    # Server-side prepared statements: psycopg 3 prepares after N executions,
+    # asyncpg keeps a per-connection cache. psycopg2 has neither.
+    if driver == 'psycopg':
+        options['connect_args'] = {'prepare_threshold': config['PG_PREPARE_THRESHOLD']}
+    elif driver == 'asyncpg':
+        options['connect_args'] = {'prepared_statement_cache_size': config['PG_STATEMENT_CACHE_SIZE']}
+    return options
+
+
+def engine_options(config):
+    """SQLALCHEMY_ENGINE_OPTIONS for the configured URL (before any explicit overrides)."""
+    url = make_url(config['SQLALCHEMY_DATABASE_URI'])
+    # SQLAlchemy's own compiled-statement cache, for every backend
+    options = {'query_cache_size': config['DB_STATEMENT_CACHE_SIZE']}
+    if url.get_backend_name() == 'postgresql':
+        options.update(postgres_options(config, url.get_driver_name()))
+    return options
+
+
+def configure_engine(config):
+    """Merge the backend profile into config['SQLALCHEMY_ENGINE_OPTIONS'] and
+    register the SQLite PRAGMAs. Does nothing if DB_ENGINE_PROFILE is off."""
+    if not config['DB_ENGINE_PROFILE']:
+        return
+    url = make_url(config['SQLALCHEMY_DATABASE_URI'])
+    options = engine_options(config)
+    options.update(config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+
+    if url.get_backend_name() == 'sqlite':
+        _sqlite_pragmas.update(sqlite_pragmas(config))
+        logger.info("Engine profile: sqlite %s", _sqlite_pragmas)
+    else:
+        logger.info("Engine profile: %s %s", url.get_backend_name(),
+                    {key: value for key, value in options.items() if key != 'connect_args'})
+
+
+@event.listens_for(Engine, 'connect')
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    if not _sqlite_pragmas or type(dbapi_connection).__module__ != 'sqlite3':
+        return
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in _sqlite_pragmas.items():
+            # In-memory databases silently stay in 'memory' journal mode
+            cursor.execute(f'PRAGMA {name}={value}')
+    finally:
+        cursor.close()
@@ -0,0 +1,128 @@
+from collections import Counter
+
+from sqlalchemy import case, delete, event, func, inspect, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app import app, db
+from models import CategoryFacet, Event
+
+UPSERT_DIALECTS = {'sqlite': sqlite.insert, 'postgresql': postgresql.insert}
+COUNTS = ('events_count', 'active_count', 'listed_count')
+FACET_FIELDS = ('category', 'is_active', 'status')
+
+
+def _buckets(category, is_active, status):
+    """The counters one event contributes to, as {column: 1}."""
+    counts = {'events_count': 1}
+    # is_active defaults to True on insert, so treat an unset value the same way
+    if is_active is None or is_active:
+        counts['active_count'] = 1
+        if status == 'approved':
+            counts['listed_count'] = 1
+    return category or '', counts
+
+
+def _current(obj):
+    return [getattr(obj, field) for field in FACET_FIELDS]
+
+
+def _committed(session, obj):
+    """(category, is_active, status) as stored in the database before this flush."""
+    state = inspect(obj)
+    histories = [state.attrs[field].history for field in FACET_FIELDS]
+    if any(history.has_changes() and not history.deleted for history in histories):
+        # Set without the old value ever being loaded: read it back
+        row = session.connection().execute(
+            select(Event.category, Event.is_active, Event.status).where(Event.id == obj.id)
+        ).one()
+        return list(row)
+    return [
+        history.deleted[0] if history.has_changes() else getattr(obj, field)
+        for field, history in zip(FACET_FIELDS, histories)
+    ]
+
+
+def _apply(connection, deltas):
+    table = CategoryFacet.__table__
+    dialect = connection.dialect.name
+    for category, counts in deltas.items():
+        counts = {col: counts.get(col, 0) for col in COUNTS}
+        if not any(counts.values()):
+            continue
+        if dialect in UPSERT_DIALECTS:
+            stmt = UPSERT_DIALECTS[dialect](table).values(category=category, **counts)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['category'],
+                set_={col: table.c[col] + stmt.excluded[col] for col in COUNTS}
+            )
+            connection.execute(stmt)
+            continue
+        result = connection.execute(
+            update(table).where(table.c.category == category)
+            .values(**{col: table.c[col] + counts[col] for col in COUNTS})
+        )
+        if not result.rowcount:
+            connection.execute(insert(table).values(category=category, **counts))
+
+
+@event.listens_for(db.session, 'before_flush')
+def _sync_category_facets(session, flush_context, instances):
+    """Move event counts between categories in the same transaction as the event write.
+
+    Runs before the flush so the previous values can still be read back
+    from the database when they weren't loaded.
+    """
+    deltas = {}
+
+    def bump(values, sign):
+        category, counts = _buckets(*values)
+        bucket = deltas.setdefault(category, Counter())
+        for col, n in counts.items():
+            bucket[col] += sign * n
+
+    for obj in session.new:
+        if isinstance(obj, Event):
+            bump(_current(obj), 1)
+    for obj in session.deleted:
+        if isinstance(obj, Event):
+            bump(_committed(session, obj), -1)
+    for obj in session.dirty:
+        if isinstance(obj, Event) and obj not in session.deleted:
+            state = inspect(obj)
+            if any(state.attrs[field].history.has_changes() for field in FACET_FIELDS):
+                bump(_committed(session, obj), -1)
+                bump(_current(obj), 1)
+
+    if deltas:
+        _apply(session.connection(), deltas)
+
+
+def category_counts(column):
+    """[(category or None, count)] from the facet store for one counter, skipping empty ones."""
+    rows = db.session.query(CategoryFacet.category, getattr(CategoryFacet, column))\
+        .filter(getattr(CategoryFacet, column) > 0)\
+        .order_by(CategoryFacet.category).all()
+    return [(category or None, count) for category, count in rows]
+
+
+def rebuild_category_facets():
+    """Recompute the facet table from events (after bulk loads or to repair drift)."""
+    db.session.execute(delete(CategoryFacet))
+    active = func.coalesce(Event.is_active, True)
+    db.session.execute(insert(CategoryFacet).from_select(
+        ['category', *COUNTS],
+        select(
+            func.coalesce(Event.category, ''),
+            func.count(Event.id),
+            func.sum(case((active, 1), else_=0)),
+            func.sum(case((active & (Event.status == 'approved'), 1), else_=0))
+        ).group_by(func.coalesce(Event.category, ''))
+    ))
+    db.session.commit()
+
+
+@app.cli.command('rebuild-category-facets')
+def rebuild_category_facets_command():
+    """Rebuild category_facets from the events table."""
+    rebuild_category_facets()
+    print("Category facets rebuilt")
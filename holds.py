@@ -0,0 +1,116 @@
+import logging
+from collections import Counter
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+from sqlalchemy import delete, select, update
+
+from app import app, db
+from models import Hold
+from inventory import InventoryError, reserve_inventory, release_inventory, normalize_quantities, retry_on_conflict
+from scheduler import scheduler, app_job
+
+logger = logging.getLogger(__name__)
+
+JOB_ID = 'sweep_expired_holds'
+
+
+class HoldUnavailable(InventoryError):
+    """The hold is unknown, already used or past its expiry."""
+
+
+def create_hold(user_id, event_id, quantities, minutes=None):
+    """Reserve stock for a short window. Caller commits (via retry_on_conflict)."""
+    minutes = max(1, min(minutes or app.config['HOLD_MINUTES'], app.config['HOLD_MAX_MINUTES']))
+    reserve_inventory(quantities)
+    hold = Hold(
+        token=uuid4().hex,
+        user_id=user_id,
+        event_id=event_id,
+        quantities={str(k): v for k, v in quantities.items()},
+        status='active',
+        expires_at=datetime.utcnow() + timedelta(minutes=minutes)
+    )
+    db.session.add(hold)
+    return hold
+
+
+def _finish_hold(token, status, user_id=None):
+    """Move an active, unexpired hold to a final status in one conditional UPDATE.
+
+    Returns its quantities, or raises HoldUnavailable if another request
+    (or the sweeper) got there first.
+    """
+    conditions = [
+        Hold.token == token,
+        Hold.status == 'active',
+        Hold.expires_at > datetime.utcnow()
+    ]
+    if user_id is not None:
+        conditions.append(Hold.user_id == user_id)
+    row = db.session.execute(
+        update(Hold).where(*conditions).values(status=status)
+        .returning(Hold.event_id, Hold.quantities)
+        .execution_options(synchronize_session=False)
+    ).first()
+    if not row:
+        raise HoldUnavailable('Hold not found, already used or expired')
+    return row.event_id, normalize_quantities(row.quantities)
+
+
+def convert_hold(token, user_id):
+    """Claim a hold for checkout; its stock is already reserved."""
+    return _finish_hold(token, 'converted', user_id=user_id)
+
+
+def release_hold(token, user_id):
+    """Cancel the user's hold early and give its stock back."""
+    _event_id, quantities = _finish_hold(token, 'released', user_id=user_id)
+    release_inventory(quantities)
+
+
+def delete_event_holds(event_id):
+    """Drop an event's holds before the event itself is deleted. Caller commits."""
+    db.session.execute(delete(Hold).where(Hold.event_id == event_id).execution_options(synchronize_session=False))
+
+
+def sweep_expired_holds(batch_size=None):
+    """Expire a batch of lapsed holds and return their stock in two set-based statements.
+
+    Returns the number of holds expired.
+    """
+    batch_size = batch_size or app.config['HOLD_SWEEP_BATCH_SIZE']
+    now = datetime.utcnow()
+    lapsed = select(Hold.id).where(Hold.status == 'active', Hold.expires_at <= now)\
+        .order_by(Hold.expires_at).limit(batch_size)
+    rows = db.session.execute(
+        update(Hold).where(Hold.id.in_(lapsed), Hold.status == 'active').values(status='expired')
+        .returning(Hold.quantities)
+        .execution_options(synchronize_session=False)
+    ).all()
+
+    released = Counter()
+    for row in rows:
+        released.update(normalize_quantities(row.quantities))
+    release_inventory(dict(released))
+    db.session.commit()
+
+    if rows:
+        logger.info("Expired %s holds", len(rows))
+    return len(rows)
+
+
+def drain_expired_holds():
+    while retry_on_conflict(sweep_expired_holds):
+        pass
+
+
+scheduler.add_job(
+    app_job(app, drain_expired_holds),
+    'interval',
+    seconds=app.config['HOLD_SWEEP_SECONDS'],
+    id=JOB_ID,
+    max_instances=1,
+    coalesce=True,
+    replace_existing=True
+)
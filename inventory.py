@@ -0,0 +1,136 @@
+import logging
+import random
+import time
+
+from sqlalchemy import case, update
+from sqlalchemy.exc import DBAPIError, OperationalError
+
+from app import app, db
+from models import TicketType
+
+logger = logging.getLogger(__name__)
+
+# Postgres serialization_failure / deadlock_detected
+RETRYABLE_PGCODES = {'40001', '40P01'}
+MAX_INTEGER = 2 ** 31 - 1  # ticket type ids and quantities are 32-bit INTEGER columns
+
+
+class InventoryError(Exception):
+    pass
+
+
+class InsufficientInventory(InventoryError):
+    def __init__(self, ticket_type_id):
+        super().__init__(f'Invalid or unavailable ticket type ID: {ticket_type_id}')
+        self.ticket_type_id = ticket_type_id
+
+
+class InvalidQuantities(InventoryError):
+    """The quantities payload isn't a {ticket_type_id: quantity} mapping of whole numbers."""
+
+
+def _whole_number(value):
+    """int(value), but ValueError for floats with a fractional part (int() would
+    truncate) and for numbers no INTEGER column can hold."""
+    if isinstance(value, float) and not value.is_integer():
+        raise ValueError(value)
+    number = int(value)
+    if abs(number) > MAX_INTEGER:
+        raise ValueError(value)
+    return number
+
+
+def normalize_quantities(quantities):
+    """Turn a {ticket_type_id: qty} payload into {int: int}, dropping non-positive rows."""
+    if not isinstance(quantities, dict):
+        raise InvalidQuantities('quantities must map ticket type IDs to quantities')
+    normalized = {}
+    for ticket_type_id, qty in quantities.items():
+        try:
+            ticket_type_id = _whole_number(ticket_type_id)
+        except (TypeError, ValueError):
+            raise InvalidQuantities(f'Invalid ticket type ID: {ticket_type_id!r}')
+        try:
+            qty = _whole_number(qty)
+        except (TypeError, ValueError):
+            raise InvalidQuantities(f'Invalid quantity for ticket type {ticket_type_id}: {qty!r}')
+        if qty > 0:
+            normalized[ticket_type_id] = normalized.get(ticket_type_id, 0) + qty
+    return normalized
+
+
+def load_ticket_types(ticket_type_ids):
+    """Fetch all requested ticket types in one query, keyed by id."""
+    rows = TicketType.query.filter(TicketType.id.in_(list(ticket_type_ids))).all()
+    return {tt.id: tt for tt in rows}
+
+
+def reserve_inventory(quantities):
+    """Decrement stock for every requested type with a single conditional UPDATE.
+
+    Each row only changes if it still has enough stock, so concurrent buyers
+    can never drive quantity_available below zero. If any row is short the
+    whole reservation fails and the caller must roll back.
+    """
+    if not quantities:
+        return
+    needed = case(quantities, value=TicketType.id)
+    stmt = (
+        update(TicketType)
+        .where(TicketType.id.in_(list(quantities)), TicketType.quantity_available >= needed)
+        .values(quantity_available=TicketType.quantity_available - needed)
+        .execution_options(synchronize_session=False)
+    )
+    result = db.session.execute(stmt)
+    if result.rowcount != len(quantities):
+        raise InsufficientInventory(_first_short_type(quantities))
+
+
+def release_inventory(quantities):
+    """Put previously reserved stock back in a single UPDATE."""
+    if not quantities:
+        return
+    returned = case(quantities, value=TicketType.id)
+    db.session.execute(
+        update(TicketType)
+        .where(TicketType.id.in_(list(quantities)))
+        .values(quantity_available=TicketType.quantity_available + returned)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def _first_short_type(quantities):
+    # Only runs on the failure path, inside the transaction that will be rolled back
+    rows = db.session.query(TicketType.id, TicketType.quantity_available)\
+        .filter(TicketType.id.in_(list(quantities))).all()
+    available = dict(rows)
+    for ticket_type_id, qty in quantities.items():
+        if available.get(ticket_type_id, 0) < qty:
+            return ticket_type_id
+    return next(iter(quantities))
+
+
+def is_conflict(error):
+    """True for lock/serialization errors that are safe to retry."""
+    if isinstance(error, OperationalError) and 'locked' in str(error.orig).lower():
+        return True
+    if isinstance(error, DBAPIError):
+        return getattr(error.orig, 'pgcode', None) in RETRYABLE_PGCODES
+    return False
+
+
+def retry_on_conflict(func, attempts=None):
+    """Run func as one transaction, rolling back and retrying on lock conflicts."""
+    attempts = attempts or app.config['INVENTORY_RETRY_ATTEMPTS']
+    for attempt in range(1, attempts + 1):
+        try:
+            return func()
+        except DBAPIError as e:
+            db.session.rollback()
+            if attempt == attempts or not is_conflict(e):
+                raise
+            logger.info("Inventory conflict, retrying (attempt %s/%s)", attempt, attempts)
+            time.sleep(random.uniform(0, 0.01 * 2 ** attempt))
+        except Exception:
+            db.session.rollback()
+            raise
@@ -0,0 +1,124 @@
+"""Non-blocking, structured logging for the app and its background jobs.
+
+Records are put on an in-memory queue by the thread that logs them and
+written to stderr by a single listener thread, so a slow terminal or log
+shipper never stalls a request. Configured from the Config LOG_* settings.
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import threading
+from datetime import datetime, timezone
+
+from flask import has_request_context, request
+
+_listener = None
+
+# Attributes every LogRecord has; anything else was passed via extra= and is kept
+_RECORD_FIELDS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+class RequestContextFilter(logging.Filter):
+    """Tag records with the endpoint and method of the request that logged them.
+
+    Runs on the logging thread, before the record crosses to the listener,
+    which has no request context of its own.
+    """
+
+    def filter(self, record):
+        if has_request_context():
+            record.endpoint = request.endpoint
+            record.method = request.method
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keep one in every `every` records at or below `level`, per logger.
+
+    For high-volume debug messages: the first record is always kept so a
+    newly enabled logger shows up immediately.
+    """
+
+    def __init__(self, every, level=logging.DEBUG):
+        super().__init__()
+        self.every = max(1, every)
+        self.level = level
+        self._seen = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if self.every == 1 or record.levelno > self.level:
+            return True
+        with self._lock:
+            count = self._seen.get(record.name, 0)
+            self._seen[record.name] = count + 1
+        if count % self.every:
+            return False
+        record.sampled = self.every
+        return True
+
+
+class JSONFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_FIELDS and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__('%(asctime)s %(levelname)s %(name)s: %(message)s')
+
+    def format(self, record):
+        line = super().format(record)
+        extras = {key: value for key, value in vars(record).items()
+                  if key not in _RECORD_FIELDS and not key.startswith('_')}
+        if extras:
+            line += ' ' + ' '.join(f'{key}={value}' for key, value in sorted(extras.items()))
+        return line
+
+
+def parse_levels(spec):
+    """'app=INFO,sqlalchemy.engine=WARNING' -> {'app': 'INFO', ...}"""
+    levels = {}
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        name, _, level = item.partition('=')
+        levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def configure_logging(config):
+    """Route all logging through a queue. Safe to call more than once."""
+    global _listener
+    if _listener is not None:
+        return
+
+    stream = logging.StreamHandler()
+    stream.setFormatter(JSONFormatter() if config['LOG_FORMAT'] == 'json' else TextFormatter())
+
+    log_queue = queue.Queue(-1)
+    handler = logging.handlers.QueueHandler(log_queue)
+    handler.addFilter(RequestContextFilter())
+    if config['LOG_DEBUG_SAMPLE_EVERY'] > 1:
+        handler.addFilter(SamplingFilter(config['LOG_DEBUG_SAMPLE_EVERY']))
+
+    root = logging.getLogger()
+    root.handlers[:] = [handler]
+    root.setLevel(config['LOG_LEVEL'].upper())
+    for name, level in parse_levels(config['LOG_LEVELS']).items():
+        logging.getLogger(name).setLevel(level)
+
+    _listener = logging.handlers.QueueListener(log_queue, stream, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
@@ -0,0 +1,190 @@
+"""Offline scanner manifests: an event's valid ticket codes as sorted hashes.
+
+A manifest is a 40-byte header followed by two sorted arrays of 8-byte
+big-endian hashes (code_hash below): tickets that are valid, and tickets
+redeemed since the previous manifest. Scanners binary-search the valid
+array and need no connection at the gate.
+
+    magic 'TKMF' | format u8 | flags u8 (1 = delta) | pad 2
+    event_id u64 | version u64 | since u64 | valid count u32 | redeemed count u32
+
+The version is when the manifest was generated (ms since the epoch). Given
+?since=<version>, only tickets created or redeemed after that are sent,
+plus MANIFEST_SETTLE_SECONDS of overlap so a checkout still committing at
+generation time isn't missed. Entries are idempotent, so a scanner applies
+a delta as valid = (valid | added) - redeemed (apply_delta) and keeps the
+new version. Only tickets on completed orders are valid. Deltas can't
+express tickets that stop being valid: when any of the event's tickets,
+ticket types or orders were deleted after `since`, an order moved into or
+out of 'completed', or a restore inserted rows, a full manifest (flags 0)
+is sent instead, and the scanner replaces its set. Admissions made
+offline go back through POST /events/<id>/checkin in batches.
+"""
+import struct
+import sys
+import time
+from array import array
+from bisect import bisect_left
+from collections import namedtuple
+from datetime import datetime, timedelta
+from hashlib import blake2b
+
+from sqlalchemy import event, inspect, or_, select, update
+
+from app import app, db
+from models import Event, Order, Ticket, TicketType
+
+MAGIC = b'TKMF'
+FORMAT = 1
+FLAG_DELTA = 1
+HEADER = struct.Struct('>4sBBxxQQQII')
+MAX_VERSION = 2 ** 64 - 1
+ROW_BATCH_SIZE = 5000
+CHUNK_ENTRIES = 8192  # hashes per streamed chunk (64 KiB)
+
+Manifest = namedtuple('Manifest', 'event_id version since delta valid redeemed')
+
+
+def code_hash(code):
+    """64-bit hash of a ticket code, as stored in manifests."""
+    return int.from_bytes(blake2b(code.encode(), digest_size=8).digest(), 'big')
+
+
+def _sorted(hashes):
+    return array('Q', sorted(set(hashes)))
+
+
+def build_manifest(event_id, since=None):
+    """Hash the event's tickets straight off the cursor into a Manifest.
+
+    since is a previous manifest's version; without it every valid ticket
+    is included and nothing is listed as redeemed.
+    """
+    version = int(time.time() * 1000)
+    if since is not None:
+        since_at = datetime.utcfromtimestamp(since / 1000)
+        reset_at = db.session.scalar(select(Event.manifest_reset_at).where(Event.id == event_id))
+        if reset_at is not None and reset_at >= since_at - timedelta(seconds=app.config['MANIFEST_SETTLE_SECONDS']):
+            since = None  # tickets were deleted since; start the scanner over
+
+    stmt = select(Ticket.unique_code, Ticket.is_redeemed, Ticket.redemption_date)\
+        .join(TicketType, TicketType.id == Ticket.ticket_type_id)\
+        .join(Order, Order.id == Ticket.order_id)\
+        .where(TicketType.event_id == event_id, Order.status == 'completed')
+    if since is None:
+        stmt = stmt.where(Ticket.is_redeemed.is_not(True))
+    else:
+        cutoff = since_at - timedelta(seconds=app.config['MANIFEST_SETTLE_SECONDS'])
+        stmt = stmt.where(or_(Ticket.created_at >= cutoff, Ticket.redemption_date >= cutoff))
+
+    valid, redeemed = array('Q'), array('Q')
+    for code, is_redeemed, redemption_date in db.session.execute(
+        stmt.execution_options(yield_per=ROW_BATCH_SIZE)
+    ):
+        (redeemed if is_redeemed else valid).append(code_hash(code))
+    return Manifest(event_id, version, since or 0, since is not None, _sorted(valid), _sorted(redeemed))
+
+
+def parse_version(value):
+    """A ?since= value as a version, or ValueError unless it could have been issued."""
+    version = int(value)
+    if not 0 <= version <= min(MAX_VERSION, int(time.time() * 1000)):
+        raise ValueError('since must be a manifest version')
+    return version
+
+
+def reset_manifests(connection, event_ids=None):
+    """Make the next delta for these events (default: all) a full manifest."""
+    table = Event.__table__
+    stmt = update(table).values(manifest_reset_at=datetime.utcnow(), updated_at=table.c.updated_at)
+    if event_ids is not None:
+        stmt = stmt.where(table.c.id.in_(event_ids))
+    connection.execute(stmt)
+
+
+def _completion_changed(order):
+    """Whether a pending flush moves the order into or out of 'completed'."""
+    history = inspect(order).attrs.status.history
+    if not history.has_changes():
+        return False
+    old = history.deleted[0] if history.deleted else None
+    new = history.added[0] if history.added else None
+    return old != new and 'completed' in (old, new)
+
+
+@event.listens_for(db.session, 'before_flush')
+def _track_deleted_tickets(session, flush_context, instances):
+    """Stamp events whose valid tickets may shrink (deleted tickets, ticket
+    types or orders, orders leaving or re-entering 'completed') so their
+    next delta is a full manifest."""
+    event_ids, ticket_type_ids, deleted_events = set(), set(), set()
+    for obj in session.deleted:
+        if isinstance(obj, (TicketType, Order)):
+            event_ids.add(obj.event_id)
+        elif isinstance(obj, Ticket):
+            ticket_type_ids.add(obj.ticket_type_id)
+        elif isinstance(obj, Event):
+            deleted_events.add(obj.id)
+    for obj in session.dirty:
+        if isinstance(obj, Order) and _completion_changed(obj):
+            event_ids.add(obj.event_id)
+    if not (event_ids or ticket_type_ids):
+        return
+
+    connection = session.connection()
+    if ticket_type_ids:
+        event_ids.update(connection.execute(
+            select(TicketType.event_id).where(TicketType.id.in_(ticket_type_ids))
+        ).scalars())
+    event_ids -= deleted_events
+    event_ids.discard(None)
+    if event_ids:
+        reset_manifests(connection, event_ids)
+
+
+def _big_endian(hashes):
+    if sys.byteorder == 'little':
+        hashes = array('Q', hashes)
+        hashes.byteswap()
+    return hashes
+
+
+def manifest_chunks(manifest):
+    """The manifest as bytes, header first, in chunks of CHUNK_ENTRIES hashes."""
+    yield HEADER.pack(MAGIC, FORMAT, FLAG_DELTA if manifest.delta else 0, manifest.event_id,
+                      manifest.version, manifest.since, len(manifest.valid), len(manifest.redeemed))
+    for hashes in (manifest.valid, manifest.redeemed):
+        for start in range(0, len(hashes), CHUNK_ENTRIES):
+            yield _big_endian(hashes[start:start + CHUNK_ENTRIES]).tobytes()
+
+
+def read_manifest(data):
+    """Parse manifest bytes back into a Manifest (what a scanner does)."""
+    magic, fmt, flags, event_id, version, since, valid_count, redeemed_count = HEADER.unpack_from(data)
+    if magic != MAGIC or fmt != FORMAT:
+        raise ValueError('Not a ticket manifest, or an unsupported format')
+    hashes = array('Q')
+    hashes.frombytes(data[HEADER.size:HEADER.size + 8 * (valid_count + redeemed_count)])
+    if len(hashes) != valid_count + redeemed_count:
+        raise ValueError('Truncated manifest')
+    hashes = _big_endian(hashes)
+    return Manifest(event_id, version, since, bool(flags & FLAG_DELTA),
+                    hashes[:valid_count], hashes[valid_count:])
+
+
+def apply_delta(valid, delta):
+    """valid hashes after a delta manifest: (valid | added) - redeemed, still sorted.
+
+    A full manifest (the server's answer when tickets were deleted) replaces them.
+    """
+    if not delta.delta:
+        return delta.valid
+    redeemed = set(delta.redeemed)
+    return array('Q', sorted(h for h in set(valid).union(delta.valid) if h not in redeemed))
+
+
+def contains(valid, code):
+    """Binary search a manifest's valid hashes for a scanned code."""
+    h = code_hash(code)
+    index = bisect_left(valid, h)
+    return index < len(valid) and valid[index] == h
@@ -0,0 +1,240 @@
+import hashlib
+import logging
+import math
+import re
+import threading
+import time
+from collections import Counter
+
+from flask import g, has_request_context, request, request_started, request_finished
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app import app
+
+logger = logging.getLogger(__name__)
+slow_query_logger = logging.getLogger('metrics.slow_query')
+
+QUANTILES = (0.5, 0.9, 0.99)
+
+
+class Histogram:
+    """Log-bucketed histogram in the spirit of HdrHistogram.
+
+    Values land in buckets that grow by a constant factor, so any quantile
+    is accurate to within that relative error (2% by default) while memory
+    stays bounded by the dynamic range, not the sample count. Small counts
+    (below linear_until) are kept exact.
+    """
+
+    def __init__(self, growth=1.02, linear_until=0):
+        self._log_growth = math.log(growth)
+        self.growth = growth
+        self.linear_until = linear_until
+        self.buckets = Counter()
+        self.count = 0
+        self.total = 0.0
+        self._lock = threading.Lock()
+
+    def _bucket(self, value):
+        """Upper bound of the bucket holding value."""
+        if value <= 0:
+            return 0
+        if value < self.linear_until:
+            return math.ceil(value)
+        return self.growth ** math.ceil(math.log(value) / self._log_growth)
+
+    def record(self, value):
+        bucket = self._bucket(value)
+        with self._lock:
+            self.buckets[bucket] += 1
+            self.count += 1
+            self.total += value
+
+    def quantile(self, q):
+        with self._lock:
+            if not self.count:
+                return 0.0
+            rank = q * self.count
+            seen = 0
+            for bucket in sorted(self.buckets):
+                seen += self.buckets[bucket]
+                if seen >= rank:
+                    return bucket
+            return max(self.buckets)
+
+
+class MetricsRegistry:
+    """Per-endpoint histograms and counters for this worker process."""
+
+    SUMMARIES = {
+        'request_duration_seconds': 'Request handling time by endpoint',
+        'db_queries': 'Database statements per request by endpoint',
+        'db_time_seconds': 'Time spent in the database per request by endpoint',
+        'serialization_seconds': 'JSON encoding time per request by endpoint',
+        'response_bytes': 'Response body size by endpoint',
+    }
+
+    def __init__(self):
+        self.histograms = {}
+        self.requests = Counter()
+        self.slow_queries = 0
+        self._lock = threading.Lock()
+
+    def observe(self, name, endpoint, value):
+        key = (name, endpoint)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                linear_until = 0 if name.endswith('seconds') else 128
+                histogram = self.histograms.setdefault(key, Histogram(linear_until=linear_until))
+        histogram.record(value)
+
+    def count_request(self, endpoint, status):
+        with self._lock:
+            self.requests[(endpoint, status)] += 1
+
+    def count_slow_query(self):
+        with self._lock:
+            self.slow_queries += 1
+
+    def render(self, prefix='tikiti'):
+        """Prometheus text exposition format (0.0.4)."""
+        lines = []
+        by_name = {}
+        for (name, endpoint), histogram in sorted(self.histograms.items()):
+            by_name.setdefault(name, []).append((endpoint, histogram))
+        for name, help_text in self.SUMMARIES.items():
+            if name not in by_name:
+                continue
+            metric = f'{prefix}_{name}'
+            lines.append(f'# HELP {metric} {help_text}')
+            lines.append(f'# TYPE {metric} summary')
+            for endpoint, histogram in by_name[name]:
+                label = f'endpoint="{_escape(endpoint)}"'
+                for q in QUANTILES:
+                    lines.append(f'{metric}{{{label},quantile="{q}"}} {histogram.quantile(q):.6g}')
+                lines.append(f'{metric}_sum{{{label}}} {histogram.total:.6g}')
+                lines.append(f'{metric}_count{{{label}}} {histogram.count}')
+
+        lines.append(f'# HELP {prefix}_requests_total Requests by endpoint and status')
+        lines.append(f'# TYPE {prefix}_requests_total counter')
+        for (endpoint, status), count in sorted(self.requests.items()):
+            lines.append(f'{prefix}_requests_total{{endpoint="{_escape(endpoint)}",status="{status}"}} {count}')
+
+        lines.append(f'# HELP {prefix}_slow_queries_total Statements slower than SLOW_QUERY_MS')
+        lines.append(f'# TYPE {prefix}_slow_queries_total counter')
+        lines.append(f'{prefix}_slow_queries_total {self.slow_queries}')
+        return '\n'.join(lines) + '\n'
+
+
+def render_counter(name, help_text, counter, label, prefix='tikiti'):
+    """A labelled Prometheus counter from a Counter of {label value: count}."""
+    metric = f'{prefix}_{name}'
+    lines = [f'# HELP {metric} {help_text}', f'# TYPE {metric} counter']
+    for value, count in sorted(counter.items()):
+        lines.append(f'{metric}{{{label}="{_escape(value)}"}} {count:.6g}')
+    return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+registry = MetricsRegistry()
+
+# String/number literals and driver placeholders (?, %(name)s, $1)
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b|%\(\w+\)s|\$\d+")
+_IN_LISTS = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+_SPACE = re.compile(r'\s+')
+
+
+def fingerprint(statement):
+    """Normalize a statement so the same query with different values groups together.
+
+    Returns (fingerprint, normalized statement). Literals become '?' and
+    IN lists of any length collapse to '(...)'.
+    """
+    normalized = _LITERALS.sub('?', statement)
+    normalized = _IN_LISTS.sub('(...)', normalized)
+    normalized = _SPACE.sub(' ', normalized).strip()
+    return hashlib.sha1(normalized.encode('utf-8')).hexdigest()[:12], normalized
+
+
+def _endpoint():
+    return request.endpoint or 'unmatched'
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info['query_started'].pop()
+    elapsed = time.perf_counter() - started
+    in_request = has_request_context() and 'metrics' in g
+    if in_request:
+        g.metrics['queries'] += 1
+        g.metrics['db_time'] += elapsed
+
+    threshold = app.config['SLOW_QUERY_MS']
+    if threshold and elapsed * 1000 >= threshold:
+        registry.count_slow_query()
+        digest, normalized = fingerprint(statement)
+        # Parameters are deliberately left out: they can carry personal data.
+        # RequestContextFilter adds the endpoint and method.
+        slow_query_logger.warning(
+            "slow query %.1fms fingerprint=%s statement=%s", elapsed * 1000, digest, normalized
+        )
+
+
+def _handle_error(exception_context):
+    # after_cursor_execute doesn't run for a failed statement; drop its start time
+    connection = exception_context.connection
+    if connection is not None and exception_context.execution_context is not None:
+        started = connection.info.get('query_started')
+        if started:
+            started.pop()
+
+
+def _request_started(sender, **extra):
+    g.metrics = {'started': time.perf_counter(), 'queries': 0, 'db_time': 0.0, 'serialization': 0.0}
+
+
+def _request_finished(sender, response, **extra):
+    data = g.pop('metrics', None)
+    if data is None:
+        return
+    endpoint = _endpoint()
+    registry.observe('request_duration_seconds', endpoint, time.perf_counter() - data['started'])
+    registry.observe('db_queries', endpoint, data['queries'])
+    registry.observe('db_time_seconds', endpoint, data['db_time'])
+    registry.observe('serialization_seconds', endpoint, data['serialization'])
+    if not response.is_streamed:
+        registry.observe('response_bytes', endpoint, response.calculate_content_length() or 0)
+    registry.count_request(endpoint, response.status_code)
+
+
+class TimedJSONProvider(DefaultJSONProvider):
+    """Adds JSON encoding time to the current request's metrics."""
+
+    def dumps(self, obj, **kwargs):
+        started = time.perf_counter()
+        try:
+            return super().dumps(obj, **kwargs)
+        finally:
+            if has_request_context() and 'metrics' in g:
+                g.metrics['serialization'] += time.perf_counter() - started
+
+
+def init_metrics(app):
+    if not app.config['METRICS_ENABLED']:
+        return
+    app.json_provider_class = TimedJSONProvider
+    app.json = TimedJSONProvider(app)
+    request_started.connect(_request_started, app)
+    request_finished.connect(_request_finished, app)
+    event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+    event.listen(Engine, 'handle_error', _handle_error)
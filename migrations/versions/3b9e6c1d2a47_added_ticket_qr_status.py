@@ -0,0 +1,26 @@
+"""added ticket qr status
+
+Revision ID: 3b9e6c1d2a47
+Revises: 45284a1e217f
+Create Date: 2026-10-17 09:12:41.208113
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3b9e6c1d2a47'
+down_revision = '45284a1e217f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('tickets', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('qr_status', sa.String(length=20), nullable=True, server_default='pending'))
+
+
+def downgrade():
+    with op.batch_alter_table('tickets', schema=None) as batch_op:
+        batch_op.drop_column('qr_status')
@@ -0,0 +1,39 @@
+"""added category facets
+
+Revision ID: 5d1f8a2c6e94
+Revises: 0b7e93c4d5a1
+Create Date: 2026-10-17 17:32:48.901266
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d1f8a2c6e94'
+down_revision = '0b7e93c4d5a1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('category_facets',
+    sa.Column('category', sa.String(length=100), nullable=False),
+    sa.Column('events_count', sa.Integer(), nullable=False),
+    sa.Column('active_count', sa.Integer(), nullable=False),
+    sa.Column('listed_count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('category')
+    )
+
+    # Backfill from existing events
+    op.execute(
+        "INSERT INTO category_facets (category, events_count, active_count, listed_count) "
+        "SELECT COALESCE(category, ''), COUNT(id), "
+        "SUM(CASE WHEN COALESCE(is_active, TRUE) THEN 1 ELSE 0 END), "
+        "SUM(CASE WHEN COALESCE(is_active, TRUE) AND status = 'approved' THEN 1 ELSE 0 END) "
+        "FROM events GROUP BY COALESCE(category, '')"
+    )
+
+
+def downgrade():
+    op.drop_table('category_facets')
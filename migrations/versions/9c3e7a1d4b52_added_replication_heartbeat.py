@@ -0,0 +1,28 @@
+"""added replication heartbeat
+
+Revision ID: 9c3e7a1d4b52
+Revises: 5d1f8a2c6e94
+Create Date: 2026-10-18 00:21:37.512904
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9c3e7a1d4b52'
+down_revision = '5d1f8a2c6e94'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('replication_heartbeat',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('beat_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade():
+    op.drop_table('replication_heartbeat')
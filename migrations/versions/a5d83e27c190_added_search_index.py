@@ -0,0 +1,67 @@
+"""added full-text search index
+
+Revision ID: a5d83e27c190
+Revises: 7c41f0a9e2d5
+Create Date: 2026-10-17 13:26:02.417755
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a5d83e27c190'
+down_revision = '7c41f0a9e2d5'
+branch_labels = None
+depends_on = None
+
+
+# A frozen copy of the search.py DDL as of this revision, so old databases
+# upgrade the same way whatever search.py looks like later
+SQLITE_UPGRADE = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS events_fts USING fts5("
+    "title, description, category, city, tokenize='porter unicode61')",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS organizers_fts USING fts5("
+    "name, speciality, tokenize='porter unicode61')",
+    "INSERT INTO events_fts (rowid, title, description, category, city) "
+    "SELECT e.id, e.title, e.description, coalesce(e.category, ''), coalesce(v.city, '') "
+    "FROM events e LEFT JOIN venues v ON v.id = e.venue_id",
+    "INSERT INTO organizers_fts (rowid, name, speciality) "
+    "SELECT o.id, o.name, coalesce(o.speciality, '') FROM organizers o",
+]
+POSTGRES_UPGRADE = [
+    "CREATE TABLE IF NOT EXISTS event_search ("
+    "event_id INTEGER PRIMARY KEY REFERENCES events(id) ON DELETE CASCADE, document TSVECTOR NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS ix_event_search_document ON event_search USING GIN (document)",
+    "CREATE TABLE IF NOT EXISTS organizer_search ("
+    "organizer_id INTEGER PRIMARY KEY REFERENCES organizers(id) ON DELETE CASCADE, document TSVECTOR NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS ix_organizer_search_document ON organizer_search USING GIN (document)",
+    "INSERT INTO event_search (event_id, document) "
+    "SELECT e.id, "
+    "setweight(to_tsvector('english', coalesce(e.title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(e.category, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(v.city, '')), 'C') || "
+    "setweight(to_tsvector('english', coalesce(e.description, '')), 'D') "
+    "FROM events e LEFT JOIN venues v ON v.id = e.venue_id",
+    "INSERT INTO organizer_search (organizer_id, document) "
+    "SELECT o.id, "
+    "setweight(to_tsvector('english', coalesce(o.name, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(o.speciality, '')), 'B') "
+    "FROM organizers o",
+]
+DOWNGRADE = {
+    'sqlite': ["DROP TABLE IF EXISTS events_fts", "DROP TABLE IF EXISTS organizers_fts"],
+    'postgresql': ["DROP TABLE IF EXISTS event_search", "DROP TABLE IF EXISTS organizer_search"],
+}
+
+
+def upgrade():
+    # FTS5 on SQLite, tsvector + GIN on Postgres; other databases search with LIKE
+    statements = {'sqlite': SQLITE_UPGRADE, 'postgresql': POSTGRES_UPGRADE}
+    for statement in statements.get(op.get_bind().dialect.name, []):
+        op.execute(statement)
+
+
+def downgrade():
+    for statement in DOWNGRADE.get(op.get_bind().dialect.name, []):
+        op.execute(statement)
@@ -0,0 +1,26 @@
+"""added ticket qr claimed at
+
+Revision ID: b6d2e9f4a813
+Revises: 9c3e7a1d4b52
+Create Date: 2026-10-18 09:41:05.317640
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b6d2e9f4a813'
+down_revision = '9c3e7a1d4b52'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('tickets', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('qr_claimed_at', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('tickets', schema=None) as batch_op:
+        batch_op.drop_column('qr_claimed_at')
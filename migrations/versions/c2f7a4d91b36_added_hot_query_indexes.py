@@ -0,0 +1,38 @@
+"""added hot query indexes
+
+Revision ID: c2f7a4d91b36
+Revises: a5d83e27c190
+Create Date: 2026-10-17 14:51:37.904126
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c2f7a4d91b36'
+down_revision = 'a5d83e27c190'
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ('events', 'ix_events_status_active_start', ['status', 'is_active', 'start_datetime']),
+    ('events', 'ix_events_status_active_created', ['status', 'is_active', 'created_at']),
+    ('events', 'ix_events_organizer_start', ['organizer_id', 'start_datetime']),
+    ('events', 'ix_events_category_active', ['category', 'is_active']),
+    ('ticket_types', 'ix_ticket_types_event_id', ['event_id']),
+    ('orders', 'ix_orders_event_status', ['event_id', 'status']),
+    ('orders', 'ix_orders_user_date', ['user_id', 'order_date']),
+    ('tickets', 'ix_tickets_order_id', ['order_id']),
+    ('tickets', 'ix_tickets_ticket_type_id', ['ticket_type_id']),
+]
+
+
+def upgrade():
+    for table, name, columns in INDEXES:
+        op.create_index(name, table, columns, unique=False)
+
+
+def downgrade():
+    for table, name, _columns in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,26 @@
+"""added event manifest reset at
+
+Revision ID: e3a7c5b1f926
+Revises: b6d2e9f4a813
+Create Date: 2026-10-18 10:26:48.904113
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e3a7c5b1f926'
+down_revision = 'b6d2e9f4a813'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('events', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('manifest_reset_at', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('events', schema=None) as batch_op:
+        batch_op.drop_column('manifest_reset_at')
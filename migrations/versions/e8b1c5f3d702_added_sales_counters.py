@@ -0,0 +1,60 @@
+"""added sales counters
+
+Revision ID: e8b1c5f3d702
+Revises: c2f7a4d91b36
+Create Date: 2026-10-17 16:08:55.310472
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e8b1c5f3d702'
+down_revision = 'c2f7a4d91b36'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('event_sales',
+    sa.Column('event_id', sa.Integer(), nullable=False),
+    sa.Column('revenue', sa.Float(), nullable=False),
+    sa.Column('tickets_sold', sa.Integer(), nullable=False),
+    sa.Column('orders_count', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['event_id'], ['events.id'], ),
+    sa.PrimaryKeyConstraint('event_id')
+    )
+    op.create_table('ticket_type_sales',
+    sa.Column('ticket_type_id', sa.Integer(), nullable=False),
+    sa.Column('event_id', sa.Integer(), nullable=False),
+    sa.Column('sold', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['event_id'], ['events.id'], ),
+    sa.ForeignKeyConstraint(['ticket_type_id'], ['ticket_types.id'], ),
+    sa.PrimaryKeyConstraint('ticket_type_id')
+    )
+    with op.batch_alter_table('ticket_type_sales', schema=None) as batch_op:
+        batch_op.create_index('ix_ticket_type_sales_event_id', ['event_id'], unique=False)
+
+    # Backfill from existing orders
+    op.execute(
+        "INSERT INTO event_sales (event_id, revenue, tickets_sold, orders_count, updated_at) "
+        "SELECT o.event_id, SUM(o.total_amount), COALESCE(SUM(t.tickets), 0), COUNT(o.id), MAX(o.order_date) "
+        "FROM orders o LEFT JOIN (SELECT order_id, COUNT(id) AS tickets FROM tickets GROUP BY order_id) t "
+        "ON t.order_id = o.id WHERE o.status = 'completed' GROUP BY o.event_id"
+    )
+    op.execute(
+        "INSERT INTO ticket_type_sales (ticket_type_id, event_id, sold) "
+        "SELECT t.ticket_type_id, tt.event_id, COUNT(t.id) FROM tickets t "
+        "JOIN ticket_types tt ON tt.id = t.ticket_type_id JOIN orders o ON o.id = t.order_id "
+        "WHERE o.status = 'completed' GROUP BY t.ticket_type_id, tt.event_id"
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('ticket_type_sales', schema=None) as batch_op:
+        batch_op.drop_index('ix_ticket_type_sales_event_id')
+
+    op.drop_table('ticket_type_sales')
+    op.drop_table('event_sales')
@@ -0,0 +1,26 @@
+"""added user token version
+
+Revision ID: f4a2d86b19e3
+Revises: e8b1c5f3d702
+Create Date: 2026-10-17 13:05:27.418305
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f4a2d86b19e3'
+down_revision = 'e8b1c5f3d702'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('token_version', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_column('token_version')
@@ -2,8 +2,6 @@ from datetime import datetime
 from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, Float, Date
 from sqlalchemy.orm import relationship
 from app import db
-import os
-import qrcode
 
 # Association tables
 event_sponsor = db.Table('event_sponsor',
@@ -90,6 +88,15 @@ class Venue(db.Model):
 
 class Event(db.Model):
     __tablename__ = 'events'
+    __table_args__ = (
+        # /events and /featured-events: approved + active, ordered by date
+        db.Index('ix_events_status_active_start', 'status', 'is_active', 'start_datetime'),
+        db.Index('ix_events_status_active_created', 'status', 'is_active', 'created_at'),
+        # organizer pages and dashboards, ordered by date
+        db.Index('ix_events_organizer_start', 'organizer_id', 'start_datetime'),
+        # category counts
+        db.Index('ix_events_category_active', 'category', 'is_active'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
@@ -106,6 +113,7 @@ class Event(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     status=db.Column(db.String(20), default='pending')
+    manifest_reset_at = db.Column(db.DateTime)  # last ticket deletion; older scanner deltas start over
     sponsors = db.relationship('Sponsor', secondary=event_sponsor, lazy='subquery',
                              backref=db.backref('events', lazy=True))
     ticket_types = db.relationship('TicketType', backref='event', lazy=True)
@@ -131,6 +139,9 @@ class Event(db.Model):
 
 class TicketType(db.Model):
     __tablename__ = 'ticket_types'
+    __table_args__ = (
+        db.Index('ix_ticket_types_event_id', 'event_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     event_id = db.Column(db.Integer, db.ForeignKey('events.id'), nullable=False)
@@ -161,10 +172,11 @@ class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(50), nullable=False, unique=True)
     email = db.Column(db.String(100), nullable=False, unique=True)
-    password_hash = db.Column(db.String(128), nullable=False)
+    password_hash = db.Column(db.String(255), nullable=False)
     role = db.Column(db.String(20), nullable=False)  # 'admin', 'organizer', 'customer'
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     last_login = db.Column(db.DateTime)
+    token_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')  # bumped to revoke issued tokens
     
     orders = db.relationship('Order', backref='user', lazy=True)
     
@@ -180,6 +192,12 @@ class User(db.Model):
 
 class Order(db.Model):
     __tablename__ = 'orders'
+    __table_args__ = (
+        # per-event revenue/attendee aggregates
+        db.Index('ix_orders_event_status', 'event_id', 'status'),
+        # /profile/tickets, newest first
+        db.Index('ix_orders_user_date', 'user_id', 'order_date'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'))
@@ -254,6 +272,10 @@ class Discount(db.Model):
 
 class Ticket(db.Model):
     __tablename__ = 'tickets'
+    __table_args__ = (
+        db.Index('ix_tickets_order_id', 'order_id'),
+        db.Index('ix_tickets_ticket_type_id', 'ticket_type_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     ticket_type_id = db.Column(db.Integer, db.ForeignKey('ticket_types.id'), nullable=False)
@@ -261,7 +283,9 @@ class Ticket(db.Model):
     attendee_name = db.Column(db.String(100), nullable=False)
     attendee_email = db.Column(db.String(100), nullable=False)
     unique_code = db.Column(db.String(50), unique=True, nullable=False)
-    qr_code_path = db.Column(db.String(255))  # Path to QR code image
+    qr_code_path = db.Column(db.String(255))  # URL of the QR code image
+    qr_status = db.Column(db.String(20), default='pending')  # pending, rendering, ready, failed
+    qr_claimed_at = db.Column(db.DateTime)  # when a worker took it for rendering
     is_redeemed = db.Column(db.Boolean, default=False)
     redemption_date = db.Column(db.DateTime)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -269,21 +293,8 @@ class Ticket(db.Model):
     refund_request = db.relationship('RefundRequest', backref='ticket', uselist=False, lazy=True)
     
     def generate_qr_code(self):
-        qr = qrcode.QRCode(
-            version=1,
-            error_correction=qrcode.constants.ERROR_CORRECT_L,
-            box_size=10,
-            border=4,
-        )
-        qr.add_data(self.unique_code)
-        qr.make(fit=True)
-        img = qr.make_image(fill_color="black", back_color="white")
-        
-        filename = f"qr_{self.unique_code}.png"
-        img_path = os.path.join('static/qr_codes', filename)
-        img.save(img_path)
-        
-        self.qr_code_path = img_path
+        # Rendered on demand by /tickets/<code>/qr; qr_worker only warms the cache
+        self.qr_code_path = f"/tickets/{self.unique_code}/qr"
     
     def to_dict(self):
         
@@ -297,6 +308,7 @@ class Ticket(db.Model):
             'attendee_email': self.attendee_email,
             'unique_code': self.unique_code,
             'qr_code_path': self.qr_code_path,
+            'qr_status': self.qr_status,
             'is_redeemed': self.is_redeemed,
             'redemption_date': self.redemption_date.isoformat() if self.redemption_date else None,
             'created_at': self.created_at.isoformat()
@@ -323,13 +335,89 @@ class RefundRequest(db.Model):
             'processed_date': self.processed_date.isoformat() if self.processed_date else None,
             'admin_notes': self.admin_notes
         }
+class EventSales(db.Model):
+    """Running sales totals per event, maintained by sales.py alongside orders."""
+    __tablename__ = 'event_sales'
+
+    event_id = db.Column(db.Integer, db.ForeignKey('events.id'), primary_key=True)
+    revenue = db.Column(db.Float, nullable=False, default=0.0)
+    tickets_sold = db.Column(db.Integer, nullable=False, default=0)
+    orders_count = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'event_id': self.event_id,
+            'revenue': self.revenue,
+            'tickets_sold': self.tickets_sold,
+            'orders_count': self.orders_count
+        }
+
+class TicketTypeSales(db.Model):
+    """Running count of tickets sold per ticket type."""
+    __tablename__ = 'ticket_type_sales'
+    __table_args__ = (
+        db.Index('ix_ticket_type_sales_event_id', 'event_id'),
+    )
+
+    ticket_type_id = db.Column(db.Integer, db.ForeignKey('ticket_types.id'), primary_key=True)
+    event_id = db.Column(db.Integer, db.ForeignKey('events.id'), nullable=False)
+    sold = db.Column(db.Integer, nullable=False, default=0)
+
+class CategoryFacet(db.Model):
+    """Event counts per category, maintained by facets.py on every event write.
+
+    category is '' for events without one.
+    """
+    __tablename__ = 'category_facets'
+
+    category = db.Column(db.String(100), primary_key=True)
+    events_count = db.Column(db.Integer, nullable=False, default=0)   # every event
+    active_count = db.Column(db.Integer, nullable=False, default=0)   # is_active
+    listed_count = db.Column(db.Integer, nullable=False, default=0)   # is_active and approved
+
+class ReplicationHeartbeat(db.Model):
+    """One row the primary rewrites on a schedule; its age on a replica is that replica's lag."""
+    __tablename__ = 'replication_heartbeat'
+
+    id = db.Column(db.Integer, primary_key=True)
+    beat_at = db.Column(db.DateTime, nullable=False)
+
+class Hold(db.Model):
+    __tablename__ = 'holds'
+    __table_args__ = (
+        # The sweeper range-scans active holds by expiry
+        db.Index('ix_holds_status_expires_at', 'status', 'expires_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    token = db.Column(db.String(64), unique=True, nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    event_id = db.Column(db.Integer, db.ForeignKey('events.id'), nullable=False)
+    quantities = db.Column(db.JSON, nullable=False)  # {ticket_type_id: quantity}
+    status = db.Column(db.String(20), default='active')  # active, converted, released, expired
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'token': self.token,
+            'user_id': self.user_id,
+            'event_id': self.event_id,
+            'quantities': self.quantities,
+            'status': self.status,
+            'created_at': self.created_at.isoformat(),
+            'expires_at': self.expires_at.isoformat()
+        }
+
 class Management(db.Model):
     __tablename__ = 'management'
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     email = db.Column(db.String(100), unique=True, nullable=False)
-    password_hash = db.Column(db.String(128), nullable=False)
+    password_hash = db.Column(db.String(255), nullable=False)
     role = db.Column(db.String(20), default='admin')  # could support 'admin', 'moderator', etc.
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
@@ -0,0 +1,83 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from werkzeug.security import generate_password_hash, check_password_hash
+
+from app import app
+
+logger = logging.getLogger(__name__)
+
+
+class HashingBusy(Exception):
+    """Every hashing worker and queue slot is taken; the caller should answer 429."""
+
+
+class PasswordHasher:
+    """Runs password KDF calls on a small dedicated pool with a bounded backlog.
+
+    hashlib's scrypt/pbkdf2 release the GIL, so a thread pool keeps the KDF
+    off the request thread without stalling other requests in the worker.
+    Requests beyond workers + queue_size are refused instead of piling up.
+    """
+
+    def __init__(self, method, salt_length, workers, queue_size, timeout):
+        self.method = method
+        self.salt_length = salt_length
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash')
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+        self._prefix = None
+
+    def _submit(self, func, *args):
+        if not self._slots.acquire(blocking=False):
+            logger.warning("Password hashing pool saturated, refusing request")
+            raise HashingBusy('Too many concurrent sign-ins, try again shortly')
+        try:
+            future = self._executor.submit(func, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _f: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            # The call keeps its slot until it finishes, so the backlog stays bounded
+            logger.warning("Password hashing took over %ss, refusing request", self.timeout)
+            raise HashingBusy('Sign-in is taking too long, try again shortly')
+
+    def hash(self, password):
+        return self._submit(generate_password_hash, password, self.method, self.salt_length)
+
+    def verify(self, password_hash, password):
+        return self._submit(check_password_hash, password_hash, password)
+
+    @property
+    def prefix(self):
+        # werkzeug expands short names ('scrypt' -> 'scrypt:32768:8:1'), so take
+        # the stored form from a real hash rather than the configured string
+        if self._prefix is None:
+            self._prefix = generate_password_hash('', self.method, 1).split('$', 1)[0]
+        return self._prefix
+
+    def needs_rehash(self, password_hash):
+        return password_hash.split('$', 1)[0] != self.prefix
+
+    def verify_and_update(self, account, password):
+        """Check password against account.password_hash, upgrading the hash if
+        the configured KDF has changed since it was stored. Caller commits."""
+        if not self.verify(account.password_hash, password):
+            return False
+        if self.needs_rehash(account.password_hash):
+            account.password_hash = self.hash(password)
+            logger.info("Rehashed password for %s %s", type(account).__name__, account.id)
+        return True
+
+
+hasher = PasswordHasher(
+    method=app.config['PASSWORD_HASH_METHOD'],
+    salt_length=app.config['PASSWORD_SALT_LENGTH'],
+    workers=app.config['PASSWORD_HASH_WORKERS'],
+    queue_size=app.config['PASSWORD_HASH_QUEUE'],
+    timeout=app.config['PASSWORD_HASH_TIMEOUT']
+)
@@ -0,0 +1,127 @@
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, or_, select, update
+
+from app import app, db
+from models import Ticket
+from qrcodes import QRCache, render_qr_bytes
+from scheduler import scheduler, app_job
+
+logger = logging.getLogger(__name__)
+
+JOB_ID = 'render_pending_qr_codes'
+PRUNE_JOB_ID = 'prune_qr_cache'
+_executor = None
+
+qr_cache = QRCache(
+    app.config['QR_CACHE_FOLDER'],
+    max_items=app.config['QR_CACHE_ITEMS'],
+    max_files=app.config['QR_CACHE_MAX_FILES'],
+    recount_seconds=app.config['QR_CACHE_RECOUNT_SECONDS']
+)
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        # spawn keeps the children clear of the parent's DB connections and threads
+        _executor = ProcessPoolExecutor(
+            max_workers=app.config['QR_WORKERS'],
+            mp_context=multiprocessing.get_context('spawn')
+        )
+    return _executor
+
+
+def claim_pending_tickets(batch_size):
+    """Flip a batch of pending tickets to 'rendering' in one UPDATE so no other worker picks them up.
+
+    Claims older than QR_CLAIM_TIMEOUT_SECONDS (a worker died mid-batch) are
+    taken over as if still pending.
+    """
+    now = datetime.utcnow()
+    stale = now - timedelta(seconds=app.config['QR_CLAIM_TIMEOUT_SECONDS'])
+    claimable = or_(
+        Ticket.qr_status == 'pending',
+        and_(Ticket.qr_status == 'rendering', or_(Ticket.qr_claimed_at.is_(None), Ticket.qr_claimed_at < stale))
+    )
+    candidates = select(Ticket.id).where(claimable).order_by(Ticket.id).limit(batch_size)
+    claimed = db.session.execute(
+        update(Ticket).where(Ticket.id.in_(candidates), claimable)
+        .values(qr_status='rendering', qr_claimed_at=now)
+        .returning(Ticket.id, Ticket.unique_code)
+        .execution_options(synchronize_session=False)
+    ).all()
+    db.session.commit()
+    return [tuple(row) for row in claimed]
+
+
+def process_pending_qr_codes(batch_size=None):
+    """Warm the QR cache for one batch of pending tickets in the process pool.
+
+    Returns the batch size.
+    """
+    batch_size = batch_size or app.config['QR_BATCH_SIZE']
+    claimed = claim_pending_tickets(batch_size)
+    if not claimed:
+        return 0
+
+    futures = {
+        ticket_id: (unique_code, get_executor().submit(render_qr_bytes, unique_code, 'png'))
+        for ticket_id, unique_code in claimed
+    }
+
+    for ticket_id, (unique_code, future) in futures.items():
+        try:
+            # Disk only: pre-warmed codes shouldn't evict ones people are viewing
+            qr_cache.put(unique_code, 'png', future.result(), remember=False)
+            values = {'qr_status': 'ready'}
+        except Exception:
+            logger.exception("QR render failed for ticket %s", ticket_id)
+            values = {'qr_status': 'failed'}
+        Ticket.query.filter_by(id=ticket_id).update(values, synchronize_session=False)
+    db.session.commit()
+    return len(claimed)
+
+
+def drain_pending_qr_codes():
+    while process_pending_qr_codes():
+        pass
+
+
+def wake_qr_worker():
+    """Run the render job now instead of waiting for the next poll."""
+    if scheduler.running and scheduler.get_job(JOB_ID):
+        scheduler.modify_job(JOB_ID, next_run_time=datetime.now())
+
+
+scheduler.add_job(
+    app_job(app, drain_pending_qr_codes),
+    'interval',
+    seconds=app.config['QR_POLL_SECONDS'],
+    id=JOB_ID,
+    max_instances=1,
+    coalesce=True,
+    replace_existing=True
+)
+
+
+def prune_qr_cache():
+    removed = qr_cache.prune()
+    if removed:
+        logger.info("Pruned %s files from the QR disk cache", removed)
+
+
+# Runs beside the render job, which writes most of the disk tier; files
+# web workers render on demand are picked up by the periodic recount
+scheduler.add_job(
+    app_job(app, prune_qr_cache),
+    'interval',
+    seconds=app.config['QR_CACHE_PRUNE_SECONDS'],
+    id=PRUNE_JOB_ID,
+    max_instances=1,
+    coalesce=True,
+    replace_existing=True
+)
@@ -0,0 +1,164 @@
+import hashlib
+import heapq
+import io
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import qrcode
+import qrcode.image.svg
+
+QR_PARAMS = {
+    'version': 1,
+    'error_correction': qrcode.constants.ERROR_CORRECT_L,
+    'box_size': 10,
+    'border': 4,
+}
+# Bump when the rendering parameters change so cached images get new keys
+QR_RENDER_VERSION = 1
+
+FORMATS = {
+    'png': 'image/png',
+    'svg': 'image/svg+xml',
+}
+
+
+def render_qr_bytes(unique_code, fmt='png'):
+    """Render the QR image for a ticket code and return the encoded bytes.
+
+    Kept free of app/model imports so it can run inside a worker process.
+    """
+    qr = qrcode.QRCode(**QR_PARAMS)
+    qr.add_data(unique_code)
+    qr.make(fit=True)
+    if fmt == 'svg':
+        img = qr.make_image(image_factory=qrcode.image.svg.SvgPathImage)
+    else:
+        img = qr.make_image(fill_color="black", back_color="white")
+
+    buf = io.BytesIO()
+    img.save(buf)
+    return buf.getvalue()
+
+
+def qr_cache_key(unique_code, fmt='png'):
+    """Where a code's rendered image is cached; changes with the render parameters."""
+    raw = f"{QR_RENDER_VERSION}:{fmt}:{unique_code}".encode('utf-8')
+    return hashlib.sha256(raw).hexdigest()
+
+
+def qr_etag(data):
+    """ETag of a rendered image: a hash of its bytes."""
+    return hashlib.sha256(data).hexdigest()
+
+
+class QRCache:
+    """Bounded in-memory LRU of rendered QR images that spills to a bounded disk directory.
+
+    Writes only bump a file count; prune() trims the disk tier from a
+    scheduler job, so requests never walk the directory.
+    """
+
+    def __init__(self, folder, max_items=1024, max_files=50000, recount_seconds=3600):
+        self.folder = folder
+        self.max_items = max_items
+        self.max_files = max_files
+        self.recount_seconds = recount_seconds
+        self._items = OrderedDict()  # key -> (etag, bytes)
+        self._lock = threading.Lock()
+        self._file_count = None
+        self._counted_at = None
+
+    def _path(self, key, fmt):
+        return os.path.join(self.folder, key[:2], f"{key}.{fmt}")
+
+    def _remember(self, key, entry):
+        with self._lock:
+            self._items[key] = entry
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+
+    def get(self, unique_code, fmt='png'):
+        """Return (etag, bytes) from memory or disk, or (None, None) on a miss."""
+        key = qr_cache_key(unique_code, fmt)
+        with self._lock:
+            entry = self._items.get(key)
+            if entry is not None:
+                self._items.move_to_end(key)
+                return entry
+
+        try:
+            with open(self._path(key, fmt), 'rb') as fh:
+                data = fh.read()
+        except OSError:
+            return None, None
+
+        entry = (qr_etag(data), data)
+        self._remember(key, entry)
+        return entry
+
+    def put(self, unique_code, fmt, data, remember=True):
+        key = qr_cache_key(unique_code, fmt)
+        etag = qr_etag(data)
+        if remember:
+            self._remember(key, (etag, data))
+
+        path = self._path(key, fmt)
+        if os.path.exists(path):
+            return etag
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as fh:
+            fh.write(data)
+        os.replace(tmp_path, path)
+        with self._lock:
+            if self._file_count is not None:
+                self._file_count += 1
+        return etag
+
+    def get_or_render(self, unique_code, fmt='png'):
+        etag, data = self.get(unique_code, fmt)
+        if data is None:
+            data = render_qr_bytes(unique_code, fmt)
+            etag = self.put(unique_code, fmt, data)
+        return etag, data
+
+    def _disk_files(self):
+        for root, _dirs, files in os.walk(self.folder):
+            for name in files:
+                if not name.endswith('.tmp'):
+                    yield os.path.join(root, name)
+
+    def prune(self):
+        """Drop the least recently written files once the disk tier is over max_files.
+
+        Only walks the directory when this process's count says it is over,
+        or every recount_seconds to pick up files other processes wrote.
+        Returns the number of files removed.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if (self._file_count is not None and self._file_count <= self.max_files
+                    and now - self._counted_at < self.recount_seconds):
+                return 0
+
+        entries = []
+        for path in self._disk_files():
+            try:
+                entries.append((os.path.getmtime(path), path))
+            except OSError:
+                continue
+        excess = len(entries) - int(self.max_files * 0.9) if len(entries) > self.max_files else 0
+        removed = 0
+        for _mtime, path in heapq.nsmallest(excess, entries):
+            try:
+                os.remove(path)
+                removed += 1
+            except OSError:
+                pass
+        with self._lock:
+            self._file_count = len(entries) - removed
+            self._counted_at = now
+        return removed
@@ -0,0 +1,206 @@
+"""Send read-only requests to replica databases.
+
+Replicas are Flask-SQLAlchemy binds named replica_0, replica_1, ... (see
+DATABASE_REPLICA_URLS in config.py), so they get the same engine profile as the
+primary. RoutingSession.get_bind() picks one for reads when the current
+request was routed to replicas:
+
+- GET/HEAD requests read from a replica, unless the view is marked with
+  @primary (read-after-write pages such as /profile/tickets) or the client
+  wrote something within REPLICA_STICKY_SECONDS (tracked with a cookie);
+- everything else, DML, SELECT ... FOR UPDATE, flushes and anything outside
+  a request (CLI, scheduler jobs) uses the primary; once a request writes,
+  the rest of it stays on the primary;
+- a replica whose heartbeat is older than REPLICA_MAX_LAG_SECONDS, or that
+  can't be reached, is skipped until the next check; with none left, reads
+  fall back to the primary.
+
+The primary rewrites its heartbeat row every REPLICA_HEARTBEAT_SECONDS, so
+a replica's lag is simply how old its copy of that row is. Each web worker
+probes its replicas from its local scheduler every REPLICA_LAG_CHECK_SECONDS;
+requests only read the last result, so a replica that hangs on connect
+never holds up a request. Until a replica has been probed, or when its
+last probe is more than a few intervals old, it counts as unhealthy.
+"""
+import logging
+import random
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+from flask import g, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import select, update, insert
+from sqlalchemy import Select, TextClause
+
+from scheduler import scheduler, local_scheduler, app_job
+
+logger = logging.getLogger(__name__)
+
+JOB_ID = 'write_replication_heartbeat'
+CHECK_JOB_ID = 'check_replica_lag'
+STALE_CHECKS = 3  # probe results older than this many intervals are ignored
+READ_METHODS = {'GET', 'HEAD', 'OPTIONS'}
+
+# Routing decisions per request, for /metrics
+replica_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def _count(route):
+    with _stats_lock:
+        replica_stats[route] += 1
+
+
+def primary(view):
+    """Keep a GET view on the primary, e.g. pages read right after a write."""
+    view._db_primary = True
+    return view
+
+
+class ReplicaHealth:
+    """Lag per replica from its heartbeat row, probed every `interval` seconds by check()."""
+
+    def __init__(self, max_lag, interval):
+        self.max_lag = max_lag
+        self.interval = max(1, interval)
+        self._checked = {}  # bind key -> (checked_at, healthy)
+
+    def _lag(self, engine):
+        from models import ReplicationHeartbeat
+        with engine.connect() as connection:
+            beat_at = connection.execute(
+                select(ReplicationHeartbeat.beat_at).where(ReplicationHeartbeat.id == 1)
+            ).scalar()
+        return None if beat_at is None else (datetime.utcnow() - beat_at).total_seconds()
+
+    def healthy(self, key):
+        """The last probe's verdict; never touches the replica."""
+        if not self.max_lag:
+            return True
+        checked = self._checked.get(key)
+        return bool(checked) and checked[1] and time.monotonic() - checked[0] < self.interval * STALE_CHECKS
+
+    def check(self, key, engine):
+        """Probe one replica's lag and record whether reads may use it."""
+        checked = self._checked.get(key)
+        was_ok = checked[1] if checked else True
+        try:
+            lag = self._lag(engine)
+            ok = lag is not None and lag <= self.max_lag
+            if was_ok and not ok:
+                logger.warning("Replica %s is lagging (%s s behind); reading from the primary", key,
+                               'unknown' if lag is None else round(lag, 1))
+        except Exception:
+            ok = False
+            if was_ok:
+                logger.warning("Replica %s is unreachable; reading from the primary", key, exc_info=True)
+        if ok and checked and not was_ok:
+            logger.info("Replica %s caught up; reading from it again", key)
+        self._checked[key] = (time.monotonic(), ok)
+        return ok
+
+
+def _is_read(clause):
+    if clause is None:
+        return True
+    if isinstance(clause, Select):
+        return clause._for_update_arg is None
+    if isinstance(clause, TextClause):
+        return clause.text.lstrip()[:6].upper() in ('SELECT', 'WITH')
+    return not getattr(clause, 'is_dml', False)
+
+
+class RoutingSession(Session):
+    """db.session that reads from a replica when the request allows it."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and has_request_context():
+            if self._flushing or not _is_read(clause):
+                # Writes go to the primary, and so does the rest of the request
+                g.db_wrote = True
+                g.db_route = 'primary'
+            elif g.get('db_route') == 'replica':
+                return self._db.engines[g.db_replica]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def write_heartbeat(db):
+    from models import ReplicationHeartbeat
+    now = datetime.utcnow()
+    with db.engine.begin() as connection:
+        table = ReplicationHeartbeat.__table__
+        if not connection.execute(update(table).where(table.c.id == 1).values(beat_at=now)).rowcount:
+            connection.execute(insert(table).values(id=1, beat_at=now))
+
+
+def init_replicas(app, db):
+    keys = sorted(key for key in app.config.get('SQLALCHEMY_BINDS', {}) if key.startswith('replica_'))
+    if not keys:
+        return
+    health = ReplicaHealth(app.config['REPLICA_MAX_LAG_SECONDS'], app.config['REPLICA_LAG_CHECK_SECONDS'])
+    cookie = app.config['REPLICA_STICKY_COOKIE']
+    logger.info("Routing reads to %s replica(s)", len(keys))
+
+    @app.before_request
+    def _route_reads():
+        g.db_route = 'primary'
+        view = app.view_functions.get(request.endpoint)
+        if request.method not in READ_METHODS or view is None or getattr(view, '_db_primary', False):
+            return
+        if request.cookies.get(cookie):
+            _count('primary_sticky')
+            return
+        healthy = [key for key in keys if health.healthy(key)]
+        if not healthy:
+            _count('primary_fallback')
+            return
+        g.db_route, g.db_replica = 'replica', random.choice(healthy)
+        _count('replica')
+
+    @app.after_request
+    def _stick_after_write(response):
+        # Give the writer's next reads time to see their own change
+        if g.pop('db_wrote', False):
+            response.set_cookie(cookie, '1', max_age=app.config['REPLICA_STICKY_SECONDS'], httponly=True,
+                                secure=app.config['SESSION_COOKIE_SECURE'],
+                                samesite=app.config['SESSION_COOKIE_SAMESITE'])
+        return response
+
+    def write_replication_heartbeat():
+        write_heartbeat(db)
+
+    def check_replica_lag():
+        for key in keys:
+            health.check(key, db.engines[key])
+
+    if app.config['REPLICA_MAX_LAG_SECONDS']:
+        # Health lives in each web worker, so each probes for itself,
+        # starting as soon as its scheduler does
+        local_scheduler.add_job(
+            app_job(app, check_replica_lag),
+            'interval',
+            seconds=health.interval,
+            next_run_time=datetime.now(),
+            id=CHECK_JOB_ID,
+            max_instances=1,
+            coalesce=True,
+            replace_existing=True
+        )
+        scheduler.add_job(
+            app_job(app, write_replication_heartbeat),
+            'interval',
+            seconds=app.config['REPLICA_HEARTBEAT_SECONDS'],
+            id=JOB_ID,
+            max_instances=1,
+            coalesce=True,
+            replace_existing=True
+        )
+
+
+def read_engine(db):
+    """Engine for a bulk read outside the ORM (e.g. /backup-data): the request's replica if routed."""
+    if has_request_context() and g.get('db_route') == 'replica':
+        return db.engines[g.db_replica]
+    return db.engine
@@ -0,0 +1,33 @@
+from collections import namedtuple
+from datetime import datetime
+
+from sqlalchemy import func
+from sqlalchemy.orm import lazyload
+
+from app import db
+from models import Event, Venue, EventSales
+
+EventSalesRow = namedtuple('EventSalesRow', ['event', 'venue', 'attendees', 'revenue'])
+
+
+def organizer_event_sales(organizer_id, upcoming_only=False):
+    """Every event of an organizer with its venue, attendees and revenue, in one query.
+
+    Attendees and revenue come from the event_sales counters (completed
+    orders). Rows are ordered by start date; with upcoming_only, past events
+    are left out.
+    """
+    query = db.session.query(
+        Event,
+        Venue,
+        func.coalesce(EventSales.tickets_sold, 0),
+        func.coalesce(EventSales.revenue, 0)
+    ).outerjoin(Venue, Venue.id == Event.venue_id)\
+     .outerjoin(EventSales, EventSales.event_id == Event.id)\
+     .filter(Event.organizer_id == organizer_id)\
+     .options(lazyload(Event.sponsors))  # not needed by any caller; skip the subquery load
+
+    if upcoming_only:
+        query = query.filter(Event.start_datetime > datetime.utcnow())
+
+    return [EventSalesRow(*row) for row in query.order_by(Event.start_datetime.asc()).all()]
@@ -0,0 +1,109 @@
+from datetime import datetime
+
+from sqlalchemy import func, select, delete, update, insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app import app, db
+from models import EventSales, TicketTypeSales, Order, Ticket, TicketType
+
+UPSERT_DIALECTS = {'sqlite': sqlite.insert, 'postgresql': postgresql.insert}
+
+
+def _add(model, key, values, increments):
+    """Add increments to a counter row, creating it if needed, in one statement where possible."""
+    table = model.__table__
+    dialect = db.session.get_bind().dialect.name
+    if dialect in UPSERT_DIALECTS:
+        stmt = UPSERT_DIALECTS[dialect](table).values(**key, **values, **increments)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(key),
+            set_={col: table.c[col] + stmt.excluded[col] for col in increments}
+        )
+        db.session.execute(stmt)
+        return
+
+    conditions = [table.c[col] == val for col, val in key.items()]
+    bump = update(table).where(*conditions).values(**{col: table.c[col] + val for col, val in increments.items()})
+    if db.session.execute(bump).rowcount:
+        return
+    try:
+        with db.session.begin_nested():
+            db.session.execute(insert(table).values(**key, **values, **increments))
+    except IntegrityError:
+        # A concurrent first sale created the row in between; add to it instead
+        db.session.execute(bump)
+
+
+def record_sale(event_id, revenue, sold_by_type, orders=1):
+    """Bump the counters for a completed order. Call inside the checkout transaction."""
+    _add(EventSales, {'event_id': event_id}, {'updated_at': datetime.utcnow()}, {
+        'revenue': revenue,
+        'tickets_sold': sum(sold_by_type.values()),
+        'orders_count': orders
+    })
+    for ticket_type_id, sold in sold_by_type.items():
+        _add(TicketTypeSales, {'ticket_type_id': ticket_type_id}, {'event_id': event_id}, {'sold': sold})
+
+
+def get_event_sales(event_id):
+    """(revenue, tickets_sold) for an event from its counter row."""
+    row = db.session.get(EventSales, event_id)
+    return (row.revenue, row.tickets_sold) if row else (0.0, 0)
+
+
+def get_ticket_type_sales(event_id):
+    """{ticket_type_id: sold} for an event."""
+    return dict(
+        db.session.query(TicketTypeSales.ticket_type_id, TicketTypeSales.sold)
+        .filter(TicketTypeSales.event_id == event_id).all()
+    )
+
+
+def delete_ticket_type_sales(ticket_type_id):
+    db.session.execute(delete(TicketTypeSales).where(TicketTypeSales.ticket_type_id == ticket_type_id))
+
+
+def delete_event_sales(event_id):
+    db.session.execute(delete(TicketTypeSales).where(TicketTypeSales.event_id == event_id))
+    db.session.execute(delete(EventSales).where(EventSales.event_id == event_id))
+
+
+def rebuild_sales_counters():
+    """Recompute every counter from completed orders and their tickets."""
+    db.session.execute(delete(TicketTypeSales))
+    db.session.execute(delete(EventSales))
+
+    tickets_per_order = (
+        select(Ticket.order_id, func.count(Ticket.id).label('tickets'))
+        .group_by(Ticket.order_id)
+        .subquery()
+    )
+    db.session.execute(insert(EventSales).from_select(
+        ['event_id', 'revenue', 'tickets_sold', 'orders_count', 'updated_at'],
+        select(
+            Order.event_id,
+            func.sum(Order.total_amount),
+            func.coalesce(func.sum(tickets_per_order.c.tickets), 0),
+            func.count(Order.id),
+            func.max(Order.order_date)
+        ).outerjoin(tickets_per_order, tickets_per_order.c.order_id == Order.id)
+        .where(Order.status == 'completed')
+        .group_by(Order.event_id)
+    ))
+    db.session.execute(insert(TicketTypeSales).from_select(
+        ['ticket_type_id', 'event_id', 'sold'],
+        select(Ticket.ticket_type_id, TicketType.event_id, func.count(Ticket.id))
+        .join(TicketType, TicketType.id == Ticket.ticket_type_id)
+        .join(Order, Order.id == Ticket.order_id)
+        .where(Order.status == 'completed')
+        .group_by(Ticket.ticket_type_id, TicketType.event_id)
+    ))
+    db.session.commit()
+
+
+@app.cli.command('rebuild-sales-counters')
+def rebuild_sales_counters_command():
+    """Rebuild event_sales and ticket_type_sales from orders and tickets."""
+    rebuild_sales_counters()
+    print("Sales counters rebuilt")
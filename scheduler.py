@@ -0,0 +1,43 @@
+import threading
+
+from apscheduler.schedulers.background import BackgroundScheduler
+
+# Deployment-wide jobs (QR rendering, hold sweeps, replication heartbeat);
+# they register themselves on import but must only run in one process, so
+# nothing starts this on import: `flask run-jobs` (the Procfile worker) or
+# `python app.py` in development does.
+scheduler = BackgroundScheduler(daemon=True)
+
+# Jobs that refresh this process's own in-memory state (check-in indexes).
+# Every web worker starts its copy with its first request, so processes
+# that never serve requests, like the QR render pool, don't run them.
+local_scheduler = BackgroundScheduler(daemon=True)
+_local_lock = threading.Lock()
+
+
+def app_job(app, func):
+    """Wrap a job so it runs inside the Flask app context."""
+    def run():
+        with app.app_context():
+            func()
+    run.__name__ = func.__name__
+    return run
+
+
+def start_scheduler(app):
+    """Start the deployment-wide jobs in this process; False if disabled."""
+    if not app.config.get('SCHEDULER_ENABLED'):
+        return False
+    if not scheduler.running:
+        scheduler.start()
+    return True
+
+
+def init_local_scheduler(app):
+    @app.before_request
+    def _start_local_scheduler():
+        if local_scheduler.running or not app.config.get('SCHEDULER_ENABLED'):
+            return
+        with _local_lock:
+            if not local_scheduler.running:
+                local_scheduler.start()
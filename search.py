@@ -0,0 +1,259 @@
+import logging
+import re
+
+from sqlalchemy import Float, Integer, bindparam, event, inspect, select, text
+
+from app import app, db
+from models import Event, Organizer, Venue
+
+logger = logging.getLogger(__name__)
+
+# Column weights: title/name count most, then category, city, description
+SQLITE_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS events_fts USING fts5("
+    "title, description, category, city, tokenize='porter unicode61')",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS organizers_fts USING fts5("
+    "name, speciality, tokenize='porter unicode61')",
+]
+SQLITE_DROP = [
+    "DROP TABLE IF EXISTS events_fts",
+    "DROP TABLE IF EXISTS organizers_fts",
+]
+POSTGRES_DDL = [
+    "CREATE TABLE IF NOT EXISTS event_search ("
+    "event_id INTEGER PRIMARY KEY REFERENCES events(id) ON DELETE CASCADE, document TSVECTOR NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS ix_event_search_document ON event_search USING GIN (document)",
+    "CREATE TABLE IF NOT EXISTS organizer_search ("
+    "organizer_id INTEGER PRIMARY KEY REFERENCES organizers(id) ON DELETE CASCADE, document TSVECTOR NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS ix_organizer_search_document ON organizer_search USING GIN (document)",
+]
+POSTGRES_DROP = [
+    "DROP TABLE IF EXISTS event_search",
+    "DROP TABLE IF EXISTS organizer_search",
+]
+
+SQL = {
+    'sqlite': {
+        'index_table': 'events_fts',
+        'clear_events': "DELETE FROM events_fts",
+        'delete_events': "DELETE FROM events_fts WHERE rowid IN :ids",
+        'insert_events': (
+            "INSERT INTO events_fts (rowid, title, description, category, city) "
+            "SELECT e.id, e.title, e.description, coalesce(e.category, ''), coalesce(v.city, '') "
+            "FROM events e LEFT JOIN venues v ON v.id = e.venue_id"
+        ),
+        'clear_organizers': "DELETE FROM organizers_fts",
+        'delete_organizers': "DELETE FROM organizers_fts WHERE rowid IN :ids",
+        'insert_organizers': (
+            "INSERT INTO organizers_fts (rowid, name, speciality) "
+            "SELECT o.id, o.name, coalesce(o.speciality, '') FROM organizers o"
+        ),
+        # Every match, unbounded: callers join it and filter/paginate in SQL.
+        # Lower rank is better on both backends.
+        'match_events': (
+            "SELECT rowid AS event_id, bm25(events_fts, 10.0, 1.0, 4.0, 2.0) AS rank FROM events_fts "
+            "WHERE events_fts MATCH :q"
+        ),
+        'search_organizers': (
+            "SELECT rowid, bm25(organizers_fts, 10.0, 3.0) AS rank FROM organizers_fts "
+            "WHERE organizers_fts MATCH :q ORDER BY rank LIMIT :limit"
+        ),
+    },
+    'postgresql': {
+        'index_table': 'event_search',
+        'clear_events': "DELETE FROM event_search",
+        'delete_events': "DELETE FROM event_search WHERE event_id IN :ids",
+        'insert_events': (
+            "INSERT INTO event_search (event_id, document) "
+            "SELECT e.id, "
+            "setweight(to_tsvector('english', coalesce(e.title, '')), 'A') || "
+            "setweight(to_tsvector('english', coalesce(e.category, '')), 'B') || "
+            "setweight(to_tsvector('english', coalesce(v.city, '')), 'C') || "
+            "setweight(to_tsvector('english', coalesce(e.description, '')), 'D') "
+            "FROM events e LEFT JOIN venues v ON v.id = e.venue_id"
+        ),
+        'clear_organizers': "DELETE FROM organizer_search",
+        'delete_organizers': "DELETE FROM organizer_search WHERE organizer_id IN :ids",
+        'insert_organizers': (
+            "INSERT INTO organizer_search (organizer_id, document) "
+            "SELECT o.id, "
+            "setweight(to_tsvector('english', coalesce(o.name, '')), 'A') || "
+            "setweight(to_tsvector('english', coalesce(o.speciality, '')), 'B') "
+            "FROM organizers o"
+        ),
+        'match_events': (
+            "SELECT event_id, -ts_rank(document, to_tsquery('english', :q)) AS rank FROM event_search "
+            "WHERE document @@ to_tsquery('english', :q)"
+        ),
+        'search_organizers': (
+            "SELECT organizer_id, ts_rank(document, to_tsquery('english', :q)) AS rank FROM organizer_search "
+            "WHERE document @@ to_tsquery('english', :q) ORDER BY rank DESC LIMIT :limit"
+        ),
+    },
+}
+
+EVENT_FIELDS = ('title', 'description', 'category', 'venue_id')
+ORGANIZER_FIELDS = ('name', 'speciality')
+_index_ready = {}
+
+
+def _dialect(connection):
+    return connection.dialect.name
+
+
+def search_supported(connection):
+    """True when this database has a search backend and its tables exist (checked once)."""
+    dialect = _dialect(connection)
+    if dialect not in SQL:
+        return False
+    key = str(connection.engine.url)
+    if key not in _index_ready:
+        _index_ready[key] = inspect(connection).has_table(SQL[dialect]['index_table'])
+        if not _index_ready[key]:
+            logger.warning("Search index tables missing; run `flask search-reindex`")
+    return _index_ready[key]
+
+
+def create_search_tables(connection):
+    dialect = _dialect(connection)
+    ddl = {'sqlite': SQLITE_DDL, 'postgresql': POSTGRES_DDL}.get(dialect, [])
+    for statement in ddl:
+        connection.execute(text(statement))
+    _index_ready.pop(str(connection.engine.url), None)
+
+
+def drop_search_tables(connection):
+    dialect = _dialect(connection)
+    ddl = {'sqlite': SQLITE_DROP, 'postgresql': POSTGRES_DROP}.get(dialect, [])
+    for statement in ddl:
+        connection.execute(text(statement))
+    _index_ready.pop(str(connection.engine.url), None)
+
+
+def _reindex(connection, kind, ids=None):
+    sql = SQL[_dialect(connection)]
+    alias = 'e' if kind == 'events' else 'o'
+    if ids is None:
+        connection.execute(text(sql[f'clear_{kind}']))
+        connection.execute(text(sql[f'insert_{kind}']))
+        return
+
+    delete = text(sql[f'delete_{kind}']).bindparams(bindparam('ids', expanding=True))
+    insert = text(f"{sql[f'insert_{kind}']} WHERE {alias}.id IN :ids")\
+        .bindparams(bindparam('ids', expanding=True))
+    ids = list(ids)
+    for i in range(0, len(ids), 500):
+        params = {'ids': ids[i:i + 500]}
+        connection.execute(delete, params)
+        connection.execute(insert, params)
+
+
+def reindex_events(connection, ids=None):
+    _reindex(connection, 'events', ids)
+
+
+def reindex_organizers(connection, ids=None):
+    _reindex(connection, 'organizers', ids)
+
+
+def rebuild_search_index():
+    """Recreate and fully repopulate the search tables (after bulk loads)."""
+    with db.engine.begin() as connection:
+        create_search_tables(connection)
+        reindex_events(connection)
+        reindex_organizers(connection)
+
+
+def _changed(obj, fields):
+    state = inspect(obj)
+    return any(state.attrs[field].history.has_changes() for field in fields)
+
+
+@event.listens_for(db.session, 'after_flush')
+def _sync_search_index(session, flush_context):
+    """Keep the index in step with Event/Organizer/Venue writes, inside the same transaction."""
+    event_ids, organizer_ids, venue_ids = set(), set(), set()
+    for obj in list(session.new) + list(session.deleted):
+        if isinstance(obj, Event):
+            event_ids.add(obj.id)
+        elif isinstance(obj, Organizer):
+            organizer_ids.add(obj.id)
+    for obj in session.dirty:
+        if isinstance(obj, Event) and _changed(obj, EVENT_FIELDS):
+            event_ids.add(obj.id)
+        elif isinstance(obj, Organizer) and _changed(obj, ORGANIZER_FIELDS):
+            organizer_ids.add(obj.id)
+        elif isinstance(obj, Venue) and _changed(obj, ('city',)):
+            venue_ids.add(obj.id)
+
+    if not (event_ids or organizer_ids or venue_ids):
+        return
+    connection = session.connection()
+    if not search_supported(connection):
+        return
+    if venue_ids:
+        rows = connection.execute(
+            select(Event.id).where(Event.venue_id.in_(venue_ids))
+        ).scalars()
+        event_ids.update(rows)
+    if event_ids:
+        reindex_events(connection, event_ids)
+    if organizer_ids:
+        reindex_organizers(connection, organizer_ids)
+
+
+@event.listens_for(db.metadata, 'after_create')
+def _create_search_tables(target, connection, **kw):
+    create_search_tables(connection)
+
+
+@event.listens_for(db.metadata, 'before_drop')
+def _drop_search_tables(target, connection, **kw):
+    drop_search_tables(connection)
+
+
+def _match_query(dialect, term):
+    """Turn free text into a safe prefix query for the backend."""
+    tokens = re.findall(r'\w+', term.lower())
+    if not tokens:
+        return None
+    if dialect == 'postgresql':
+        return ' & '.join(f'{token}:*' for token in tokens)
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def _search(kind, term, limit):
+    connection = db.session.connection()
+    dialect = _dialect(connection)
+    q = _match_query(dialect, term)
+    if q is None or not search_supported(connection):
+        return None
+    rows = connection.execute(
+        text(SQL[dialect][f'search_{kind}']),
+        {'q': q, 'limit': limit}
+    ).all()
+    return [row[0] for row in rows]
+
+
+def event_matches(term):
+    """Subquery of (event_id, rank) for events matching term, lower rank first,
+    or None if search is unavailable. Join it to filter and order in SQL."""
+    connection = db.session.connection()
+    dialect = _dialect(connection)
+    q = _match_query(dialect, term)
+    if q is None or not search_supported(connection):
+        return None
+    return text(SQL[dialect]['match_events']).bindparams(q=q)\
+        .columns(event_id=Integer, rank=Float).subquery('event_matches')
+
+
+def search_organizer_ids(term, limit=None):
+    """Ranked organizer ids matching term (best first), or None if search is unavailable."""
+    return _search('organizers', term, limit or app.config['SEARCH_MAX_RESULTS'])
+
+
+@app.cli.command('search-reindex')
+def search_reindex_command():
+    """Rebuild the full-text search index from the source tables."""
+    rebuild_search_index()
+    print("Search index rebuilt")
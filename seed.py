@@ -1,5 +1,6 @@
 from app import app, db
 from models import *
+from sales import rebuild_sales_counters
 
 with app.app_context():
     # Clear existing data
@@ -111,4 +112,5 @@ with app.app_context():
 )
     db.session.add(admin)
     db.session.commit()
+    rebuild_sales_counters()
     print("✅ Seeded 5 records in each table successfully!")
@@ -0,0 +1,159 @@
+from sqlalchemy.exc import InvalidRequestError
+from sqlalchemy.orm import defaultload, joinedload, lazyload, raiseload, selectinload
+
+from app import app, db
+from models import Event, Order, Ticket
+
+shapes = {}
+
+
+def _eager(option, attr):
+    # One extra SELECT ... IN for collections, a join for many-to-one
+    if attr.property.uselist:
+        return selectinload(attr) if option is None else option.selectinload(attr)
+    return joinedload(attr) if option is None else option.joinedload(attr)
+
+
+class Shape:
+    """A response shape: how to serialize a model and which relationships that reads.
+
+    Relationship paths are dotted ('event.organizer'). apply() turns them into
+    loader options (joinedload for many-to-one, selectinload for collections)
+    and switches every other relationship on the loaded objects to lazyload,
+    or to raiseload in strict mode so an unplanned access fails loudly.
+    """
+
+    def __init__(self, name, model, serialize, loads=()):
+        self.name = name
+        self.model = model
+        self.serialize = serialize
+        self.loads = tuple(loads)
+        shapes[name] = self
+
+    def _chains(self):
+        for path in self.loads:
+            model, chain = self.model, []
+            for attr_name in path.split('.'):
+                attr = getattr(model, attr_name)
+                chain.append(attr)
+                model = attr.property.mapper.class_
+            yield chain
+
+    def options(self, strict=None):
+        if strict is None:
+            strict = app.config['SERIALIZER_STRICT']
+        options = []
+        prefixes = set()
+        for chain in self._chains():
+            option = None
+            for depth, attr in enumerate(chain):
+                option = _eager(option, attr)
+                prefixes.add(tuple(chain[:depth + 1]))
+            options.append(option)
+
+        # Everything not declared: lazy (and never an implicit eager load), or raise
+        def fallback(option=None):
+            if strict:
+                return raiseload('*', sql_only=True) if option is None else option.raiseload('*', sql_only=True)
+            return lazyload('*') if option is None else option.lazyload('*')
+
+        options.append(fallback())
+        for prefix in prefixes:
+            option = defaultload(prefix[0])
+            for attr in prefix[1:]:
+                option = option.defaultload(attr)
+            options.append(fallback(option))
+        return options
+
+    def apply(self, query, strict=None):
+        return query.options(*self.options(strict))
+
+    def dump(self, obj):
+        return self.serialize(obj)
+
+    def dump_all(self, objects):
+        return [self.serialize(obj) for obj in objects]
+
+
+class UnplannedLazyLoad(AssertionError):
+    pass
+
+
+def assert_no_lazy_loads(shape, query=None):
+    """Load and serialize query (default: a sample of the shape's model) with
+    every undeclared relationship set to raise. Fails with the offending
+    attribute if the serializer reaches outside its declared loads."""
+    if query is None:
+        query = shape.model.query.limit(20)
+    try:
+        return shape.dump_all(shape.apply(query, strict=True).all())
+    except InvalidRequestError as e:
+        raise UnplannedLazyLoad(f"{shape.name}: {e}") from e
+
+
+def _event_with_admin_fields(event):
+    data = event.to_dict()
+    data['organizer_name'] = event.organizer.name if event.organizer else None
+    data['venue_name'] = event.venue.name if event.venue else None
+    data['status'] = event.status
+    return data
+
+
+def _event_summary(event):
+    venue = event.venue
+    return {
+        'id': event.id,
+        'title': event.title,
+        'image': event.image,
+        'category': event.category,
+        'date': event.start_datetime.strftime('%b %d, %Y'),
+        'time': event.start_datetime.strftime('%I:%M %p'),
+        'location': f"{venue.city}, {venue.state}" if venue else "",
+        'rating': 4.5,
+        'attendees': 1500
+    }
+
+
+def _event_detail(event):
+    return {
+        **event.to_dict(),
+        'organizer': event.organizer.to_dict() if event.organizer else None,
+        'venue': event.venue.to_dict() if event.venue else None,
+        'status': event.status
+    }
+
+
+def _order_with_tickets(order):
+    data = order.to_dict_full()
+    data['event'] = order.event.to_dict() if order.event else None
+    data['tickets'] = [ticket.to_dict() for ticket in order.tickets]
+    return data
+
+
+EVENT = Shape('event', Event, Event.to_dict, loads=('sponsors', 'ticket_types'))
+EVENT_SUMMARY = Shape('event_summary', Event, _event_summary, loads=('venue',))
+EVENT_ADMIN = Shape('event_admin', Event, _event_with_admin_fields,
+                    loads=('sponsors', 'ticket_types', 'organizer', 'venue'))
+EVENT_DETAIL = Shape('event_detail', Event, _event_detail,
+                     loads=('sponsors', 'ticket_types', 'organizer', 'venue'))
+TICKET = Shape('ticket', Ticket, Ticket.to_dict, loads=('ticket_type',))
+ORDER_WITH_TICKETS = Shape('order_with_tickets', Order, _order_with_tickets, loads=(
+    'event.organizer', 'event.sponsors', 'event.ticket_types', 'tickets.ticket_type'
+))
+
+
+@app.cli.command('check-serializers')
+def check_serializers_command():
+    """Serialize a sample of rows for every shape with unplanned lazy loads set to raise."""
+    failures = 0
+    for name, shape in sorted(shapes.items()):
+        try:
+            rows = assert_no_lazy_loads(shape)
+            print(f"ok    {name} ({len(rows)} rows)")
+        except UnplannedLazyLoad as e:
+            failures += 1
+            print(f"FAIL  {e}")
+        finally:
+            db.session.rollback()
+    if failures:
+        raise SystemExit(1)
@@ -0,0 +1,499 @@
+"""Synthetic data at production scale for load testing.
+
+    flask seed --organizers 10k --events 500k --orders 5M --seed 7
+
+Everything is drawn from one seeded RNG, so the same arguments (and the
+same --anchor date) produce the same rows. Shapes follow what real traffic
+looks like rather than uniform noise:
+
+- organizers, venues and buyers are Zipf-weighted, so a few are very busy;
+- event popularity is Zipf-distributed over a shuffled ranking;
+- orders land on a sales curve between a ticket type's sales_start and
+  sales_end: a small early-bird bump followed by a last-minute ramp, cut
+  off at the anchor for events still on sale.
+
+Rows go in with executemany, parents before children, in one transaction;
+ids are assigned up front so nothing is read back. The derived tables
+(sales counters, category facets, search index) are rebuilt at the end.
+seed.py keeps the small hand-written fixture set.
+"""
+import logging
+import random
+import re
+import time
+import uuid
+from array import array
+from collections import Counter
+from datetime import datetime, timedelta
+
+import click
+from sqlalchemy import func, select
+
+from app import app, db
+from backup import reset_sequences
+from cache import response_cache
+from facets import rebuild_category_facets
+from models import Event, Order, Organizer, Sponsor, Ticket, TicketType, User, Venue, event_sponsor
+from passwords import hasher
+from sales import rebuild_sales_counters
+from search import rebuild_search_index
+
+logger = logging.getLogger(__name__)
+
+DAY = 86400.0
+
+# Every generated user can sign in with this password
+PASSWORD = 'password'
+
+CITIES = [
+    ('Nairobi', 'Nairobi', 45), ('Mombasa', 'Mombasa', 15), ('Kisumu', 'Kisumu', 10),
+    ('Nakuru', 'Nakuru', 10), ('Eldoret', 'Uasin Gishu', 8), ('Thika', 'Kiambu', 5),
+    ('Naivasha', 'Nakuru', 4), ('Malindi', 'Kilifi', 3),
+]
+CATEGORIES = [
+    ('Music', 30, 1500), ('Entertainment', 12, 1000), ('Technology', 10, 2500),
+    ('Business', 8, 3000), ('Food', 10, 1200), ('Sports', 10, 800), ('Arts', 8, 700),
+    ('Comedy', 7, 1000), ('Education', 5, 500),
+]  # (name, share of events, typical price in KES)
+EVENT_WORDS = {
+    'Music': ['Jazz Night', 'Live Sessions', 'Music Fest', 'Acoustic Evening', 'Afrobeats Live'],
+    'Entertainment': ['Carnival', 'Game Night', 'Street Party', 'Cinema Under the Stars'],
+    'Technology': ['Dev Summit', 'AI Meetup', 'Hackathon', 'Cloud Day', 'Tech Conference'],
+    'Business': ['Founders Forum', 'Investor Breakfast', 'Demo Day', 'Leadership Summit'],
+    'Food': ['Food Expo', 'Wine Tasting', 'Street Food Fair', 'Nyama Choma Festival'],
+    'Sports': ['Marathon', 'Rugby Sevens', 'Football Derby', 'Cycling Tour'],
+    'Arts': ['Gallery Opening', 'Poetry Slam', 'Theatre Night', 'Craft Market'],
+    'Comedy': ['Comedy Night', 'Stand-up Special', 'Improv Show'],
+    'Education': ['Career Fair', 'Workshop', 'Masterclass', 'Book Launch'],
+}
+VENUE_KINDS = ['Hall', 'Arena', 'Gardens', 'Grounds', 'Theatre', 'Expo Centre', 'Lounge', 'Stadium']
+ORG_WORDS = ['Events', 'Live', 'Productions', 'Entertainment', 'Experiences', 'Promotions', 'Collective']
+FIRST_NAMES = ['Allan', 'Jane', 'Peter', 'Lucy', 'Mike', 'Amina', 'Brian', 'Wanjiru', 'Otieno', 'Faith',
+               'Kevin', 'Mercy', 'Daniel', 'Achieng', 'Samuel', 'Grace', 'Kipchoge', 'Njeri', 'David', 'Zawadi']
+LAST_NAMES = ['Maina', 'Otieno', 'Kamau', 'Wanjiku', 'Mwangi', 'Odhiambo', 'Kiptoo', 'Mutua', 'Njoroge',
+              'Achieng', 'Hassan', 'Kariuki', 'Chebet', 'Omondi', 'Wambui']
+SPONSOR_LEVELS = [('Gold', 2), ('Silver', 3), ('Bronze', 5)]
+PAYMENT_METHODS = [('mpesa', 70), ('card', 25), ('paypal', 5)]
+ORDER_STATUSES = [('completed', 95), ('cancelled', 3), ('pending', 2)]
+TICKETS_PER_ORDER = [(1, 55), (2, 30), (3, 8), (4, 5), (6, 2)]
+
+# Ticket tiers: (name, price multiplier, share of capacity). Early Bird only
+# sells during the first EARLY_BIRD_WINDOW of the sales period.
+TIERS = [('General Admission', 1.0, 0.7), ('VIP', 3.0, 0.1), ('Early Bird', 0.7, 0.2)]
+EARLY_BIRD_WINDOW = 0.25
+
+# Sales curve over the sales period, as a fraction x in [0, 1]: EARLY_SHARE
+# of orders follow Beta(1, EARLY_SHAPE) (launch bump), the rest Beta(LATE_SHAPE, 1)
+EARLY_SHARE = 0.2
+EARLY_SHAPE = 6.0
+LATE_SHAPE = 3.0
+
+# Zipf exponents: popularity of events, activity of organizers, venues and buyers
+EVENT_SKEW = 1.1
+ORGANIZER_SKEW = 0.9
+VENUE_SKEW = 0.8
+USER_SKEW = 0.6
+
+
+def parse_count(value):
+    """'10k' -> 10000, '5M' -> 5000000, '2.5m' -> 2500000, '1_000' -> 1000."""
+    match = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*([kKmM]?)\s*', str(value).replace('_', ''))
+    if not match:
+        raise ValueError(f'Not a count: {value!r}')
+    number, suffix = match.groups()
+    return int(float(number) * {'': 1, 'k': 1000, 'm': 1000000}[suffix.lower()])
+
+
+class CountType(click.ParamType):
+    name = 'count'
+
+    def convert(self, value, param, ctx):
+        if isinstance(value, int):
+            return value
+        try:
+            return parse_count(value)
+        except ValueError as e:
+            self.fail(str(e), param, ctx)
+
+
+def _cumulative(weights):
+    total, cum = 0.0, []
+    for weight in weights:
+        total += weight
+        cum.append(total)
+    return cum
+
+
+def _zipf_weights(rng, n, skew):
+    """Zipf weights over a shuffled ranking, so the popular items are spread out."""
+    ranks = list(range(1, n + 1))
+    rng.shuffle(ranks)
+    return [rank ** -skew for rank in ranks]
+
+
+def _choices(items):
+    values = [item[0] for item in items]
+    return values, _cumulative([item[-1] for item in items])
+
+
+def sales_curve_mass(cutoff):
+    """Share of an event's eventual sales that happen before `cutoff` (fraction of the period)."""
+    return EARLY_SHARE * (1 - (1 - cutoff) ** EARLY_SHAPE) + (1 - EARLY_SHARE) * cutoff ** LATE_SHAPE
+
+
+def sample_sales_fraction(rng, cutoff=1.0):
+    """Where in the sales period an order lands, drawn from the curve truncated at cutoff.
+
+    Both components have closed-form inverse CDFs, so this is one draw.
+    """
+    early = EARLY_SHARE * (1 - (1 - cutoff) ** EARLY_SHAPE)
+    u = rng.random() * (early + (1 - EARLY_SHARE) * cutoff ** LATE_SHAPE)
+    if u < early:
+        return 1 - (1 - u / EARLY_SHARE) ** (1 / EARLY_SHAPE)
+    return ((u - early) / (1 - EARLY_SHARE)) ** (1 / LATE_SHAPE)
+
+
+class BulkWriter:
+    """Buffers rows per table and inserts them with executemany, parents first."""
+
+    def __init__(self, connection, batch_size):
+        self.connection = connection
+        self.batch_size = batch_size
+        self.buffers = {}
+        self.pending = 0
+        self.counts = Counter()
+        self.seconds = 0.0
+
+    def add(self, table, row):
+        self.buffers.setdefault(table, []).append(row)
+        self.pending += 1
+        if self.pending >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        started = time.perf_counter()
+        for table in db.metadata.sorted_tables:
+            rows = self.buffers.pop(table, None)
+            if rows:
+                self.connection.execute(table.insert(), rows)
+                self.counts[table.name] += len(rows)
+        self.pending = 0
+        self.seconds += time.perf_counter() - started
+
+
+class SyntheticDataset:
+    """Generates and inserts one dataset. Call load() once."""
+
+    def __init__(self, organizers, venues, sponsors, events, users, orders,
+                 seed=42, anchor=None, batch_size=5000, progress=None):
+        self.counts = {'organizers': organizers, 'venues': venues, 'sponsors': sponsors,
+                       'events': events, 'users': users, 'orders': orders}
+        self.rng = random.Random(seed)
+        self.anchor = anchor or datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+        self.batch_size = batch_size
+        self.progress = progress or (lambda message: None)
+
+    def _at(self, offset):
+        """Datetime `offset` seconds from the anchor."""
+        return self.anchor + timedelta(seconds=offset)
+
+    def _code(self):
+        return str(uuid.UUID(int=self.rng.getrandbits(128), version=4))
+
+    def _next_ids(self, connection):
+        models = [Organizer, Venue, Sponsor, Event, TicketType, User, Order, Ticket]
+        return {
+            model.__tablename__: (connection.execute(select(func.max(model.id))).scalar() or 0) + 1
+            for model in models
+        }
+
+    def load(self):
+        started = time.perf_counter()
+        with db.engine.begin() as connection:
+            self.ids = self._next_ids(connection)
+            self.writer = BulkWriter(connection, self.batch_size)
+            self._users()
+            self._organizers()
+            self._venues()
+            self._sponsors()
+            self._events()
+            self._sales()
+            self.writer.flush()
+            reset_sequences(connection, [table for table in db.metadata.sorted_tables
+                                         if table.name in self.writer.counts])
+        inserted = time.perf_counter() - started
+        self.progress(f"Inserted {sum(self.writer.counts.values())} rows in {inserted:.1f}s "
+                      f"({self.writer.seconds:.1f}s in the database)")
+
+        rebuild_sales_counters()
+        rebuild_category_facets()
+        rebuild_search_index()
+        response_cache.invalidate('catalog')
+        self.progress(f"Rebuilt derived tables in {time.perf_counter() - started - inserted:.1f}s")
+        return dict(self.writer.counts)
+
+    def _users(self):
+        rng, n = self.rng, self.counts['users']
+        first = self.ids['users']
+        password_hash = hasher.hash(PASSWORD)
+        table = User.__table__
+        for user_id in range(first, first + n):
+            created = self._at(-rng.random() * 730 * DAY)
+            self.writer.add(table, {
+                'id': user_id, 'username': f'user{user_id}', 'email': f'user{user_id}@example.com',
+                'password_hash': password_hash, 'role': 'user', 'created_at': created,
+                'last_login': None, 'token_version': 0
+            })
+        self.user_ids = range(first, first + n)
+        self.user_cum = _cumulative(_zipf_weights(rng, n, USER_SKEW))
+        self.progress(f"users       {n}")
+
+    def _organizers(self):
+        rng, n = self.rng, self.counts['organizers']
+        first = self.ids['organizers']
+        table = Organizer.__table__
+        categories = [category for category, _, _ in CATEGORIES]
+        for org_id in range(first, first + n):
+            name = f"{rng.choice(LAST_NAMES)} {rng.choice(ORG_WORDS)} {org_id}"
+            slug = f'org{org_id}'
+            self.writer.add(table, {
+                'id': org_id, 'name': name, 'email': f'{slug}@example.com',
+                'phone': f'07{rng.randrange(10 ** 8):08d}', 'logo': f'logos/{slug}.png',
+                'website': f'https://{slug}.example.com', 'description': f'{name} runs events across Kenya.',
+                'speciality': rng.choice(categories), 'contact_email': f'contact@{slug}.example.com',
+                'created_at': self._at(-rng.uniform(30, 1500) * DAY), 'rating': round(rng.uniform(3, 5), 1)
+            })
+        self.organizer_ids = range(first, first + n)
+        self.organizer_cum = _cumulative(_zipf_weights(rng, n, ORGANIZER_SKEW))
+        self.progress(f"organizers  {n}")
+
+    def _venues(self):
+        rng, n = self.rng, self.counts['venues']
+        first = self.ids['venues']
+        table = Venue.__table__
+        cities, city_cum = _choices(CITIES)
+        states = {city: state for city, state, _ in CITIES}
+        self.venue_city, self.venue_capacity = [], array('I')
+        for venue_id in range(first, first + n):
+            city = rng.choices(cities, cum_weights=city_cum)[0]
+            capacity = min(60000, max(50, int(rng.lognormvariate(6.2, 1.0))))
+            created = self._at(-rng.uniform(60, 2000) * DAY)
+            self.writer.add(table, {
+                'id': venue_id, 'name': f"{city} {rng.choice(VENUE_KINDS)} {venue_id}",
+                'address': f"{rng.randrange(1, 400)} {rng.choice(LAST_NAMES)} Road", 'city': city,
+                'state': states[city], 'zip_code': f'{rng.randrange(100, 99999):05d}', 'capacity': capacity,
+                'created_at': created, 'updated_at': created, 'status': 'approved'
+            })
+            self.venue_city.append(city)
+            self.venue_capacity.append(capacity)
+        self.venue_ids = range(first, first + n)
+        self.venue_cum = _cumulative(_zipf_weights(rng, n, VENUE_SKEW))
+        self.progress(f"venues      {n}")
+
+    def _sponsors(self):
+        rng, n = self.rng, self.counts['sponsors']
+        first = self.ids['sponsors']
+        table = Sponsor.__table__
+        levels, level_cum = _choices(SPONSOR_LEVELS)
+        for sponsor_id in range(first, first + n):
+            slug = f'sponsor{sponsor_id}'
+            self.writer.add(table, {
+                'id': sponsor_id, 'name': f"{rng.choice(LAST_NAMES)} Group {sponsor_id}",
+                'logo': f'sponsors/{slug}.png', 'website': f'https://{slug}.example.com',
+                'contact_email': f'partners@{slug}.example.com',
+                'sponsorship_level': rng.choices(levels, cum_weights=level_cum)[0]
+            })
+        self.sponsor_ids = range(first, first + n)
+        self.progress(f"sponsors    {n}")
+
+    def _events(self):
+        """Events and their sponsors; remembers what the sales pass needs per event."""
+        rng, n = self.rng, self.counts['events']
+        first = self.ids['events']
+        table, links = Event.__table__, event_sponsor
+        categories, category_cum = _choices([(name, share) for name, share, _ in CATEGORIES])
+        prices = {name: price for name, _, price in CATEGORIES}
+
+        # Per-event facts for _sales(), as compact arrays (offsets in seconds from the anchor)
+        self.event_start = array('d')
+        self.sales_start = array('d')
+        self.event_capacity = array('I')
+        self.event_price = array('d')
+        weights = _zipf_weights(rng, n, EVENT_SKEW)
+
+        for index, event_id in enumerate(range(first, first + n)):
+            organizer_id = rng.choices(self.organizer_ids, cum_weights=self.organizer_cum)[0]
+            venue_index = rng.choices(range(len(self.venue_ids)), cum_weights=self.venue_cum)[0]
+            category = rng.choices(categories, cum_weights=category_cum)[0]
+            city = self.venue_city[venue_index]
+
+            start = rng.randrange(-365, 180) * DAY + rng.choice([10, 14, 18, 19, 20]) * 3600
+            end = start + rng.choice([2, 3, 4, 6, 8]) * 3600
+            sales_start = start - rng.uniform(21, 120) * DAY
+            created = min(sales_start - rng.uniform(0, 14) * DAY, -rng.uniform(0, 2) * DAY)
+            if start < 0:
+                status = 'approved' if rng.random() < 0.95 else 'rejected'
+            else:
+                status = rng.choices(['approved', 'pending', 'rejected'], [80, 15, 5])[0]
+            capacity = self.venue_capacity[venue_index]
+
+            self.writer.add(table, {
+                'id': event_id, 'title': f"{city} {rng.choice(EVENT_WORDS[category])} {event_id}",
+                'description': f"A {category.lower()} event in {city}.",
+                'venue_id': self.venue_ids[venue_index], 'organizer_id': organizer_id,
+                'start_datetime': self._at(start), 'end_datetime': self._at(end),
+                'image': f'events/{event_id}.jpg', 'category': category, 'rating': round(rng.uniform(3, 5), 1),
+                'capacity': capacity, 'is_active': rng.random() < 0.97,
+                'created_at': self._at(created), 'updated_at': self._at(created), 'status': status
+            })
+            if self.sponsor_ids and rng.random() < 0.3:
+                for sponsor_id in rng.sample(self.sponsor_ids, min(len(self.sponsor_ids), rng.randint(1, 3))):
+                    self.writer.add(links, {'event_id': event_id, 'sponsor_id': sponsor_id})
+
+            # Only approved events whose sales have opened have sold anything yet
+            cutoff = min(1.0, -sales_start / (start - sales_start))
+            if status != 'approved' or cutoff <= 0:
+                weights[index] = 0.0
+            else:
+                weights[index] *= sales_curve_mass(cutoff)
+
+            self.event_start.append(start)
+            self.sales_start.append(sales_start)
+            self.event_capacity.append(capacity)
+            self.event_price.append(prices[category] * rng.lognormvariate(0, 0.5))
+            if (index + 1) % 100000 == 0:
+                self.progress(f"events      {index + 1}/{n}")
+        self.event_ids = range(first, first + n)
+        self.event_weights = weights
+        self.progress(f"events      {n}")
+
+    def _orders_per_event(self):
+        """Spread the requested number of orders over events by popularity."""
+        per_event = array('I', [0]) * len(self.event_ids)
+        total_weight = sum(self.event_weights)
+        if not total_weight:
+            return per_event
+        cum = _cumulative(self.event_weights)
+        indexes = range(len(self.event_ids))
+        remaining = self.counts['orders']
+        while remaining:
+            chunk = min(remaining, 1000000)
+            for index in self.rng.choices(indexes, cum_weights=cum, k=chunk):
+                per_event[index] += 1
+            remaining -= chunk
+        return per_event
+
+    def _sales(self):
+        """Ticket types, orders and tickets, one event at a time."""
+        rng = self.rng
+        per_event = self._orders_per_event()
+        tt_table, order_table, ticket_table = TicketType.__table__, Order.__table__, Ticket.__table__
+        next_tt, next_order, next_ticket = self.ids['ticket_types'], self.ids['orders'], self.ids['tickets']
+        methods, method_cum = _choices(PAYMENT_METHODS)
+        statuses, status_cum = _choices(ORDER_STATUSES)
+        sizes, size_cum = _choices(TICKETS_PER_ORDER)
+        generated = 0
+
+        for index, event_id in enumerate(self.event_ids):
+            start, sales_start = self.event_start[index], self.sales_start[index]
+            period = start - sales_start
+            cutoff = max(0.0, min(1.0, -sales_start / period))
+            price = self.event_price[index]
+            capacity = self.event_capacity[index]
+            has_early_bird = capacity >= 200
+
+            tiers = TIERS if has_early_bird else TIERS[:2]
+            tier_ids = list(range(next_tt, next_tt + len(tiers)))
+            next_tt += len(tiers)
+            sold = [0] * len(tiers)
+
+            orders = []
+            for _ in range(per_event[index]):
+                fraction = sample_sales_fraction(rng, cutoff)
+                if has_early_bird and fraction < EARLY_BIRD_WINDOW:
+                    tier = rng.choices((0, 1, 2), (50, 10, 40))[0]
+                else:
+                    tier = 0 if rng.random() < 0.88 else 1
+                size = rng.choices(sizes, cum_weights=size_cum)[0]
+                status = rng.choices(statuses, cum_weights=status_cum)[0]
+                if status != 'cancelled':
+                    sold[tier] += size
+                orders.append((fraction, tier, size, status))
+            orders.sort()
+
+            # Stock is what's left; the most popular events simply sell out
+            for tier_index, (name, multiplier, share) in enumerate(tiers):
+                stock = max(sold[tier_index], int(capacity * share))
+                sales_end = start
+                if name == 'Early Bird':
+                    sales_end = sales_start + period * EARLY_BIRD_WINDOW
+                self.writer.add(tt_table, {
+                    'id': tier_ids[tier_index], 'event_id': event_id, 'name': name,
+                    'price': round(price * multiplier, -1), 'quantity_available': stock - sold[tier_index],
+                    'sales_start': self._at(sales_start), 'sales_end': self._at(sales_end),
+                    'description': None, 'is_active': True
+                })
+
+            for fraction, tier, size, status in orders:
+                order_id, next_order = next_order, next_order + 1
+                user_id = rng.choices(self.user_ids, cum_weights=self.user_cum)[0]
+                email = f'user{user_id}@example.com'
+                ordered_at = self._at(sales_start + fraction * period)
+                unit_price = round(price * TIERS[tier][1], -1)
+                self.writer.add(order_table, {
+                    'id': order_id, 'user_id': user_id, 'customer_email': email, 'order_date': ordered_at,
+                    'total_amount': unit_price * size, 'status': status,
+                    'payment_method': rng.choices(methods, cum_weights=method_cum)[0],
+                    'payment_status': 'paid' if status == 'completed' else status,
+                    'billing_address': None, 'event_id': event_id,
+                    'transaction_reference': f'TXN-S{order_id:09d}'
+                })
+                name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+                redeemed = start < 0 and status == 'completed' and rng.random() < 0.85
+                for _ in range(size):
+                    code = self._code()
+                    self.writer.add(ticket_table, {
+                        'id': next_ticket, 'ticket_type_id': tier_ids[tier], 'order_id': order_id,
+                        'attendee_name': name, 'attendee_email': email, 'unique_code': code,
+                        'qr_code_path': f'/tickets/{code}/qr', 'qr_status': 'ready',
+                        'is_redeemed': redeemed,
+                        'redemption_date': self._at(start + rng.uniform(-1, 2) * 3600) if redeemed else None,
+                        'created_at': ordered_at
+                    })
+                    next_ticket += 1
+
+            generated += per_event[index]
+            if (index + 1) % 100000 == 0:
+                self.progress(f"sales       {index + 1}/{len(self.event_ids)} events, {generated} orders")
+        self.progress(f"sales       {generated} orders")
+
+
+@app.cli.command('seed')
+@click.option('--organizers', type=CountType(), default='100', show_default=True)
+@click.option('--venues', type=CountType(), help='Default: half the organizers')
+@click.option('--sponsors', type=CountType(), help='Default: a tenth of the organizers')
+@click.option('--events', type=CountType(), default='1k', show_default=True)
+@click.option('--users', type=CountType(), help='Default: a quarter of the orders')
+@click.option('--orders', type=CountType(), default='10k', show_default=True)
+@click.option('--seed', 'seed', type=int, default=42, show_default=True, help='RNG seed')
+@click.option('--anchor', type=click.DateTime(['%Y-%m-%d']),
+              help="'Now' for generated dates (default: today); pin it for identical reruns")
+@click.option('--batch-size', type=int, default=5000, show_default=True)
+@click.option('--reset', is_flag=True, help='Drop and recreate all tables first')
+def seed_command(organizers, venues, sponsors, events, users, orders, seed, anchor, batch_size, reset):
+    """Generate a large synthetic dataset, e.g. --organizers 10k --events 500k --orders 5M."""
+    if reset:
+        db.drop_all()
+        db.create_all()
+    dataset = SyntheticDataset(
+        organizers=max(1, organizers),
+        venues=max(1, venues if venues is not None else organizers // 2),
+        sponsors=sponsors if sponsors is not None else organizers // 10,
+        events=events,
+        users=max(1, users if users is not None else orders // 4),
+        orders=orders,
+        seed=seed, anchor=anchor, batch_size=batch_size, progress=print
+    )
+    counts = dataset.load()
+    for table, count in sorted(counts.items()):
+        print(f"{table:16} {count}")
@@ -0,0 +1,134 @@
+"""Issuing the tickets of an order: one per attendee, inserted in one statement."""
+from collections import Counter, deque
+from datetime import datetime
+from uuid import uuid4
+
+from sqlalchemy import insert, select
+
+from app import db
+from models import Ticket
+
+
+class AttendeeError(ValueError):
+    """The attendees list doesn't fit the tickets being bought."""
+
+
+def normalize_attendees(attendees):
+    """Validate an attendees payload: [{name, email, ticket_type_id?}, ...]."""
+    if attendees is None:
+        return []
+    if not isinstance(attendees, list):
+        raise AttendeeError('attendees must be a list')
+    normalized = []
+    for index, attendee in enumerate(attendees):
+        if not isinstance(attendee, dict):
+            raise AttendeeError(f'attendees[{index}] must be an object')
+        name = str(attendee.get('name') or '').strip()
+        email = str(attendee.get('email') or '').strip()
+        if not name or not email:
+            raise AttendeeError(f'attendees[{index}] needs a name and an email')
+        ticket_type_id = attendee.get('ticket_type_id')
+        if ticket_type_id is not None:
+            try:
+                ticket_type_id = int(ticket_type_id)
+            except (TypeError, ValueError):
+                raise AttendeeError(f'attendees[{index}] has an invalid ticket_type_id')
+        normalized.append((ticket_type_id, name, email))
+    return normalized
+
+
+def quantities_from_attendees(attendees):
+    """{ticket_type_id: qty} when every attendee names a ticket type, else None."""
+    if not attendees or any(ticket_type_id is None for ticket_type_id, _, _ in attendees):
+        return None
+    return dict(Counter(ticket_type_id for ticket_type_id, _, _ in attendees))
+
+
+def assign_attendees(quantities, attendees, default_name=None, default_email=None):
+    """One (ticket_type_id, name, email) per ticket in quantities.
+
+    Attendees that name a ticket type take a ticket of that type; the rest
+    fill the remaining tickets in order. Tickets left over go to the buyer
+    (default_name/default_email).
+    """
+    remaining = dict(quantities)
+    assigned, unplaced = [], deque()
+    for ticket_type_id, name, email in attendees:
+        if ticket_type_id is None:
+            unplaced.append((name, email))
+            continue
+        if remaining.get(ticket_type_id, 0) <= 0:
+            raise AttendeeError(f'More attendees than tickets for ticket type {ticket_type_id}')
+        remaining[ticket_type_id] -= 1
+        assigned.append((ticket_type_id, name, email))
+
+    for ticket_type_id, qty in remaining.items():
+        for _ in range(qty):
+            if unplaced:
+                name, email = unplaced.popleft()
+            elif default_name and default_email:
+                name, email = default_name, default_email
+            else:
+                raise AttendeeError('attendee_name and attendee_email are required for tickets without an attendee')
+            assigned.append((ticket_type_id, name, email))
+    if unplaced:
+        raise AttendeeError('More attendees than tickets')
+    return assigned
+
+
+def _insert(rows):
+    """Insert ticket rows in one statement and return their ids in row order."""
+    stmt = insert(Ticket)
+    if db.session.get_bind(clause=stmt).dialect.insert_executemany_returning:
+        # Match rows back by their unique code: asking the database to keep
+        # parameter order makes SQLite fall back to one INSERT per row
+        ids = dict(db.session.execute(stmt.returning(Ticket.unique_code, Ticket.id), rows).all())
+    else:
+        db.session.execute(stmt, rows)
+        ids = dict(db.session.execute(
+            select(Ticket.unique_code, Ticket.id).where(Ticket.unique_code.in_([row['unique_code'] for row in rows]))
+        ).all())
+    return [ids[row['unique_code']] for row in rows]
+
+
+def issue_tickets(order_id, assignments, ticket_types):
+    """Create the tickets of an order and return them as Ticket.to_dict() would.
+
+    ticket_types is {ticket_type_id: (name, price)} from pricing the order,
+    so the response needs no further reads. Caller commits.
+    """
+    now = datetime.utcnow()
+    rows = []
+    for ticket_type_id, name, email in assignments:
+        code = str(uuid4())
+        rows.append({
+            'ticket_type_id': ticket_type_id,
+            'order_id': order_id,
+            'attendee_name': name,
+            'attendee_email': email,
+            'unique_code': code,
+            'qr_code_path': f"/tickets/{code}/qr",  # as Ticket.generate_qr_code
+            'qr_status': 'pending',  # cache warmed by qr_worker after commit
+            'is_redeemed': False,
+            'created_at': now,
+        })
+    if not rows:
+        return []
+
+    ids = _insert(rows)
+    created_at = now.isoformat()
+    return [{
+        'id': ticket_id,
+        'ticket_type_id': row['ticket_type_id'],
+        'ticket_type': ticket_types[row['ticket_type_id']][0],
+        'price': ticket_types[row['ticket_type_id']][1],
+        'order_id': order_id,
+        'attendee_name': row['attendee_name'],
+        'attendee_email': row['attendee_email'],
+        'unique_code': row['unique_code'],
+        'qr_code_path': row['qr_code_path'],
+        'qr_status': row['qr_status'],
+        'is_redeemed': False,
+        'redemption_date': None,
+        'created_at': created_at,
+    } for ticket_id, row in zip(ids, rows)]